@@ -2,19 +2,36 @@ from flask import jsonify, request
 from ib_insync import *
 from threading import Thread
 import datetime
-import re
 from ib_insync import IB
+from contract_cache import ContractCache
+from event_store import EventStore
+from bar_stream import BarStream
+from news_tagger import NewsTagger
 
 
 DEFAULT_CLIENT_ID = 20
+NEWS_RETENTION = 50
+TRADE_UPDATE_RETENTION = 1000
 
 
 class IBClient:
-   def __init__(self, client_id=DEFAULT_CLIENT_ID):
+   def __init__(self, client_id=DEFAULT_CLIENT_ID, contract_cache_path=None):
        self.ib = IB()
        self.client_id = client_id
-       self.news_bulletins = []  # store live news items
-       self.trade_updates = []  # store trade updates
+       # Pass DEFAULT_CONTRACT_CACHE (or any path) to keep contracts across runs
+       self.contracts = ContractCache(self.ib, path=contract_cache_path)
+       # store live news items, de-duplicated by bulletin id
+       self.news_bulletins = EventStore(NEWS_RETENTION, key=lambda n: n['msgId'], symbol=lambda n: n['symbol'])
+       # symbols for news headlines; a prequalified watchlist joins the universe
+       self.news_tagger = NewsTagger()
+       # store trade updates
+       self.trade_updates = EventStore(TRADE_UPDATE_RETENTION, symbol=lambda t: t.get('symbol', ''))
+       # one dispatcher for every real-time bar subscription
+       self.bar_stream = BarStream(self.ib)
+       # working trades by orderId, for O(1) cancel/modify
+       self.open_trades = {}
+       self.ib.openOrderEvent += self._track_trade
+       self.ib.orderStatusEvent += self._track_trade
 
 
    def connect(self, host='127.0.0.1', port=7497, client_id=None):
@@ -25,39 +42,47 @@ class IBClient:
 
 
    def disconnect(self):
+       self.bar_stream.close()
        self.ib.disconnect()
 
 
    def _on_news_bulletin(self, msgId, msgType, message, origExchange):
        now = datetime.datetime.now()
-       symbol = None
-
-
-       match = re.search(r"\[([A-Z]+)\]", message)
-       if match:
-           symbol = match.group(1)
-       else:
-           for part in message.split():
-               if part.isupper() and len(part) <= 5:
-                   symbol = part
-                   break
-
-
+       symbols = self.news_tagger.tag(message)
        self.news_bulletins.append({
+           'msgId': msgId,
            'datetime': now.isoformat(),
            'source': origExchange,
-           'symbol': symbol or "",
+           'symbol': symbols[0] if symbols else "",
+           'symbols': symbols,
            'headline': message,
            'url': f"https://www.google.com/search?q={message.replace(' ', '+')}"
-       })
+       }, now.timestamp())
+
+
+   def _track_trade(self, trade):
+       if trade.isDone():
+           self.open_trades.pop(trade.order.orderId, None)
+       else:
+           self.open_trades[trade.order.orderId] = trade
 
 
-       if len(self.news_bulletins) > 50:
-           self.news_bulletins.pop(0)
+   def get_real_time_news(self, symbol=None, since=0):
+       return self.news_bulletins.since(since, symbol)
 
 
-   def get_real_time_news(self):
-       return self.news_bulletins
+   def prequalify(self, symbols):
+       # Qualify a whole watchlist in one round trip, e.g. right after connect
+       for symbol in symbols:
+           self.news_tagger.add(symbol)
+       return self.contracts.qualify_many(symbols)
+
+
+   def _contract(self, symbol):
+       contract = self.contracts.get(symbol)
+       if contract is None:
+           raise ValueError(f"Could not qualify {symbol}")
+       return contract
 
 
    def get_account_summary(self):
@@ -67,41 +92,53 @@ class IBClient:
        return self.ib.portfolio()
   
    def place_order(self, symbol, action, quantity, order_type='MKT'):
-       contract = Stock(symbol, 'SMART', 'USD')
-       self.ib.qualifyContracts(contract)
+       contract = self._contract(symbol)
        order = MarketOrder(action, quantity) if order_type == 'MKT' else LimitOrder(action, quantity, 100)
        trade = self.ib.placeOrder(contract, order)
+       self._track_trade(trade)
        return trade
   
    def cancel_order(self, order_id):
-       for o in self.ib.openOrders():
-           if o.order.orderId == order_id:
-               self.ib.cancelOrder(o.order)
-           return True
-       return False
+       trade = self.open_trades.get(order_id)
+       if trade is None:
+           return False
+       self.ib.cancelOrder(trade.order)
+       return True
+
+   def modify_order(self, order_id, quantity=None, limit_price=None):
+       trade = self.open_trades.get(order_id)
+       if trade is None:
+           return None
+       if quantity is not None:
+           trade.order.totalQuantity = quantity
+       if limit_price is not None:
+           trade.order.lmtPrice = limit_price
+       return self.ib.placeOrder(trade.contract, trade.order)
+
+   def working_orders(self, symbol=None):
+       return [t for t in self.open_trades.values() if symbol is None or t.contract.symbol == symbol]
   
    def subscribe_price(self, symbol):
-       contract = Stock(symbol, 'SMART', 'USD')
-       self.ib.qualifyContracts(contract)
+       contract = self._contract(symbol)
        ticker = self.ib.reqMktData(contract, '', False, False)
        return ticker
   
    def subscribe_real_time_bars(self, symbol):
-       contract = Stock(symbol, 'SMART', 'USD')
+       contract = self._contract(symbol)
        bars = self.ib.reqRealTimeBars(contract, 5, "TRADES", False)
        return bars
   
    def get_news_provider(self):
        return self.ib.newsProviders()
   
-   def get_news_headlines(self, provider_code='BRFG', num_articles=10):
-       contract = Stock('AAPL', 'SMART', 'USD')
+   def get_news_headlines(self, provider_code='BRFG', num_articles=10, symbol='AAPL'):
        return self.ib.reqHistoricalNews(
-           conId=self.ib.qualifyContracts(contract)[0].conId,
-           providerCode=provider_code,
+           conId=self._contract(symbol).conId,
+           providerCodes=provider_code,
            startDateTime='',
+           endDateTime='',
            totalResults=num_articles,
-           options=[]
+           historicalNewsOptions=[]
        )
   
    def get_news_article(self, article_id):
@@ -117,8 +154,7 @@ class IBClient:
        } for h in headlines])
   
    def get_historical_bars(self, symbol, bar_size_seconds, duration_str='2 D'):
-       contract = Stock(symbol, 'SMART', 'USD')
-       self.ib.qualifyContracts(contract)
+       contract = self._contract(symbol)
        bar_size_str = f"{bar_size_seconds} secs"
        bars = self.ib.reqHistoricalData(
            contract,
@@ -149,28 +185,12 @@ class IBClient:
 
 
    def req_market_data(self, contract, callback):
-       self.ib.qualifyContracts(contract)
-       bars = self.ib.reqRealTimeBars(contract, 5, "TRADES", False)
-
-
-       def update_loop():
-           last_time = None
-           while True:
-               self.ib.sleep(1)
-               if bars:
-                   bar = bars[-1]
-                   if last_time != bar.time:
-                       tick = {
-                           'time': bar.time,
-                           'open': bar.open,
-                           'high': bar.high,
-                           'low': bar.low,
-                           'close': bar.close,
-                           'volume': bar.volume
-                       }
-                       callback(tick)
-                       last_time = bar.time
-
+       # callback(bar_dict) runs on the IB event loop as each 5-second bar
+       # arrives; keep the returned handle to stop it
+       if self.contracts.qualify(contract) is None:
+           raise ValueError(f"Could not qualify {contract.symbol}")
+       return self.bar_stream.subscribe(contract, callback)
 
-       Thread(target=update_loop, daemon=True).start()
 
+   def cancel_market_data(self, subscription):
+       return self.bar_stream.unsubscribe(subscription)
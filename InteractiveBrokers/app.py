@@ -1,15 +1,16 @@
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox
 import webbrowser
 import datetime
-import random
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.dates as mdates
 from matplotlib.dates import DateFormatter
-from mplfinance.original_flavor import candlestick_ohlc
-from re import search
 import threading
+import time
+import copy
+import tempfile
+import argparse
+import numpy as np
 
 
 
@@ -18,155 +19,366 @@ from threading import Thread
 from ibapi.client import EClient
 from ibapi.wrapper import EWrapper
 from ibapi.contract import Contract
-from ibapi.order import Order
 from ibapi.execution import ExecutionFilter
-
+from tick_conflator import TickConflator
+from subscriptions import SubscriptionRegistry
+from tick_buffer import TickStore
+from bar_cache import BAR_DTYPE, BarCache, bars_to_array, duration_str, ib_end_datetime
+from live_chart import LiveCandleChart
+from bar_aggregator import BarAggregators
+from event_store import EventStore
+from table_view import KeyedRows, WindowedTable
+from order_path import OrderIdAllocator, OrderLatency, OrderTemplates
+from order_book import OrderBook
+from pacing import TokenBucket
+from pnl import PnLEngine
+from journal import DEFAULT_JOURNAL_DIR, Journal, JournalReplayer
+from market_sim import MarketModel, SimulatedConnection
+from news_tagger import NewsTagger
+from news_index import NewsIndex
+from render_scheduler import RenderScheduler
+from basket import Basket, BasketLeg, BasketSender
+from subscription_pool import SubscriptionPool
+from engine_ipc import DEFAULT_ENGINE_ADDRESS, EngineConnection, EventPublisher
+from request_scheduler import (RequestScheduler, PRIORITY_ORDER, PRIORITY_MARKET_DATA, PRIORITY_ACCOUNT,
+                               PRIORITY_HISTORY, PRIORITY_NEWS)
+
+
+# Market data is pushed to the GUI at most this many times per second
+TICK_FLUSH_HZ = 20
+
+# Chart interval -> (IB barSizeSetting, bar length in seconds)
+CHART_INTERVALS = {
+    "1 min": ("1 min", 60),
+    "3 min": ("3 mins", 180),
+    "5 min": ("5 mins", 300),
+    "10 min": ("10 mins", 600),
+    "15 min": ("15 mins", 900),
+    "30 min": ("30 mins", 1800),
+    "1 hour": ("1 hour", 3600),
+    "4 hours": ("4 hours", 14400),
+    "1 day": ("1 day", 86400),
+    "1 week": ("1 week", 604800),
+    "1 month": ("1 month", 2592000),
+}
+CHART_BARS = 120
+# Chart panel payload asking for a redraw whatever bars are shown
+CHART_RELOAD = (None, None)
+CHART_WHAT_TO_SHOW = "TRADES"
+
+# Retention limits for the in-memory event stores
+NEWS_RETENTION = 20
+ACTIVITY_RETENTION = 5000
+TRADE_RETENTION = 5000
+
+# Market data lines the account may hold at once (IB's default is 100), and
+# the symbols kept subscribed at all times
+MARKET_DATA_LINES = 100
+WATCHLIST = ["AAPL", "TSLA", "MSFT", "AMZN", "NVDA"]
+
+# Placeholder quotes and candles while there is no live data
+OFFLINE_MARKET = MarketModel(seed=0)
+
+# Basket legs are paced below TWS's 50 messages/second limit, leaving room
+# for market data and other requests
+BASKET_ORDER_RATE = 40
 
 
 
 class IBApiClient(EWrapper, EClient):
-  def __init__(self, gui_callback):
+  def __init__(self, gui_callback, journal=None):
       EClient.__init__(self, self)
-      self.nextOrderId = None
+      # Records every tick, fill, position and account value when set
+      self.journal = journal
+      # Every outbound request goes through the scheduler (pacing + priority)
+      self.scheduler = RequestScheduler()
+      self.order_ids = OrderIdAllocator()
+      self.order_templates = OrderTemplates(self.make_stock_contract)
+      self.order_latency = OrderLatency()
+      # Our own orders by orderId/permId/symbol/status
+      self.orders = OrderBook()
+      self.orders.on_change.append(self.on_order_change)
       self.gui_callback = gui_callback
 
       self.positions = {}
-      self.trades = []
+      # Per-symbol and total P&L, updated in place by positions, fills and ticks
+      self.pnl = PnLEngine()
+      self.trades = EventStore(TRADE_RETENTION, key=lambda t: t['execId'], symbol=lambda t: t['symbol'])
       self.market_data = {}
+      self.tick_conflator = TickConflator()
+      self.subscriptions = SubscriptionRegistry()
+      self.tick_store = TickStore()
+      self.historical_requests = {}
+      self.historical_bars = {}
+      # 5-second real-time bars rolled up into every chart interval
+      self.bar_aggregators = BarAggregators([seconds for _, seconds in CHART_INTERVALS.values()])
+      self.bar_subscriptions = {}
 
 
   def connect_async(self, host="127.0.0.1", port=7497, client_id=100):
       Thread(target=self.connect, args=(host, port, client_id), daemon=True).start()
 
 
+  @property
+  def nextOrderId(self):
+      return self.order_ids.peek()
+
+
   def nextValidId(self, orderId: int):
-      self.nextOrderId = orderId
+      self.order_ids.reset(orderId)
       if self.gui_callback:
           self.gui_callback('next_order_id',orderId)
 
 
   def error(self, reqId, errorCode, errorString, advancedOrderRejectJson=None):
       print(f"IB Error {errorCode} (req {reqId}): {errorString}")
+      # A failed history request never gets historicalDataEnd
+      callback = self.historical_requests.pop(reqId, None)
+      if callback:
+          self.historical_bars.pop(reqId, None)
+          callback(None)
 
 
   def orderStatus(self, orderId, status, filled, remaining, avgFillPrice,
                   permId, parentId, lastFillPrice, clientId, whyHeld, mktCapPrice):
-      print(f"OrderStatus. ID: {orderId}, Status: {status}, Filled: {filled}, Remaining: {remaining}, AvgFillPrice: {avgFillPrice}")
+      self.order_latency.on_status(orderId, status)
+      self.orders.on_status(orderId, status, filled, remaining, avgFillPrice, permId)
+
+
+  def openOrder(self, orderId, contract, order, orderState):
+      self.orders.on_open_order(orderId, contract, order, orderState.status)
+
+
+  def on_order_change(self, state):
+      if self.gui_callback:
+          self.gui_callback('order_update', state)
 
 
 
   def execDetails(self, reqId, contract, execution):
+      if self.journal is not None:
+          self.journal.execution(reqId, contract, execution)
+      self.order_latency.on_fill(execution.orderId)
+      self.orders.on_execution(execution.orderId, execution.permId, execution.cumQty, execution.avgPrice)
       trade = {
           'symbol': contract.symbol,
           'qty': execution.shares,
           'price': execution.price,
           'side': execution.side,
           'time': execution.time,
-          'exchange': execution.exchange
+          'exchange': execution.exchange,
+          'execId': execution.execId
       }
-      self.trades.append(trade)
+      # reqExecutions replays fills we may already have seen live
+      if not self.trades.append(trade):
+          return
+      qty = execution.shares if execution.side == 'BOT' else -execution.shares
+      if reqId == -1:
+          self.pnl.on_fill(contract.symbol, qty, execution.price)
+      else:
+          # Already part of the position report
+          self.pnl.on_replayed_fill(contract.symbol, qty, execution.price)
       if self.gui_callback:
           self.gui_callback('trade_update', trade)
 
 
   def position(self, account, contract, position, avgCost):
+      if self.journal is not None:
+          self.journal.position(account, contract, position, avgCost)
       self.positions[contract.symbol] = position
+      self.pnl.on_position(contract.symbol, position, avgCost)
       if self.gui_callback:
           self.gui_callback('positions_update', dict(self.positions))
 
 
+  def updateNewsBulletin(self, msgId, msgType, newsMessage, originExch):
+      if self.gui_callback:
+          self.gui_callback('news_bulletin', {'msgId': msgId, 'message': newsMessage, 'exchange': originExch})
+
+
   def positionEnd(self):
+      self.pnl.on_position_end()
       print("Position data complete")
 
 
   def tickPrice(self, reqId, tickType, price, attrib):
-      print(f"tickPrice received: reqId={reqId}, tickType={tickType}, price={price}")
+      symbol = self.subscriptions.symbol_for(reqId)
+      if self.journal is not None:
+          self.journal.tick_price(reqId, tickType, price, symbol)
+      if tickType == 9:
+          if symbol is not None:
+              self.pnl.set_prior_close(symbol, price)
+          return
       if reqId not in self.market_data:
           self.market_data[reqId] = {}
       if tickType == 1:
-          self.market_data[reqId]['bid'] = price
+          field = 'bid'
       elif tickType == 2:
-          self.market_data[reqId]['ask'] = price
+          field = 'ask'
       elif tickType == 4:
-          self.market_data[reqId]['last'] = price
-      if self.gui_callback:
-          self.gui_callback('market_data_update', (reqId, self.market_data[reqId]))
+          field = 'last'
+      else:
+          return
+      self.market_data[reqId][field] = price
+      if symbol is not None:
+          self.tick_store.record(symbol, field, price)
+          self.pnl.on_quote(symbol, self.market_data[reqId])
+      # The GUI drains the conflator once per frame, see IBDashboard.flush_market_data
+      self.tick_conflator.push(reqId, self.market_data[reqId])
+
+
+  def tickSize(self, reqId, tickType, size):
+      symbol = self.subscriptions.symbol_for(reqId)
+      if self.journal is not None:
+          self.journal.tick_size(reqId, tickType, size, symbol)
+      # Only the size of the last trade is kept in the tick history
+      if tickType != 5:
+          return
+      if symbol is not None:
+          self.tick_store.record(symbol, 'size', float(size))
+
+
+  def request_historical_data(self, reqId, contract, end_datetime, duration, bar_size,
+                              what_to_show="TRADES", use_rth=True, callback=None):
+      self.historical_requests[reqId] = callback
+      self.historical_bars[reqId] = []
+      self.scheduler.submit(PRIORITY_HISTORY, self.reqHistoricalData, reqId, contract, end_datetime,
+                            duration, bar_size, what_to_show, 1 if use_rth else 0, 2, False, [])
+
+
+  def historicalData(self, reqId, bar):
+      if reqId in self.historical_bars:
+          self.historical_bars[reqId].append(bar)
+
+
+  def historicalDataEnd(self, reqId, start, end):
+      bars = self.historical_bars.pop(reqId, [])
+      callback = self.historical_requests.pop(reqId, None)
+      if callback:
+          callback(bars)
+
+
+  def request_real_time_bars(self, reqId, symbol, contract=None):
+      if contract is None:
+          contract = self.make_stock_contract(symbol)
+      self.bar_subscriptions[reqId] = symbol
+      self.scheduler.submit(PRIORITY_MARKET_DATA, self.reqRealTimeBars, reqId, contract, 5, "TRADES", False, [])
+
+
+  def cancel_real_time_bars(self, reqId):
+      self.bar_subscriptions.pop(reqId, None)
+      self.scheduler.submit(PRIORITY_MARKET_DATA, self.cancelRealTimeBars, reqId)
+
+
+  def realtimeBar(self, reqId, time, open_, high, low, close, volume, wap, count):
+      symbol = self.bar_subscriptions.get(reqId)
+      if symbol is not None:
+          self.bar_aggregators.for_symbol(symbol).update(time, open_, high, low, close, float(volume))
 
 
   def request_positions(self):
-      self.reqPositions()
+      self.scheduler.submit(PRIORITY_ACCOUNT, self.reqPositions)
 
 
   def request_executions(self):
       filt = ExecutionFilter()
-      self.reqExecutions(1, filt)
+      self.scheduler.submit(PRIORITY_ACCOUNT, self.reqExecutions, 1, filt)
 
 
-  def request_market_data(self, symbol, reqId):
+  def make_stock_contract(self, symbol):
       contract = Contract()
       contract.symbol = symbol
       contract.secType = "STK"
       contract.exchange = "SMART"
       contract.currency = "USD"
-      self.reqMktData(reqId, contract, "", False, False, [])
-
-
-  def place_order(self, symbol, action, qty, order_type="LMT", lmt_price=None, tif="GTC"):
-   if self.nextOrderId is None:
-       print("Waiting for next valid order ID from IB...")
-       return False
+      return contract
 
 
-   contract = Contract()
-   contract.symbol = symbol
-   contract.secType = "STK"
-   contract.exchange = "SMART"
-   contract.currency = "USD"
+  def request_market_data(self, symbol, reqId, contract=None):
+      if contract is None:
+          contract = self.make_stock_contract(symbol)
+      self.scheduler.submit(PRIORITY_MARKET_DATA, self.reqMktData, reqId, contract, "", False, False, [])
+      return contract
 
 
-   order = Order()
-   order.action = action
-   order.totalQuantity = qty
+  def cancel_market_data(self, reqId):
+      self.scheduler.submit(PRIORITY_MARKET_DATA, self.cancelMktData, reqId)
 
 
-   # Fix order_type string for IB API: convert "MID PRICE" to "MIDPRICE"
-   if order_type.upper().replace(" ", "") == "MIDPRICE":
-       order.orderType = "MIDPRICE"
-   elif order_type.upper() == "MKT":
-       order.orderType = "MKT"
-   else:
-       order.orderType = "LMT"
+  def request_open_orders(self):
+      self.scheduler.submit(PRIORITY_ACCOUNT, self.reqOpenOrders)
 
 
-   order.tif = tif
+  def request_news_bulletins(self):
+      self.scheduler.submit(PRIORITY_NEWS, self.reqNewsBulletins, True)
 
 
-   # Clear deprecated attributes to prevent IB Error 10268
-   order.eTradeOnly = ""
-   order.firmQuoteOnly = ""
-   order.nbboPriceCap = ""
+  def place_order(self, symbol, action, qty, order_type="LMT", lmt_price=None, tif="GTC"):
+   return self.submit_order(symbol, action, qty, order_type, lmt_price, tif) is not None
 
 
-   if order.orderType == "LMT" and lmt_price is not None:
+  def submit_order(self, symbol, action, qty, order_type="LMT", lmt_price=None, tif="GTC", on_submit=None):
+   # Hot path: no logging, and the contract and order come from templates.
+   # Returns the order id, or None if the order was not sent.
+   if lmt_price is not None:
        try:
-           order.lmtPrice = float(lmt_price)
+           lmt_price = float(lmt_price)
        except ValueError:
            print("Invalid limit price.")
-           return False
-
-
-   print(f"Placing order #{self.nextOrderId}: {action} {qty} {symbol} {order.orderType} at {lmt_price}")
-   self.placeOrder(self.nextOrderId, contract, order)
-   self.nextOrderId += 1
-   return True
+           return None
+   order_id = self.order_ids.next()
+   if order_id is None:
+       print("Waiting for next valid order ID from IB...")
+       return None
+   order = self.order_templates.order(action, qty, order_type, tif, lmt_price)
+   contract = self.order_templates.contract(symbol)
+   if on_submit:
+       on_submit(order_id)
+   self.order_latency.submitted(order_id)
+   # Registered before it is sent, so the first orderStatus finds the order
+   self.orders.submitted(order_id, contract, order)
+   self.scheduler.submit(PRIORITY_ORDER, self.placeOrder, order_id, contract, order)
+   return order_id
+
+
+  def cancel_order(self, orderId):
+      state = self.orders.get(orderId)
+      if state is None or not state.working:
+          return False
+      self.scheduler.submit(PRIORITY_ORDER, self.cancelOrder, orderId)
+      return True
+
+
+  def cancel_working_orders(self, symbol=None):
+      cancelled = [state.orderId for state in self.orders.working(symbol)]
+      for orderId in cancelled:
+          self.scheduler.submit(PRIORITY_ORDER, self.cancelOrder, orderId)
+      return cancelled
+
+
+  def modify_order(self, orderId, qty=None, lmt_price=None):
+      # Resending an order under the same id modifies it in TWS
+      state = self.orders.get(orderId)
+      if state is None or not state.working or state.order is None:
+          return False
+      order = copy.copy(state.order)
+      if qty is not None:
+          order.totalQuantity = qty
+      if lmt_price is not None:
+          order.lmtPrice = float(lmt_price)
+      self.scheduler.submit(PRIORITY_ORDER, self.placeOrder, orderId, state.contract, order)
+      return True
 
 
   def request_account_summary(self):
-      self.reqAccountSummary(9001, "All", "NetLiquidation,TotalCashValue,AvailableFunds")
+      self.scheduler.submit(PRIORITY_ACCOUNT, self.reqAccountSummary, 9001, "All",
+                            "NetLiquidation,TotalCashValue,AvailableFunds")
 
 
 
   def accountSummary(self, reqId, account, tag, value, currency):
+      if self.journal is not None:
+          self.journal.account_summary(reqId, account, tag, value, currency)
       if self.gui_callback:
           self.gui_callback('account_summary_update', {'tag': tag, 'value': value, 'currency': currency})
 
@@ -175,39 +387,174 @@ class IBApiClient(EWrapper, EClient):
       print("Account Summary End")
 
 
+class SimulatedIBApiClient(SimulatedConnection, IBApiClient):
+  # IBApiClient backed by the seeded market simulator instead of TWS
+  pass
+
+
+
 class IBClient:
- def __init__(self, gui_callback):
-     self.news_list = []
+ def __init__(self, gui_callback, host="127.0.0.1", port=7497, client_id=100, journal=None,
+              replay=None, replay_speed=1.0, sim_seed=None, sim_speed=1.0):
+     self.news_list = EventStore(NEWS_RETENTION, key=lambda n: n['headline'], symbol=lambda n: n['symbol'])
+     self.news_index = NewsIndex(self.news_list)
      self.news_urls = []
-     self.ibapi = IBApiClient(gui_callback)
-     self.ibapi.connect_async()
+     self.news_tagger = NewsTagger(WATCHLIST)
+     if sim_seed is None:
+         self.ibapi = IBApiClient(gui_callback, journal)
+     else:
+         self.ibapi = SimulatedIBApiClient(gui_callback, sim_seed, sim_speed, journal)
+     # Replaying recorded journal files stands in for the IB connection
+     self.replayer = JournalReplayer(replay, replay_speed) if replay else None
+     if self.replayer is None:
+         self.ibapi.connect_async(host, port, client_id)
      self.current_symbol = "AAPL"
      self.reqId_counter = 1
-     self.symbol_reqId_map = {}
-     self.trade_activities = []
+     self.subscriptions = self.ibapi.subscriptions
+     self.trade_activities = EventStore(ACTIVITY_RETENTION, symbol=lambda t: t.get('symbol', ''))
      self.last_prices = {}
+     self.gui_callback = gui_callback
+     # Simulated history must not end up in the real bar cache
+     self.bar_cache = BarCache(tempfile.mkdtemp(prefix="ib_sim_bars_")) if sim_seed is not None else BarCache()
+     self.pending_bar_keys = set()
+     self.bar_reqIds = {}
+     self.order_pacer = TokenBucket(BASKET_ORDER_RATE)
+     self.basket_sender = BasketSender(self.ibapi, self.order_pacer)
+     self.baskets = EventStore(100, key=lambda b: b.id)
+     # Recently viewed and watchlist symbols stay subscribed
+     self.market_data_pool = SubscriptionPool(MARKET_DATA_LINES, self.subscribe_market_data,
+                                              self.unsubscribe_market_data)
 
 
  def start(self):
+     if self.replayer is not None:
+         self.replayer.start(self.ibapi)
+         return
      threading.Timer(3, self.ibapi.run).start()
      threading.Timer(5, self.initial_request).start()
 
 
+ def close(self):
+     if self.replayer is not None:
+         self.replayer.stop()
+     if self.ibapi.journal is not None:
+         self.ibapi.journal.close()
+
+
  def initial_request(self):
   self.ibapi.request_positions()
   self.ibapi.request_executions()
-  self.subscribe_market_data(self.current_symbol)
+  self.ibapi.request_open_orders()
+  self.ibapi.request_news_bulletins()
+  self.market_data_pool.acquire(self.current_symbol)
+  self.market_data_pool.set_watchlist(WATCHLIST)
+  self.subscribe_bars(self.current_symbol)
   self.ibapi.request_account_summary()
 
- def subscribe_market_data(self, symbol):
-      if symbol in self.symbol_reqId_map:
-          return self.symbol_reqId_map[symbol]
+ def next_reqId(self):
       reqId = self.reqId_counter
       self.reqId_counter += 1
-      self.symbol_reqId_map[symbol] = reqId
-      self.ibapi.request_market_data(symbol, reqId)
       return reqId
 
+ def subscribe_market_data(self, symbol):
+      reqId = self.subscriptions.reqId_for(symbol)
+      if reqId is not None:
+          return reqId
+      reqId = self.next_reqId()
+      # Register before requesting so the first tick already resolves to a symbol
+      contract = self.ibapi.make_stock_contract(symbol)
+      self.subscriptions.add(symbol, reqId, contract)
+      self.news_tagger.add(symbol)
+      self.ibapi.request_market_data(symbol, reqId, contract)
+      return reqId
+
+ def unsubscribe_market_data(self, symbol):
+      reqId = self.subscriptions.remove_symbol(symbol)
+      if reqId is None:
+          return False
+      self.ibapi.cancel_market_data(reqId)
+      self.ibapi.market_data.pop(reqId, None)
+      return True
+
+ def acquire_market_data(self, symbol):
+      # A line through the pool, which may close its least recently used one
+      return self.market_data_pool.acquire(symbol)
+
+ def release_market_data(self, symbol):
+      return self.market_data_pool.release(symbol)
+
+ def subscribe_bars(self, symbol):
+      if symbol in self.bar_reqIds:
+          return self.bar_reqIds[symbol]
+      reqId = self.next_reqId()
+      self.bar_reqIds[symbol] = reqId
+      self.ibapi.request_real_time_bars(reqId, symbol)
+      return reqId
+
+ def unsubscribe_bars(self, symbol):
+      reqId = self.bar_reqIds.pop(symbol, None)
+      if reqId is None:
+          return False
+      self.ibapi.cancel_real_time_bars(reqId)
+      # Live bars would have a hole if the stream is picked up again later
+      self.ibapi.bar_aggregators.drop(symbol)
+      return True
+
+ def load_chart_bars(self, symbol, interval, fetch=True):
+      # Returns whatever the disk cache already holds for the chart window and
+      # asks TWS only for the ranges that are missing. Fetched ranges land in
+      # the cache and are announced with a 'chart_bars_update' event; the
+      # redraw that event causes passes fetch=False, so a range TWS has no
+      # bars for is not asked for again and again.
+      bar_size, bar_seconds = CHART_INTERVALS.get(interval, CHART_INTERVALS["5 min"])
+      key = (symbol, bar_size, CHART_WHAT_TO_SHOW)
+      end = int(time.time())
+      # Intraday windows reach back at least a few days so nights and weekends
+      # still leave enough bars to draw
+      start = end - max(bar_seconds * CHART_BARS, 4 * 86400)
+      if fetch and key not in self.pending_bar_keys and self.ibapi.isConnected():
+          for gap_start, gap_end in self.bar_cache.missing(key, start, end, min_gap=bar_seconds):
+              self.request_bar_range(key, gap_start, gap_end, bar_seconds)
+      cached = self.bar_cache.load(key, start, end + 1)
+      # Bars built live from the real-time stream take over the tail
+      aggregator = self.ibapi.bar_aggregators.get(symbol)
+      live = aggregator.bars(bar_seconds) if aggregator else None
+      if live is None or not len(live):
+          return cached[-CHART_BARS:]
+      first = live['time'][0]
+      head = cached[cached['time'] < first]
+      joined = cached[cached['time'] == first]
+      if len(joined):
+          # The stream joined the first live bucket part way through: its
+          # open, high and low so far come from history
+          live = live.copy()
+          bar, old = live[0], joined[-1]
+          bar['open'] = old['open']
+          bar['high'] = max(bar['high'], old['high'])
+          bar['low'] = min(bar['low'], old['low'])
+          bar['volume'] += old['volume']
+      return np.concatenate([head, live])[-CHART_BARS:]
+
+ def request_bar_range(self, key, start, end, bar_seconds):
+      symbol, bar_size, what_to_show = key
+      reqId = self.next_reqId()
+      self.pending_bar_keys.add(key)
+      partial_tail = end >= time.time() - 60
+      end_datetime = "" if partial_tail else ib_end_datetime(end)
+
+      def on_bars(bars):
+          self.pending_bar_keys.discard(key)
+          if bars is None:
+              return
+          self.bar_cache.store(key, bars_to_array(bars), start, end,
+                               bar_seconds if partial_tail else None)
+          if self.gui_callback:
+              self.gui_callback('chart_bars_update', key)
+
+      self.ibapi.request_historical_data(reqId, self.ibapi.make_stock_contract(symbol), end_datetime,
+                                         duration_str(end - start), bar_size, what_to_show,
+                                         callback=on_bars)
+
  def get_account_summary(self):
      return [
          {'tag': 'NetLiquidation', 'value': '1.0M'},
@@ -218,30 +565,115 @@ class IBClient:
       return self.ibapi.place_order(symbol, action, qty, order_type, lmt_price, tif)
 
 
+ def order_latency(self):
+      return self.ibapi.order_latency.summary()
+
+
+ def cancel_order(self, orderId):
+      return self.ibapi.cancel_order(orderId)
+
+
+ def request_stats(self):
+      # Outbound queue depth, sent counts and wait times per priority class
+      stats = self.ibapi.scheduler.stats()
+      if isinstance(self.ibapi, SimulatedConnection):
+          stats['simulator'] = self.ibapi.sim_stats()
+      return stats
+
+
+ def submit_basket(self, orders, name=""):
+      # orders: BasketLeg objects or (symbol, action, qty[, order_type, lmt_price, tif]) tuples
+      legs = [o if isinstance(o, BasketLeg) else BasketLeg(*o) for o in orders]
+      basket = Basket(legs, name)
+      self.baskets.append(basket)
+      return self.basket_sender.submit(basket, self.on_basket_update)
+
+
+ def liquidate_all(self):
+      legs = [BasketLeg(symbol, "SELL" if pos > 0 else "BUY", abs(pos), "MKT", None, "GTC")
+              for symbol, pos in list(self.ibapi.positions.items()) if pos]
+      return self.submit_basket(legs, "Liquidate All")
+
+
+ def on_basket_update(self, basket, leg):
+      if basket.done and self.gui_callback:
+          self.gui_callback('basket_update', basket.summary())
+
+
+ def cancel_working_orders(self, symbol=None):
+      return self.ibapi.cancel_working_orders(symbol)
+
+
+ def request_account_summary(self):
+      self.ibapi.request_account_summary()
+
+
+ @property
+ def positions(self):
+      return self.ibapi.positions
+
+
+ def set_current_symbol(self, symbol):
+      # The old market data line stays in the pool, so switching back is instant
+      if symbol == self.current_symbol:
+          return
+      self.unsubscribe_bars(self.current_symbol)
+      self.current_symbol = symbol
+      self.market_data_pool.acquire(symbol)
+      self.subscribe_bars(symbol)
+
+
+ def quotes_pending(self):
+      return self.ibapi.tick_conflator.pending()
+
+
+ def drain_quotes(self):
+      # Conflated quotes since the last call, by symbol
+      quotes = {}
+      for reqId, market_data in self.ibapi.tick_conflator.drain().items():
+          symbol = self.subscriptions.symbol_for(reqId)
+          if symbol is not None:
+              quotes[symbol] = market_data
+      return quotes
+
+
+ def drain_pnl(self):
+      # P&L rows changed since the last call and the totals, or None
+      return self.ibapi.pnl.drain()
+
+
+ def modify_order(self, orderId, qty=None, lmt_price=None):
+      return self.ibapi.modify_order(orderId, qty, lmt_price)
+
+
+ def working_orders(self, symbol=None):
+      return self.ibapi.orders.working(symbol)
+
+
  def on_news(self, bulletin):
       now = datetime.datetime.now()
-      symbol = None
-      match = search(r"\[([A-Z]+)\]", bulletin['message'])
-      if match:
-          symbol = match.group(1)
-      else:
-          parts = bulletin['message'].split()
-          for part in parts:
-              if part.isupper() and len(part) <= 5:
-                  symbol = part
-                  break
+      symbols = self.news_tagger.tag(bulletin['message'])
       source = bulletin.get('exchange', '') or bulletin.get('origExchange', '')
       headline = bulletin['message']
-      if not any(news['headline'] == headline for news in self.news_list):
-          self.news_list.append({
+      if headline not in self.news_list:
+          self.add_news({
               'datetime': now,
               'source': source,
-              'symbol': symbol if symbol else "",
+              'symbol': symbols[0] if symbols else "",
+              'symbols': symbols,
               'headline': headline,
               'url': bulletin.get('url', f"https://www.google.com/search?q={headline.replace(' ', '+')}")
-          })
-          if len(self.news_list) > 20:
-              self.news_list.pop(0)
+          }, now.timestamp())
+
+
+ def add_news(self, item, t):
+      if self.news_list.append(item, t):
+          self.news_index.add(item)
+
+
+ def search_news(self, query="", symbol=None, after=0):
+      # (seq, item) pairs, oldest first; see NewsIndex.search
+      return self.news_index.search(query, symbol, after)
 
 
 
@@ -251,18 +683,32 @@ class IBClient:
 
  def add_trade_activity(self, trade):
      self.trade_activities.append(trade)
-     if len(self.trade_activities) > 50:
-         self.trade_activities.pop(0)
 
 
 
  def get_trade_activities(self):
      return list(self.trade_activities)
+
+ def get_fills(self, symbol=None, n=50):
+     return self.ibapi.trades.last(n, symbol)
+
+ def get_news_for(self, symbol=None, since=0):
+     return self.news_list.since(since, symbol)
  
+ def quote_for(self, symbol):
+      reqId = self.subscriptions.reqId_for(symbol)
+      return self.ibapi.market_data.get(reqId) if reqId is not None else None
+
+
  def get_bid_mid_ask(self, symbol):
-  import random
-  bid = round(random.uniform(100, 110), 2)
-  ask = round(bid + random.uniform(0.1, 0.5), 2)
+  # Live quote from the pooled market data line when there is one
+  md = self.quote_for(symbol)
+  if md and md.get('bid') is not None and md.get('ask') is not None:
+      bid, ask = md['bid'], md['ask']
+      mid = (bid + ask) / 2
+      self.last_prices[symbol] = mid
+      return {'bid': bid, 'mid': mid, 'ask': ask}
+  bid, ask = OFFLINE_MARKET.quote(symbol, time.time())
   mid = round((bid + ask) / 2, 2)
   self.last_prices[symbol] = mid
   return {'bid': bid, 'mid': mid, 'ask': ask}
@@ -270,17 +716,313 @@ class IBClient:
 
 
 
+class TradingEngine:
+ # Headless mode: owns the IB connection in its own process and publishes
+ # everything the dashboard shows to any number of attached GUIs.
+ CALLS = {'place_order', 'cancel_order', 'modify_order', 'cancel_working_orders', 'liquidate_all',
+          'submit_basket', 'set_current_symbol', 'load_chart_bars', 'request_account_summary',
+          'order_latency', 'request_stats', 'get_fills', 'get_news_for', 'working_orders',
+          'acquire_market_data', 'release_market_data', 'subscribe_bars', 'unsubscribe_bars',
+          'request_bar_range'}
+
+ def __init__(self, host="127.0.0.1", port=7497, client_id=100, address=DEFAULT_ENGINE_ADDRESS,
+              tick_flush_hz=TICK_FLUSH_HZ, journal=None, sim_seed=None, sim_speed=1.0):
+     self.account_summary = {}
+     self.tick_flush_s = 1.0 / tick_flush_hz
+     self.client = IBClient(gui_callback=self.on_ib_event, host=host, port=port, client_id=client_id,
+                            journal=journal, sim_seed=sim_seed, sim_speed=sim_speed)
+     self.publisher = EventPublisher(self.snapshot, self.handle_call, address)
+
+
+ def on_ib_event(self, event_type, data):
+     # State the dashboard would otherwise keep in its own process
+     if event_type == 'trade_update':
+         self.client.add_trade_activity(data)
+     elif event_type == 'news_bulletin':
+         self.client.on_news(data)
+     elif event_type == 'account_summary_update':
+         self.account_summary[data['tag']] = data
+     self.publisher.publish(event_type, data)
+
+
+ def handle_call(self, method, args):
+     if method not in self.CALLS:
+         raise ValueError(f"{method} is not an engine call")
+     result = getattr(self.client, method)(*args)
+     if isinstance(result, Basket):
+         result = result.summary()
+     return result
+
+
+ def snapshot(self):
+     client = self.client
+     quotes = {}
+     for symbol in client.subscriptions.symbols():
+         md = client.quote_for(symbol)
+         if md:
+             quotes[symbol] = dict(md)
+     return {
+         'positions': dict(client.positions),
+         'trades': list(client.trade_activities),
+         'news': list(client.news_list),
+         'orders': client.working_orders(),
+         'account_summary': list(self.account_summary.values()),
+         'quotes': quotes,
+         'pnl': client.ibapi.pnl.snapshot(),
+         'next_order_id': client.ibapi.nextOrderId,
+     }
+
+
+ def run(self):
+     self.publisher.start()
+     self.client.start()
+     print(f"Engine running, GUIs can attach at {self.publisher.address}")
+     try:
+         while True:
+             quotes = self.client.drain_quotes()
+             if quotes:
+                 self.publisher.publish_quotes(quotes)
+             pnl = self.client.drain_pnl()
+             if pnl:
+                 self.publisher.publish('pnl_update', pnl)
+             time.sleep(self.tick_flush_s)
+     except KeyboardInterrupt:
+         pass
+     finally:
+         self.publisher.stop()
+         self.client.ibapi.disconnect()
+         self.client.close()
+
+
+
+class RemoteIBClient(IBClient):
+ # IBClient stand-in for a dashboard attached to a TradingEngine: local
+ # copies of what the engine publishes, and calls forwarded over the socket.
+ # There is no IB connection here (ibapi is None), so everything that would
+ # use one is forwarded.
+ def __init__(self, gui_callback, address=DEFAULT_ENGINE_ADDRESS):
+     self.news_list = EventStore(NEWS_RETENTION, key=lambda n: n['headline'], symbol=lambda n: n['symbol'])
+     self.news_index = NewsIndex(self.news_list)
+     self.news_urls = []
+     self.news_tagger = NewsTagger(WATCHLIST)
+     self.ibapi = None
+     self.current_symbol = "AAPL"
+     self.subscriptions = SubscriptionRegistry()
+     self.trade_activities = EventStore(ACTIVITY_RETENTION, symbol=lambda t: t.get('symbol', ''))
+     self.last_prices = {}
+     self.gui_callback = gui_callback
+     self.quotes = {}
+     self.quote_conflator = TickConflator()
+     self._positions = {}
+     self._pnl = None
+     self._pnl_lock = threading.Lock()
+     # (symbol, interval) -> bars from the engine's last load_chart_bars answer
+     self.chart_bars = {}
+     self.engine = EngineConnection(self.on_engine_event, address).connect()
+
+
+ def start(self):
+     self.engine.cast('set_current_symbol', self.current_symbol)
+     self.engine.request_snapshot()
+
+
+ def close(self):
+     self.engine.close()
+
+
+ def initial_request(self):
+     # The engine made the IB requests for its own connection; a GUI only
+     # needs the state they produced
+     self.engine.request_snapshot()
+
+
+ def on_engine_event(self, event_type, data):
+     if event_type == 'quotes':
+         for symbol, md in data.items():
+             self.quotes[symbol] = md
+             self.quote_conflator.push(symbol, md)
+         return
+     if event_type == 'snapshot':
+         self.apply_snapshot(data)
+         return
+     if event_type == 'pnl_update':
+         self.merge_pnl(data)
+         return
+     if event_type == 'positions_update':
+         self._positions = dict(data)
+     if self.gui_callback:
+         self.gui_callback(event_type, data)
+
+
+ def apply_snapshot(self, snapshot):
+     self._positions = dict(snapshot['positions'])
+     for trade in snapshot['trades']:
+         self.trade_activities.append(trade)
+     for item in snapshot['news']:
+         self.add_news(item, item['datetime'].timestamp())
+     for symbol, md in snapshot['quotes'].items():
+         self.quotes[symbol] = md
+         self.quote_conflator.push(symbol, md)
+     self.merge_pnl(snapshot['pnl'])
+     callback = self.gui_callback
+     if not callback:
+         return
+     callback('positions_update', dict(self._positions))
+     callback('trades_snapshot', None)
+     for state in snapshot['orders']:
+         callback('order_update', state)
+     for data in snapshot['account_summary']:
+         callback('account_summary_update', data)
+     if snapshot['next_order_id'] is not None:
+         callback('next_order_id', snapshot['next_order_id'])
+
+
+ @property
+ def positions(self):
+     return self._positions
+
+
+ def quote_for(self, symbol):
+     return self.quotes.get(symbol)
+
+
+ def quotes_pending(self):
+     return self.quote_conflator.pending()
+
+
+ def drain_quotes(self):
+     return self.quote_conflator.drain()
+
+
+ def merge_pnl(self, pnl):
+     # Engine updates pile up until the GUI drains them
+     with self._pnl_lock:
+         if self._pnl is None:
+             self._pnl = {'rows': {}, 'totals': None}
+         self._pnl['rows'].update(pnl['rows'])
+         self._pnl['totals'] = pnl['totals']
+
+
+ def drain_pnl(self):
+     with self._pnl_lock:
+         pnl, self._pnl = self._pnl, None
+     return pnl
+
+
+ def place_order(self, symbol, action, qty, order_type="LMT", lmt_price=None, tif="GTC"):
+     return self.engine.call('place_order', symbol, action, qty, order_type, lmt_price, tif)
+
+
+ def cancel_order(self, orderId):
+     return self.engine.call('cancel_order', orderId)
+
+
+ def modify_order(self, orderId, qty=None, lmt_price=None):
+     return self.engine.call('modify_order', orderId, qty, lmt_price)
+
+
+ def cancel_working_orders(self, symbol=None):
+     self.engine.cast('cancel_working_orders', symbol)
+
+
+ def liquidate_all(self):
+     self.engine.cast('liquidate_all')
+
+
+ def request_account_summary(self):
+     self.engine.cast('request_account_summary')
+
+
+ def set_current_symbol(self, symbol):
+     self.current_symbol = symbol
+     self.engine.cast('set_current_symbol', symbol)
+
+
+ def load_chart_bars(self, symbol, interval, fetch=True):
+     # Never waits on the engine: returns the bars from its last answer for
+     # this chart (none the first time) and asks again. The answer comes
+     # back as a 'chart_bars_loaded' event carrying the bars to draw.
+     def on_reply(ok, bars):
+         if not ok:
+             print(f"Chart bars for {symbol} failed: {bars}")
+             return
+         self.chart_bars[(symbol, interval)] = bars
+         if self.gui_callback:
+             self.gui_callback('chart_bars_loaded', (symbol, interval, bars))
+
+     self.engine.call_async('load_chart_bars', symbol, interval, fetch, callback=on_reply)
+     return self.chart_bars.get((symbol, interval), np.empty(0, dtype=BAR_DTYPE))
+
+
+ def request_bar_range(self, key, start, end, bar_seconds):
+     self.engine.cast('request_bar_range', key, start, end, bar_seconds)
+
+
+ def acquire_market_data(self, symbol):
+     return self.engine.call('acquire_market_data', symbol)
+
+
+ def release_market_data(self, symbol):
+     return self.engine.call('release_market_data', symbol)
+
+
+ # The engine's lines all belong to its pool; going around it would leave
+ # the pool holding symbols whose lines are gone
+ subscribe_market_data = acquire_market_data
+ unsubscribe_market_data = release_market_data
+
+
+ def subscribe_bars(self, symbol):
+     return self.engine.call('subscribe_bars', symbol)
+
+
+ def unsubscribe_bars(self, symbol):
+     return self.engine.call('unsubscribe_bars', symbol)
+
+
+ def submit_basket(self, orders, name=""):
+     # The engine's summary of the basket rather than the Basket itself
+     return self.engine.call('submit_basket', orders, name)
+
+
+ def working_orders(self, symbol=None):
+     return self.engine.call('working_orders', symbol)
+
+
+ def get_fills(self, symbol=None, n=50):
+     return self.engine.call('get_fills', symbol, n)
+
+
+ def order_latency(self):
+     return self.engine.call('order_latency')
+
+
+ def request_stats(self):
+     return self.engine.call('request_stats')
+
+
+
 class IBDashboard(tk.Tk):
- def __init__(self):
+ def __init__(self, tick_flush_hz=TICK_FLUSH_HZ, host="127.0.0.1", port=7497, client_id=100,
+              engine_address=None, journal=None, replay=None, replay_speed=1.0, sim_seed=None, sim_speed=1.0):
      super().__init__()
      self.title("Trader Workstation")
      self.geometry("1300x750")
      self.account_summary_data = {}
      self.news_urls = []
+     # (seq, item) per news listbox row, and the last seq already looked at
+     self.news_rows = []
+     self.news_seq = 0
+     self.tick_flush_ms = max(1, int(1000 / tick_flush_hz))
 
 
-     self.ib_client = IBClient(gui_callback=self.handle_ib_event)
-     self.ib_client.start()
+     # Either our own IB connection, or a view onto a TradingEngine process
+     if engine_address:
+         self.ib_client = RemoteIBClient(self.handle_ib_event, engine_address)
+     else:
+         self.ib_client = IBClient(gui_callback=self.handle_ib_event, host=host, port=port, client_id=client_id,
+                                   journal=journal, replay=replay, replay_speed=replay_speed,
+                                   sim_seed=sim_seed, sim_speed=sim_speed)
 
 
      self.grid_columnconfigure(0, weight=3)
@@ -291,18 +1033,36 @@ class IBDashboard(tk.Tk):
 
 
 
+     self.build_render_loop()
      self.build_ui()
      self.running = True
+     self.ib_client.start()
      self.protocol("WM_DELETE_WINDOW", self.on_close)
+     self.renderer.start()
 
 
  def on_close(self):
        self.running = False
+       self.renderer.stop()
+       self.ib_client.close()
        self.destroy()
 
 
 
 
+ def build_render_loop(self):
+      # One frame loop redraws whatever panels were marked dirty since the
+      # last frame, in this priority order, within the frame budget
+      self.renderer = RenderScheduler(self.after, self.tick_flush_ms)
+      self.renderer.add_panel('quotes', lambda _: self.flush_market_data(), poll=self.ib_client.quotes_pending)
+      self.renderer.add_panel('account', self.render_account)
+      self.renderer.add_panel('portfolio', self.render_portfolio, poll=self.poll_pnl)
+      self.renderer.add_panel('orders', self.render_orders)
+      self.renderer.add_panel('activity', lambda _: self.activity_table.refresh())
+      self.renderer.add_panel('news', lambda _: self.append_news())
+      self.renderer.add_panel('chart', self.render_chart)
+
+
  def build_ui(self):
      # --- Account Summary ---
      account_frame = tk.Frame(self, bd=2, relief=tk.SUNKEN)
@@ -329,6 +1089,10 @@ class IBDashboard(tk.Tk):
      liquidate_button.pack(side=tk.LEFT, padx=(0, 5))
 
 
+     liquidate_all_button = tk.Button(button_frame, text="Liquidate All", command=self.liquidate_all_action)
+     liquidate_all_button.pack(side=tk.LEFT, padx=(0, 5))
+
+
      #--- Quantity, limit, limit price, day
      fields_frame = tk.Frame(account_frame)
      fields_frame.grid(row=1, column=1, sticky="nsew", padx=5, pady=2)
@@ -375,7 +1139,7 @@ class IBDashboard(tk.Tk):
      tk.Label(selector_frame, text="Chart Symbol:").pack(side=tk.LEFT, padx=(5, 2))
      self.symbol_var = tk.StringVar(value="AAPL")
      symbol_dropdown = ttk.Combobox(selector_frame, textvariable=self.symbol_var,
-                                    values=["AAPL", "TSLA", "MSFT", "AMZN", "NVDA"],
+                                    values=WATCHLIST,
                                     state="normal", width=10)
      symbol_dropdown.pack(side=tk.LEFT)
      symbol_dropdown.bind("<<ComboboxSelected>>", self.on_symbol_change)
@@ -386,6 +1150,9 @@ class IBDashboard(tk.Tk):
      self.fig, self.ax_price = plt.subplots(1, 1, figsize=(4, 2.5))
      self.canvas = FigureCanvasTkAgg(self.fig, master=chart_frame)
      self.canvas.get_tk_widget().grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
+     # Redraws only the forming candle between full chart draws
+     self.live_chart = LiveCandleChart(self.ax_price, self.canvas, width_frac=0.72)
+     self.chart_is_live = False
 
      # Interval Selector
      self.interval_var = tk.StringVar(value="5 min")
@@ -409,6 +1176,14 @@ class IBDashboard(tk.Tk):
          self.activity_tree.heading(col, text=col)
          self.activity_tree.column(col, width=80, anchor="center")
      self.activity_tree.grid(row=1, column=0, sticky="nsew", padx=5, pady=(0, 5))
+     activity_scroll = ttk.Scrollbar(activity_frame, orient=tk.VERTICAL)
+     activity_scroll.grid(row=1, column=1, sticky="ns", pady=(0, 5))
+     # Only the visible rows exist in Tk; newest trade first
+     activities = self.ib_client.trade_activities
+     self.activity_table = WindowedTable(self.activity_tree,
+                                         row_count=lambda: len(activities),
+                                         row_at=lambda i: self.activity_row(activities[-1 - i]),
+                                         scrollbar=activity_scroll)
 
      # --- Portfolio/Profile Frame (TWS Style) ---
      portfolio_frame = tk.Frame(self, bd=2, relief=tk.SUNKEN)
@@ -460,6 +1235,14 @@ class IBDashboard(tk.Tk):
          self.portfolio_tree.heading(col, text=col, anchor="center")
          self.portfolio_tree.column(col, width=120 if col=="FIN INSTR" else 80, anchor="center")
      self.portfolio_tree.grid(row=0, column=0, sticky="nsew")
+     portfolio_scroll = ttk.Scrollbar(table_frame, orient=tk.VERTICAL)
+     portfolio_scroll.grid(row=0, column=1, sticky="ns")
+     self.portfolio_rows = KeyedRows()
+     self.pnl_rows = {}
+     self.portfolio_table = WindowedTable(self.portfolio_tree,
+                                          row_count=lambda: len(self.portfolio_rows),
+                                          row_at=self.portfolio_rows.row_at,
+                                          scrollbar=portfolio_scroll)
 
 
      # --- News Frame ---
@@ -468,21 +1251,28 @@ class IBDashboard(tk.Tk):
      news_frame.grid_rowconfigure(1, weight=1)
      news_frame.grid_columnconfigure(0, weight=1)
      tk.Label(news_frame, text="News", font=("Arial", 14)).grid(row=0, column=0, sticky="w", padx=5, pady=5)
+     # Filter as you type: words match headline word prefixes, $SYM a symbol, @src a source
+     self.news_query_var = tk.StringVar()
+     self.news_query_var.trace_add('write', self.reset_news)
+     tk.Entry(news_frame, textvariable=self.news_query_var, width=20).grid(row=0, column=1, sticky="e", padx=2)
+     self.news_chart_only = tk.BooleanVar(value=False)
+     tk.Checkbutton(news_frame, text="Chart symbol", variable=self.news_chart_only,
+                    command=self.reset_news).grid(row=0, column=2, sticky="e", padx=2)
      self.news_listbox = tk.Listbox(news_frame, height=12)
-     self.news_listbox.grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
+     self.news_listbox.grid(row=1, column=0, columnspan=3, sticky="nsew", padx=5, pady=5)
      self.news_listbox.bind('<<ListboxSelect>>', self.open_news_link)
 
      #News tab
      self.notebook = ttk.Notebook(self)
      self.notebook.grid(row=3, column=0, columnspan=2, sticky="nsew", padx=5, pady=5)
      self.notebook_tabs = {}
+     self.build_orders_tab()
      self.news_listbox.bind('<<ListboxSelect>>', self.open_news_popup)
 
 
      self.on_ordertype_change()
-     self.refresh_data()
-     self.refresh_news()
-     self.update_chart()
+     self.renderer.mark('news')
+     self.renderer.mark('chart', CHART_RELOAD)
      self.sample_bulletins = [
          {
              'message': "Breaking News: [AAPL] hits all time high!",
@@ -552,9 +1342,7 @@ class IBDashboard(tk.Tk):
      ]
      self.news_index = 0
      self.simulate_news_feed()
-     self.update_chart()
-     self.refresh_data()
-     self.refresh_news()
+     self.renderer.every(15000, self.simulate_news_feed)
 
 
 
@@ -562,39 +1350,146 @@ class IBDashboard(tk.Tk):
  def handle_ib_event(self, event_type, data):
   if not self.running:
        return
+  # Runs on the IB thread: update models and mark panels, the render loop draws
   if event_type == 'positions_update':
-      self.after(0, lambda: self.refresh_portfolio(data))
+      self.renderer.mark('portfolio', ('positions', data))
   elif event_type == 'trade_update':
-      self.after(0, lambda: self.add_trade_activity(data))
-  elif event_type == 'market_data_update':
-      reqId, market_data = data
-      # Update last_prices mid price
-      for sym, r_id in self.ib_client.symbol_reqId_map.items():
-          if r_id == reqId:
-              bid = market_data.get('bid')
-              ask = market_data.get('ask')
-              if bid is not None and ask is not None:
-                  mid = (bid + ask) / 2
-                  self.ib_client.last_prices[sym] = mid
-              break
-      self.after(0, self.refresh_account_text)
+      self.ib_client.add_trade_activity(data)
+      self.renderer.mark('activity')
+  elif event_type == 'news_bulletin':
+      self.ib_client.on_news(data)
+      self.renderer.mark('news')
   elif event_type == 'account_summary_update':
-      self.after(0, lambda: self.update_account_summary(data))
+      self.renderer.mark('account', data)
+  elif event_type == 'chart_bars_update':
+      symbol, bar_size, _ = data
+      self.renderer.mark('chart', (symbol, bar_size))
+  elif event_type == 'chart_bars_loaded':
+      # Bars a trading engine sent back for an earlier load_chart_bars
+      self.renderer.mark('chart', ('loaded', data))
+  elif event_type == 'order_update':
+      self.renderer.mark('orders', data)
+  elif event_type == 'trades_snapshot':
+      self.renderer.mark('activity')
+  elif event_type == 'engine_disconnected':
+      print("Lost connection to the trading engine")
+  elif event_type == 'basket_update':
+      print(f"{data['name']}: {data['legs']} orders done in {data['elapsed_s']:.2f}s {data['statuses']}")
   elif event_type == 'next_order_id':
-      pass
+      # Connected: replace the simulated chart with cached/real bars
+      self.renderer.mark('chart', CHART_RELOAD)
+
+
+ def flush_market_data(self):
+  if not self.running:
+      return
+  batch = self.ib_client.drain_quotes()
+  if batch:
+      for sym, market_data in batch.items():
+          # Update last_prices mid price
+          bid = market_data.get('bid')
+          ask = market_data.get('ask')
+          if bid is not None and ask is not None:
+              mid = (bid + ask) / 2
+              self.ib_client.last_prices[sym] = mid
+          if self.chart_is_live and sym == self.symbol_var.get() and market_data.get('last') is not None:
+              self.live_chart.update_price(time.time(), market_data['last'])
+      self.refresh_account_text()
 
 
+ def build_orders_tab(self):
+      orders_frame = tk.Frame(self.notebook)
+      orders_frame.grid_columnconfigure(0, weight=1)
+      self.notebook.add(orders_frame, text="Working Orders")
+      self.notebook_tabs['orders'] = orders_frame
+
+      columns = ("ID", "Symbol", "Action", "Qty", "Filled", "Type", "Lmt Price", "TIF", "Status")
+      self.orders_tree = ttk.Treeview(orders_frame, columns=columns, show="headings", height=5)
+      for col in columns:
+          self.orders_tree.heading(col, text=col)
+          self.orders_tree.column(col, width=80, anchor="center")
+      self.orders_tree.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
+      orders_scroll = ttk.Scrollbar(orders_frame, orient=tk.VERTICAL)
+      orders_scroll.grid(row=0, column=1, sticky="ns", pady=5)
+      self.order_rows = KeyedRows()
+      self.orders_table = WindowedTable(self.orders_tree,
+                                        row_count=lambda: len(self.order_rows),
+                                        row_at=self.order_rows.row_at,
+                                        scrollbar=orders_scroll)
+      orders_buttons = tk.Frame(orders_frame)
+      orders_buttons.grid(row=0, column=2, sticky="n", padx=5, pady=5)
+      tk.Button(orders_buttons, text="Cancel", command=self.cancel_selected_orders).pack(fill=tk.X)
+      tk.Button(orders_buttons, text="Cancel All", command=self.cancel_all_orders).pack(fill=tk.X, pady=(5, 0))
+
+
+ def update_order_row(self, state):
+      # Working orders only; a fill or cancel removes the row
+      if state.working:
+          lmt = f"{state.lmt_price:.2f}" if state.lmt_price is not None else ""
+          self.order_rows.upsert(state.orderId, (state.orderId, state.symbol, state.action, state.qty,
+                                                 state.filled, state.order_type, lmt, state.tif, state.status))
+      else:
+          self.order_rows.remove(state.orderId)
+
+
+ def render_orders(self, states):
+      for state in states:
+          self.update_order_row(state)
+      self.orders_table.refresh()
+
+
+ def cancel_selected_orders(self):
+      for i in self.orders_table.selected_rows():
+          self.ib_client.cancel_order(self.order_rows.key_at(i))
+
+
+ def cancel_all_orders(self):
+      self.ib_client.cancel_working_orders()
+
 
  def refresh_portfolio(self, positions):
-      self.portfolio_tree.delete(*self.portfolio_tree.get_children())
-      for symbol, pos in positions.items():
-          self.portfolio_tree.insert("", tk.END, values=(symbol, pos))
+      # Columns: DLY, FIN INSTR, POS, MKT VAL; only changed cells are redrawn
+      self.portfolio_rows.set_rows({symbol: self.portfolio_row(symbol, pos) for symbol, pos in positions.items()})
 
 
- def add_trade_activity(self, trade):
+ def poll_pnl(self):
+      pnl = self.ib_client.drain_pnl()
+      return ('pnl', pnl) if pnl else None
+
+
+ def render_portfolio(self, updates):
+      # Position reports and P&L changes since the last frame, one table refresh
+      for kind, data in updates:
+          if kind == 'positions':
+              self.refresh_portfolio(data)
+          else:
+              self.apply_pnl(data)
+      self.portfolio_table.refresh()
+
+
+ def portfolio_row(self, symbol, pos):
+      pnl = self.pnl_rows.get(symbol)
+      if pnl is None:
+          return ("", symbol, pos, "")
+      return (f"{pnl['daily']:,.2f}", symbol, pos, f"{pnl['market_value']:,.2f}")
+
+
+ def apply_pnl(self, pnl):
+      # Only the rows whose P&L moved are rebuilt; totals are already summed
+      for symbol, row in pnl['rows'].items():
+          self.pnl_rows[symbol] = row
+          current = self.portfolio_rows.get(symbol)
+          if current is not None:
+              self.portfolio_rows.upsert(symbol, self.portfolio_row(symbol, current[2]))
+      totals = pnl['totals']
+      self.unrealized_value.config(text=f"{totals['unrealized']:,.2f}")
+      self.realized_value.config(text=f"{totals['realized']:,.2f}")
+
+
+ def activity_row(self, trade):
       plus_minus = '+' if trade['side'].upper() == 'BUY' else '-'
       time = trade['time'] if 'time' in trade else datetime.datetime.now().strftime("%H:%M:%S")
-      self.activity_tree.insert("", 0, values=(
+      return (
           plus_minus,
           time,
           trade.get('symbol', ''),
@@ -602,23 +1497,22 @@ class IBDashboard(tk.Tk):
           trade.get('qty', ''),
           f"{trade.get('price', 0):.2f}",
           trade.get('exchange', '')
-      ))
+      )
 
 
 
  def update_market_data(self, reqId, md):
-      for sym, r_id in self.ib_client.symbol_reqId_map.items():
-          if r_id == reqId:
-              text = f"{sym} Market Data:\n"
-              if 'bid' in md:
-                  text += f"Bid: {md['bid']}\n"
-              if 'ask' in md:
-                  text += f"Ask: {md['ask']}\n"
-              if 'last' in md:
-                  text += f"Last: {md['last']}\n"
-              self.account_text.delete(1.0, tk.END)
-              self.account_text.insert(tk.END, text)
-              break
+      sym = self.ib_client.subscriptions.symbol_for(reqId)
+      if sym is not None:
+          text = f"{sym} Market Data:\n"
+          if 'bid' in md:
+              text += f"Bid: {md['bid']}\n"
+          if 'ask' in md:
+              text += f"Ask: {md['ask']}\n"
+          if 'last' in md:
+              text += f"Last: {md['last']}\n"
+          self.account_text.delete(1.0, tk.END)
+          self.account_text.insert(tk.END, text)
 
 
  def buy_action(self):
@@ -667,7 +1561,7 @@ class IBDashboard(tk.Tk):
 
 
 
-  position = self.ib_client.ibapi.positions.get(symbol, 0)
+  position = self.ib_client.positions.get(symbol, 0)
   if position < qty:
       print(f"Sell blocked: Not enough shares in position ({position}) < ({qty})")
       return
@@ -686,7 +1580,7 @@ class IBDashboard(tk.Tk):
 
  def liquidate_position_action(self):
       symbol = self.symbol_var.get()
-      position = self.ib_client.ibapi.positions.get(symbol, 0)
+      position = self.ib_client.positions.get(symbol, 0)
       if position > 0:
           self.ib_client.place_order(symbol, "SELL", position, "MKT", None, "GTC")
       elif position < 0:
@@ -695,12 +1589,21 @@ class IBDashboard(tk.Tk):
           print("No position to liquidate.")
 
 
+ def liquidate_all_action(self):
+      positions = {s: p for s, p in self.ib_client.positions.items() if p}
+      if not positions:
+          print("No positions to liquidate.")
+          return
+      if messagebox.askyesno("Liquidate All", f"Send market orders to close {len(positions)} positions?"):
+          self.ib_client.liquidate_all()
+
+
  def open_news_link(self, event):
       selection = event.widget.curselection()
       if selection:
           index = selection[0]
-          if 0 <= index < len(self.ib_client.news_list):
-              url = self.ib_client.news_list[index].get('url')
+          if 0 <= index < len(self.news_rows):
+              url = self.news_rows[index][1].get('url')
               if url:
                   webbrowser.open(url)
 
@@ -711,54 +1614,70 @@ class IBDashboard(tk.Tk):
 
 
   if new_symbol and new_symbol != old_symbol:
-      if old_symbol in self.ib_client.symbol_reqId_map:
-          old_reqId = self.ib_client.symbol_reqId_map[old_symbol]
-          self.ib_client.ibapi.cancelMktData(old_reqId)
-          del self.ib_client.symbol_reqId_map[old_symbol]
-
-
-
-
-      self.ib_client.current_symbol = new_symbol
-      self.ib_client.subscribe_market_data(new_symbol)
-
-
-      self.update_chart()
-      self.refresh_account_text()
-
-
- def refresh_data(self):
-      self.after(5000, self.refresh_data)
+      self.ib_client.set_current_symbol(new_symbol)
+      if self.news_chart_only.get():
+          self.reset_news()
+      self.renderer.mark('chart', CHART_RELOAD)
+      self.renderer.mark('account')
+
+
+ def append_news(self):
+      # Only items that arrived since the last call are inserted, and evicted
+      # ones leave from the top; nothing is redrawn when nothing changed
+      index = self.ib_client.news_index
+      first = index.first_seq
+      while self.news_rows and self.news_rows[0][0] < first:
+          self.news_rows.pop(0)
+          self.news_listbox.delete(0)
+      last = index.last_seq
+      symbol = self.symbol_var.get() if self.news_chart_only.get() else None
+      rows = self.ib_client.search_news(self.news_query_var.get(), symbol, self.news_seq)
+      for seq, item in rows:
+          time_str = item['datetime'].strftime("%H:%M")
+          self.news_listbox.insert(tk.END, f"{time_str} [{item['source']}] {item['symbol']} - {item['headline']}")
+      self.news_rows.extend(rows)
+      self.news_seq = max(last, rows[-1][0] if rows else 0)
 
 
- def refresh_news(self):
-      news = self.ib_client.get_real_time_news()
+ def reset_news(self, *args):
+      # The filter changed: the one case that repopulates the whole list
       self.news_listbox.delete(0, tk.END)
-      for item in news:
-          time_str = item['datetime'].strftime("%H:%M")
-          line = f"{time_str} [{item['source']}] {item['symbol']} - {item['headline']}"
-          self.news_listbox.insert(tk.END, line)
-      self.after(5000, self.refresh_news)
+      self.news_rows = []
+      self.news_seq = 0
+      self.append_news()
+
+
+ def render_chart(self, updates):
+      # Bars for other symbols or bar sizes leave the chart alone
+      bar_size = CHART_INTERVALS.get(self.interval_var.get(), (None,))[0]
+      if CHART_RELOAD in updates:
+          self.update_chart()
+      elif (self.symbol_var.get(), bar_size) in updates:
+          # Redraw with what the fetch stored; fetching again from here
+          # would loop whenever TWS leaves a gap
+          self.update_chart(fetch=False)
+      else:
+          # Drawn as they are; loading them again would ask the engine again
+          chart = (self.symbol_var.get(), self.interval_var.get())
+          loaded = [data[2] for kind, data in updates if kind == 'loaded' and data[:2] == chart]
+          if loaded:
+              self.update_chart(bars=loaded[-1])
 
 
- def update_chart(self):
+ def update_chart(self, fetch=True, bars=None):
       self.ax_price.clear()
       interval_min = self.get_interval_minutes()
       symbol = self.symbol_var.get()
-      now = datetime.datetime.now()
-      num_points = 20
-      dates = [now - datetime.timedelta(minutes=interval_min * x) for x in reversed(range(num_points))]
-      ohlc = []
-      price = 100.0
-      for d in dates:
-          open_p = price + random.uniform(-1, 1)
-          high_p = open_p + random.uniform(0, 2)
-          low_p = open_p - random.uniform(0, 2)
-          close_p = low_p + random.uniform(0, high_p - low_p)
-          volume = random.randint(1000, 5000)
-          ohlc.append((mdates.date2num(d), open_p, high_p, low_p, close_p, volume))
-          price = close_p
-      candlestick_ohlc(self.ax_price, ohlc, width=0.0005 * interval_min, colorup='g', colordown='r')
+      if bars is None:
+          bars = self.ib_client.load_chart_bars(symbol, self.interval_var.get(), fetch)
+      # The live candle only follows ticks when the chart shows real bars
+      self.chart_is_live = len(bars) > 0
+      if len(bars):
+          ohlc = [(int(b['time']), b['open'], b['high'], b['low'], b['close']) for b in bars]
+      else:
+          # Nothing cached yet (or not connected): show simulated candles
+          ohlc = [bar[:5] for bar in OFFLINE_MARKET.bars(symbol, interval_min * 60, count=20)]
+      self.live_chart.set_bars(ohlc, interval_min * 60)
       self.ax_price.set_title(f"{symbol} Price Chart ({self.interval_var.get()})")
       self.ax_price.grid(True)
       if interval_min >= 60:
@@ -768,18 +1687,18 @@ class IBDashboard(tk.Tk):
       else:
           self.ax_price.xaxis.set_major_formatter(DateFormatter('%H:%M:%S'))
       self.fig.autofmt_xdate()
-      self.canvas.draw()
+      self.live_chart.draw()
 
 
 
 
  def on_interval_change(self, event):
-      self.update_chart()
+      self.renderer.mark('chart', CHART_RELOAD)
 
 
  def get_interval_minutes(self):
       try:
-          return int(self.interval_var.get().split()[0])
+          return CHART_INTERVALS[self.interval_var.get()][1] // 60
       except Exception:
           return 5
 
@@ -793,7 +1712,7 @@ class IBDashboard(tk.Tk):
   bulletin = self.sample_bulletins[self.news_index % len(self.sample_bulletins)]
   self.news_index += 1
   self.ib_client.on_news(bulletin)
-  self.after(15000, self.simulate_news_feed)
+  self.renderer.mark('news')
 
 
 
@@ -803,6 +1722,11 @@ class IBDashboard(tk.Tk):
       value = data['value']
       currency = data['currency']
       self.account_summary_data[tag] = f"{value} {currency}"
+
+
+ def render_account(self, updates):
+      for data in updates:
+          self.update_account_summary(data)
       self.refresh_account_text()
 
 
@@ -836,7 +1760,7 @@ class IBDashboard(tk.Tk):
 
 
  def schedule_account_summary_refresh(self):
-      self.ib_client.ibapi.request_account_summary()
+      self.ib_client.request_account_summary()
       self.after(180000, self.schedule_account_summary_refresh)
 
 
@@ -844,8 +1768,8 @@ class IBDashboard(tk.Tk):
   selection = event.widget.curselection()
   if selection:
       index = selection[0]
-      if 0 <= index < len(self.ib_client.news_list):
-          news_item = self.ib_client.news_list[index]
+      if 0 <= index < len(self.news_rows):
+          news_item = self.news_rows[index][1]
           # Create new toplevel window
           popup = tk.Toplevel(self)
           popup.title(news_item['headline'][:60])  # Show first 60 chars in title
@@ -864,7 +1788,41 @@ class IBDashboard(tk.Tk):
 
 
 if __name__ == "__main__":
- app = IBDashboard()
- app.mainloop()
+ parser = argparse.ArgumentParser(description="Trader Workstation dashboard for TWS / IB Gateway")
+ parser.add_argument("--host", default="127.0.0.1")
+ parser.add_argument("--port", type=int, default=7497)
+ parser.add_argument("--client-id", type=int, default=100)
+ parser.add_argument("--engine", action="store_true",
+                     help="run only the headless trading engine; GUIs attach with --attach")
+ parser.add_argument("--attach", action="store_true", help="attach this GUI to a running engine")
+ parser.add_argument("--socket", default=DEFAULT_ENGINE_ADDRESS, help="engine Unix socket path")
+ parser.add_argument("--journal", nargs="?", const=DEFAULT_JOURNAL_DIR, metavar="DIR",
+                     help="record ticks, fills, positions and account values (default dir %(const)s)")
+ parser.add_argument("--replay", nargs="+", metavar="FILE", help="replay journal files instead of connecting")
+ parser.add_argument("--replay-speed", type=float, default=1.0,
+                     help="multiple of real time, 0 for as fast as possible")
+ parser.add_argument("--sim", nargs="?", type=int, const=0, metavar="SEED",
+                     help="trade against the seeded market simulator instead of TWS")
+ parser.add_argument("--sim-speed", type=float, default=1.0, help="simulator clock multiple (1 to 1000)")
+ parser.add_argument("--render-stats", action="store_true", help="print per-panel render times on exit")
+ args = parser.parse_args()
+ journal = Journal(args.journal) if args.journal else None
+ if args.engine:
+     TradingEngine(args.host, args.port, args.client_id, args.socket, journal=journal,
+                   sim_seed=args.sim, sim_speed=args.sim_speed).run()
+ else:
+     app = IBDashboard(host=args.host, port=args.port, client_id=args.client_id,
+                       engine_address=args.socket if args.attach else None, journal=journal,
+                       replay=args.replay, replay_speed=args.replay_speed or None,
+                       sim_seed=args.sim, sim_speed=args.sim_speed)
+     app.mainloop()
+     if args.render_stats:
+         stats = app.renderer.stats()
+         print(f"{stats['frames']} frames, {stats['over_budget']} over the {stats['budget_ms']:.0f} ms budget")
+         for name, panel in stats['panels'].items():
+             render = panel['render']
+             print(f"  {name:<10} {panel['renders']:>6} renders {panel['deferred']:>5} deferred  "
+                   f"p50 {render.get('p50_ms', 0.0):7.2f} ms  p99 {render.get('p99_ms', 0.0):7.2f} ms  "
+                   f"max {render.get('max_ms', 0.0):7.2f} ms")
 
 
@@ -0,0 +1,127 @@
+import asyncio
+
+from ib_insync import IB
+from backfill import BackfillJob
+from bar_cache import BarCache
+from contract_cache import ContractCache
+
+
+DEFAULT_CLIENT_ID = 21
+# Requests in flight at once; TWS answers these in parallel but starts
+# pacing (and snapshot market data lines run out) well before 50
+DEFAULT_CONCURRENCY = 8
+
+
+class AsyncIBClient:
+    # asyncio counterpart of Ib_client.IBClient for bulk loads. Every request
+    # goes through ib_insync's *Async methods under one semaphore, so the
+    # *_many helpers can fan a whole watchlist out at once while never having
+    # more than `concurrency` requests outstanding at TWS. The fan-out helpers
+    # return {symbol: result}, with the exception in place of the result for
+    # symbols that failed, so one bad symbol does not sink the batch.
+
+    def __init__(self, client_id=DEFAULT_CLIENT_ID, concurrency=DEFAULT_CONCURRENCY,
+                 contract_cache_path=None, ib=None):
+        self.ib = ib or IB()
+        # Failed requests raise RequestError instead of returning empty
+        # results, so the fan-out helpers can report them per symbol
+        self.ib.RaiseRequestErrors = True
+        self.client_id = client_id
+        self.concurrency = concurrency
+        self.contracts = ContractCache(self.ib, path=contract_cache_path)
+        self._limit = asyncio.Semaphore(concurrency)
+
+    async def connect(self, host='127.0.0.1', port=7497, client_id=None):
+        await self.ib.connectAsync(host, port, clientId=client_id or self.client_id)
+        return self
+
+    def disconnect(self):
+        self.ib.disconnect()
+
+    async def qualify(self, symbols):
+        return await self.contracts.qualify_many_async(symbols, limit=self._limit)
+
+    async def _contract(self, symbol):
+        contract = (await self.qualify([symbol]))[symbol.upper()]
+        if contract is None:
+            raise ValueError(f"Could not qualify {symbol}")
+        return contract
+
+    async def get_historical_bars(self, symbol, bar_size_seconds, duration_str='2 D', end_datetime='',
+                                  what_to_show='TRADES', use_rth=True, format_date=1):
+        # bar_size_seconds may also be an IB bar size string such as '1 min'
+        contract = await self._contract(symbol)
+        if isinstance(bar_size_seconds, str):
+            bar_size = bar_size_seconds
+        else:
+            bar_size = f"{bar_size_seconds} secs"
+        async with self._limit:
+            return await self.ib.reqHistoricalDataAsync(
+                contract,
+                endDateTime=end_datetime,
+                durationStr=duration_str,
+                barSizeSetting=bar_size,
+                whatToShow=what_to_show,
+                useRTH=use_rth,
+                formatDate=format_date
+            )
+
+    async def get_news_headlines(self, symbol, provider_code='BRFG', num_articles=10):
+        contract = await self._contract(symbol)
+        async with self._limit:
+            return await self.ib.reqHistoricalNewsAsync(
+                conId=contract.conId,
+                providerCodes=provider_code,
+                startDateTime='',
+                endDateTime='',
+                totalResults=num_articles,
+                historicalNewsOptions=[]
+            )
+
+    async def get_news_article(self, article_id, provider_code='BRFG'):
+        async with self._limit:
+            return await self.ib.reqNewsArticleAsync(provider_code, article_id)
+
+    async def snapshot(self, symbol):
+        contract = await self._contract(symbol)
+        async with self._limit:
+            tickers = await self.ib.reqTickersAsync(contract)
+        return tickers[0] if tickers else None
+
+    async def backfill(self, symbols, bar_size, start, end, cache=None, **options):
+        # Chunked history for [start, end) into a BarCache; see backfill.py.
+        # Running it again after an interruption only fetches what is missing.
+        job = BackfillJob(self, cache or BarCache(), symbols, bar_size, start, end, **options)
+        await job.run()
+        return job
+
+    async def _fan_out(self, symbols, request, *args, **kwargs):
+        # Qualify everything in one pass first so the per-symbol requests
+        # below all hit the contract cache
+        await self.qualify(symbols)
+        results = await asyncio.gather(*(request(s, *args, **kwargs) for s in symbols),
+                                       return_exceptions=True)
+        return dict(zip(symbols, results))
+
+    async def historical_bars_many(self, symbols, bar_size_seconds, duration_str='2 D'):
+        return await self._fan_out(symbols, self.get_historical_bars, bar_size_seconds, duration_str)
+
+    async def news_headlines_many(self, symbols, provider_code='BRFG', num_articles=10):
+        return await self._fan_out(symbols, self.get_news_headlines, provider_code, num_articles)
+
+    async def snapshots_many(self, symbols):
+        return await self._fan_out(symbols, self.snapshot)
+
+    async def load_watchlist(self, symbols, bar_size_seconds=5, duration_str='2 D', news=True):
+        # Bars, snapshots and (optionally) headlines for every symbol, all
+        # sharing the same concurrency limit
+        await self.qualify(symbols)
+        jobs = [self.historical_bars_many(symbols, bar_size_seconds, duration_str),
+                self.snapshots_many(symbols)]
+        if news:
+            jobs.append(self.news_headlines_many(symbols))
+        results = await asyncio.gather(*jobs)
+        loaded = {'bars': results[0], 'snapshots': results[1]}
+        if news:
+            loaded['news'] = results[2]
+        return loaded
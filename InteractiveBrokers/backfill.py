@@ -0,0 +1,202 @@
+import asyncio
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from bar_cache import BAR_DTYPE, bars_to_array, covered_until, duration_str, ib_end_datetime
+from contract_cache import contract_key
+from pacing import IB_HISTORY_REQUESTS, IB_HISTORY_WINDOW, WindowLimiter
+
+
+BAR_SIZE_SECONDS = {
+    "1 secs": 1, "5 secs": 5, "10 secs": 10, "15 secs": 15, "30 secs": 30,
+    "1 min": 60, "2 mins": 120, "3 mins": 180, "5 mins": 300, "10 mins": 600,
+    "15 mins": 900, "20 mins": 1200, "30 mins": 1800,
+    "1 hour": 3600, "2 hours": 7200, "3 hours": 10800, "4 hours": 14400, "8 hours": 28800,
+    "1 day": 86400,
+}
+
+# Longest span IB returns in one request for each bar size
+MAX_CHUNK_SECONDS = {
+    "1 secs": 1800, "5 secs": 7200, "10 secs": 14400, "15 secs": 14400, "30 secs": 28800,
+    "1 min": 86400, "2 mins": 2 * 86400, "3 mins": 7 * 86400, "5 mins": 7 * 86400,
+    "10 mins": 7 * 86400, "15 mins": 14 * 86400, "20 mins": 14 * 86400, "30 mins": 30 * 86400,
+    "1 hour": 30 * 86400, "2 hours": 30 * 86400, "3 hours": 30 * 86400, "4 hours": 30 * 86400,
+    "8 hours": 30 * 86400, "1 day": 365 * 86400,
+}
+
+# IB's request pacing only applies to bars of this size and smaller
+SMALL_BAR_SECONDS = 30
+# ib_insync gives up on a history request after this long and returns no bars
+HISTORY_TIMEOUT = 60
+PACING_RETRIES = 3
+PACING_BACKOFF = 15.0
+DEFAULT_WORKERS = 4
+# Bars held per symbol before they are merged into the cache
+DEFAULT_FLUSH_BARS = 50000
+
+
+def chunk_ranges(start, end, chunk_seconds):
+    # [start, end) split into spans IB accepts, newest first
+    chunks = []
+    while end > start:
+        chunks.append((max(start, end - chunk_seconds), end))
+        end -= chunk_seconds
+    return chunks
+
+
+def interleave(per_symbol):
+    # Round robin over symbols so consecutive requests hit different
+    # contracts (IB also paces repeated requests for one contract)
+    queues = [list(chunks) for chunks in per_symbol.values() if chunks]
+    ordered = []
+    while queues:
+        for chunks in queues:
+            ordered.append(chunks.pop(0))
+        queues = [chunks for chunks in queues if chunks]
+    return ordered
+
+
+class BackfillJob:
+    # Fills a BarCache with `bar_size` history for many symbols over
+    # [start, end). Only the ranges the cache does not cover yet are
+    # requested, split into chunks no larger than IB allows, and fetched by
+    # `workers` concurrent tasks on an AsyncIBClient. Fetched chunks are
+    # buffered per symbol and merged into the cache every `flush_bars` bars
+    # (and when the job ends or is cancelled), so memory stays bounded and a
+    # rerun after an interruption picks up where the cache left off.
+
+    def __init__(self, client, cache, symbols, bar_size, start, end, what_to_show='TRADES', use_rth=True,
+                 workers=DEFAULT_WORKERS, flush_bars=DEFAULT_FLUSH_BARS, limiter=None, on_progress=None):
+        if bar_size not in MAX_CHUNK_SECONDS:
+            raise ValueError(f"Unsupported bar size {bar_size!r}")
+        self.client = client
+        self.cache = cache
+        self.symbols = [s.upper() for s in symbols]
+        self.bar_size = bar_size
+        self.bar_seconds = BAR_SIZE_SECONDS[bar_size]
+        self.start = int(start)
+        self.end = int(end)
+        self.what_to_show = what_to_show
+        self.use_rth = use_rth
+        self.workers = workers
+        self.flush_bars = flush_bars
+        if limiter is None and self.bar_seconds <= SMALL_BAR_SECONDS:
+            limiter = WindowLimiter(IB_HISTORY_REQUESTS, IB_HISTORY_WINDOW)
+        self.limiter = limiter
+        # on_progress(job) after every finished chunk
+        self.on_progress = on_progress
+        self._buffers = defaultdict(list)
+        self._buffered = defaultdict(int)
+        self.total = 0
+        self.done = 0
+        self.bars = 0
+        self.failed = []
+
+    def key(self, symbol):
+        return (symbol, self.bar_size, self.what_to_show)
+
+    def plan(self):
+        chunk_seconds = MAX_CHUNK_SECONDS[self.bar_size]
+        per_symbol = {}
+        for symbol in self.symbols:
+            gaps = self.cache.missing(self.key(symbol), self.start, self.end, min_gap=self.bar_seconds)
+            per_symbol[symbol] = [(symbol, s, e) for gap in reversed(gaps)
+                                  for s, e in chunk_ranges(*gap, chunk_seconds)]
+        return interleave(per_symbol)
+
+    async def run(self):
+        chunks = self.plan()
+        self.total = len(chunks)
+        if not chunks:
+            return self
+        # Symbols that do not qualify are dropped before any chunk is queued
+        contracts = await self.client.qualify(self.symbols)
+        unqualified = {symbol for symbol in self.symbols if contracts.get(symbol) is None}
+        if unqualified:
+            errors = self.client.contracts.errors
+            for symbol in sorted(unqualified):
+                error = errors.get(contract_key(symbol))
+                reason = f"{type(error).__name__}: {error}" if error else "could not qualify"
+                self.failed.append((symbol, self.start, self.end, reason))
+            chunks = [chunk for chunk in chunks if chunk[0] not in unqualified]
+            self.total = len(chunks)
+            if not chunks:
+                return self
+        queue = asyncio.Queue()
+        for chunk in chunks:
+            queue.put_nowait(chunk)
+        workers = [asyncio.ensure_future(self._worker(queue)) for _ in range(min(self.workers, len(chunks)))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+            self.flush()
+        return self
+
+    async def _worker(self, queue):
+        while not queue.empty():
+            symbol, start, end = queue.get_nowait()
+            try:
+                bars, end = await self._fetch(symbol, start, end)
+            except Exception as e:
+                self.failed.append((symbol, start, end, f"{type(e).__name__}: {e}"))
+            else:
+                self._collect(symbol, bars, start, end)
+            self.done += 1
+            if self.on_progress:
+                self.on_progress(self)
+
+    async def _fetch(self, symbol, start, end):
+        # Returns the bars and the end of the range they actually cover
+        partial_tail = end >= time.time() - 60
+        for attempt in range(PACING_RETRIES + 1):
+            if self.limiter is not None:
+                while not self.limiter.try_acquire():
+                    await asyncio.sleep(max(self.limiter.delay(), 0.05))
+            started = time.monotonic()
+            try:
+                bars = await self.client.get_historical_bars(
+                    symbol, self.bar_size, duration_str(end - start),
+                    end_datetime="" if partial_tail else ib_end_datetime(end),
+                    what_to_show=self.what_to_show, use_rth=self.use_rth, format_date=2)
+            except Exception as e:
+                message = str(e).lower()
+                if getattr(e, 'code', None) == 162 and 'no data' in message:
+                    # Nothing traded in this range (weekend, holiday)
+                    return np.empty(0, dtype=BAR_DTYPE), end
+                if 'pacing' in message and attempt < PACING_RETRIES:
+                    await asyncio.sleep(PACING_BACKOFF * (attempt + 1))
+                    continue
+                raise
+            if not bars and time.monotonic() - started >= HISTORY_TIMEOUT:
+                raise TimeoutError(f"no answer within {HISTORY_TIMEOUT}s")
+            arr = bars_to_array(bars)
+            if partial_tail:
+                end = covered_until(arr, end, self.bar_seconds)
+            return arr, end
+        raise RuntimeError("pacing retries exhausted")
+
+    def _collect(self, symbol, bars, start, end):
+        # A duration of whole days can reach back before `start`; those bars
+        # are kept, only [start, end) is recorded as covered
+        self._buffers[symbol].append((bars, start, end))
+        self._buffered[symbol] += len(bars)
+        self.bars += len(bars)
+        if self._buffered[symbol] >= self.flush_bars:
+            self.flush(symbol)
+
+    def flush(self, symbol=None):
+        for symbol in ([symbol] if symbol else list(self._buffers)):
+            pending = self._buffers.pop(symbol, None)
+            self._buffered.pop(symbol, None)
+            if not pending:
+                continue
+            bars = np.concatenate([bars for bars, _, _ in pending])
+            self.cache.store_ranges(self.key(symbol), bars, [(start, end) for _, start, end in pending])
+
+    def summary(self):
+        return {'symbols': len(self.symbols), 'chunks': self.total, 'done': self.done,
+                'failed': len(self.failed), 'bars': self.bars}
@@ -0,0 +1,114 @@
+import datetime
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from bar_cache import BAR_DTYPE
+
+
+DAY = 86400
+WEEK = 7 * DAY
+MONTH = 30 * DAY
+# 1970-01-01 was a Thursday; weeks start on Monday
+WEEK_OFFSET = 4 * DAY
+
+
+def _month_start(ts):
+    d = datetime.datetime.fromtimestamp(ts)
+    return int(datetime.datetime(d.year, d.month, 1).timestamp())
+
+
+class MultiResolutionAggregator:
+    # Rolls 5-second bars (or single ticks) into OHLCV bars for every chart
+    # interval at once. The forming bar of each interval lives in parallel
+    # NumPy arrays so one update is a handful of vectorized ops regardless of
+    # how many intervals are tracked. Day and longer buckets follow local
+    # calendar boundaries; MONTH is treated as a calendar month.
+
+    def __init__(self, intervals, history=500):
+        self.intervals = np.asarray(intervals, dtype='i8')
+        n = len(self.intervals)
+        self._is_month = self.intervals == MONTH
+        self._offsets = np.where(self.intervals == WEEK, WEEK_OFFSET, 0).astype('i8')
+        self._local = self.intervals >= DAY
+        self._start = np.full(n, -1, dtype='i8')
+        self._open = np.zeros(n)
+        self._high = np.zeros(n)
+        self._low = np.zeros(n)
+        self._close = np.zeros(n)
+        self._volume = np.zeros(n)
+        self._history = [deque(maxlen=history) for _ in range(n)]
+        self._index = {int(sec): i for i, sec in enumerate(self.intervals)}
+        self._lock = threading.Lock()
+        self.updates = 0
+
+    def _bucket_starts(self, ts):
+        ts = int(ts)
+        # Shift into local time so day/week buckets start at local midnight
+        utc_offset = -time.altzone if time.localtime(ts).tm_isdst > 0 else -time.timezone
+        shifted = ts + np.where(self._local, utc_offset, 0) - self._offsets
+        starts = ts - shifted % self.intervals
+        if self._is_month.any():
+            starts[self._is_month] = _month_start(ts)
+        return starts
+
+    def update(self, ts, open_p, high_p, low_p, close_p, volume=0.0):
+        starts = self._bucket_starts(ts)
+        with self._lock:
+            if (starts < self._start).any():
+                # Late bar from before the forming bucket; drop it
+                return False
+            rolled = starts != self._start
+            if rolled.any():
+                for i in np.flatnonzero(rolled & (self._start >= 0)):
+                    self._history[i].append((self._start[i], self._open[i], self._high[i],
+                                             self._low[i], self._close[i], self._volume[i]))
+                self._start[rolled] = starts[rolled]
+                self._open[rolled] = open_p
+                self._high[rolled] = high_p
+                self._low[rolled] = low_p
+                self._volume[rolled] = 0.0
+            np.maximum(self._high, high_p, out=self._high)
+            np.minimum(self._low, low_p, out=self._low)
+            self._close[:] = close_p
+            self._volume += volume
+            self.updates += 1
+        return True
+
+    def on_tick(self, ts, price, size=0.0):
+        return self.update(ts, price, price, price, price, size)
+
+    def bars(self, interval):
+        # Completed bars plus the forming one, oldest first
+        i = self._index.get(int(interval))
+        if i is None:
+            return np.empty(0, dtype=BAR_DTYPE)
+        with self._lock:
+            rows = list(self._history[i])
+            if self._start[i] >= 0:
+                rows.append((self._start[i], self._open[i], self._high[i],
+                             self._low[i], self._close[i], self._volume[i]))
+        return np.array(rows, dtype=BAR_DTYPE)
+
+
+class BarAggregators:
+    # One MultiResolutionAggregator per symbol
+
+    def __init__(self, intervals, history=500):
+        self.intervals = list(intervals)
+        self.history = history
+        self._by_symbol = {}
+
+    def for_symbol(self, symbol):
+        agg = self._by_symbol.get(symbol)
+        if agg is None:
+            agg = self._by_symbol.setdefault(symbol, MultiResolutionAggregator(self.intervals, self.history))
+        return agg
+
+    def get(self, symbol):
+        return self._by_symbol.get(symbol)
+
+    def drop(self, symbol):
+        self._by_symbol.pop(symbol, None)
@@ -0,0 +1,187 @@
+import datetime
+import json
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+
+BAR_DTYPE = np.dtype([
+    ('time', 'i8'),
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+    ('volume', 'f8'),
+])
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".ib_dashboard", "bars")
+
+
+def covered_until(bars, end, bar_seconds, now=None):
+    # End of what a fetch reaching up to now really covers. Only a newest
+    # bar that is still forming is left out, to be fetched again; when the
+    # market is closed the quiet stretch after the last bar is covered too,
+    # or it would be asked for on every redraw
+    if len(bars):
+        last = int(bars['time'].max())
+        if last + bar_seconds > (time.time() if now is None else now):
+            return min(end, last)
+    return end
+
+
+def parse_bar_time(value):
+    # formatDate=2 gives epoch seconds for intraday bars, daily and larger
+    # bars always come back as yyyymmdd
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, datetime.datetime):
+        return int(value.timestamp())
+    if isinstance(value, datetime.date):
+        return int(datetime.datetime(value.year, value.month, value.day).timestamp())
+    value = value.strip()
+    if len(value) == 8 and value.isdigit():
+        return int(datetime.datetime.strptime(value, "%Y%m%d").timestamp())
+    if value.isdigit():
+        return int(value)
+    return int(datetime.datetime.strptime(value[:17], "%Y%m%d %H:%M:%S").timestamp())
+
+
+def bars_to_array(bars):
+    out = np.empty(len(bars), dtype=BAR_DTYPE)
+    for i, bar in enumerate(bars):
+        out[i] = (parse_bar_time(getattr(bar, 'date', None) or bar.time),
+                  bar.open, bar.high, bar.low, bar.close, float(bar.volume))
+    return out
+
+
+def duration_str(seconds):
+    # Smallest IB durationStr that covers the given span
+    seconds = max(int(math.ceil(seconds)), 1)
+    if seconds <= 86400:
+        return f"{seconds} S"
+    days = int(math.ceil(seconds / 86400))
+    if days <= 365:
+        return f"{days} D"
+    return f"{int(math.ceil(days / 365))} Y"
+
+
+def ib_end_datetime(ts):
+    return datetime.datetime.fromtimestamp(ts, datetime.timezone.utc).strftime("%Y%m%d-%H:%M:%S")
+
+
+def _merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+class BarCache:
+    # On-disk OHLCV cache keyed by (symbol, bar size, whatToShow). Bars live in
+    # one .npy file per key, opened memory-mapped; a .json sidecar records which
+    # time ranges have already been fetched so only the gaps go back to TWS.
+
+    def __init__(self, root=DEFAULT_CACHE_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._arrays = {}
+        self._coverage = {}
+
+    def _paths(self, key):
+        symbol, bar_size, what_to_show = key
+        name = f"{bar_size.replace(' ', '')}_{what_to_show}"
+        folder = os.path.join(self.root, symbol.upper())
+        return os.path.join(folder, name + ".npy"), os.path.join(folder, name + ".json")
+
+    def _load_array(self, key):
+        arr = self._arrays.get(key)
+        if arr is None:
+            data_path, _ = self._paths(key)
+            if os.path.exists(data_path):
+                arr = np.load(data_path, mmap_mode='r')
+            else:
+                arr = np.empty(0, dtype=BAR_DTYPE)
+            self._arrays[key] = arr
+        return arr
+
+    def coverage(self, key):
+        ranges = self._coverage.get(key)
+        if ranges is None:
+            _, meta_path = self._paths(key)
+            ranges = []
+            if os.path.exists(meta_path):
+                with open(meta_path) as f:
+                    ranges = json.load(f).get('coverage', [])
+            self._coverage[key] = ranges
+        return ranges
+
+    def missing(self, key, start, end, min_gap=0):
+        # Sub-ranges of [start, end) not covered yet, ignoring slivers shorter
+        # than min_gap (usually one bar)
+        gaps = []
+        cursor = start
+        with self._lock:
+            ranges = self.coverage(key)
+        for r_start, r_end in ranges:
+            if r_end <= cursor:
+                continue
+            if r_start >= end:
+                break
+            if r_start > cursor:
+                gaps.append((cursor, r_start))
+            cursor = max(cursor, r_end)
+        if cursor < end:
+            gaps.append((cursor, end))
+        return [(s, e) for s, e in gaps if e - s > min_gap]
+
+    def load(self, key, start=None, end=None):
+        with self._lock:
+            arr = self._load_array(key)
+        if start is None and end is None:
+            return arr
+        times = arr['time']
+        lo = 0 if start is None else np.searchsorted(times, start, side='left')
+        hi = len(arr) if end is None else np.searchsorted(times, end, side='left')
+        return arr[lo:hi]
+
+    def store(self, key, bars, start, end, bar_seconds=None):
+        # Merge fetched bars for [start, end) into the cache. Given
+        # bar_seconds for a fetch up to now, a still forming newest bar is
+        # left outside the covered range (see covered_until).
+        bars = np.asarray(bars, dtype=BAR_DTYPE)
+        if bar_seconds:
+            end = covered_until(bars, end, bar_seconds)
+        self.store_ranges(key, bars, [(start, end)])
+
+    def store_ranges(self, key, bars, ranges):
+        # One merge and rewrite for bars covering several fetched ranges, so
+        # bulk loads do not rewrite the file once per request
+        bars = np.asarray(bars, dtype=BAR_DTYPE)
+        with self._lock:
+            existing = np.array(self._load_array(key))
+            merged = np.concatenate([bars, existing]) if len(existing) else bars
+            # Newer fetches win on duplicate timestamps
+            _, first = np.unique(merged['time'], return_index=True)
+            merged = merged[first]
+            covered = self.coverage(key) + [[start, end] for start, end in ranges if end > start]
+            self._write(key, merged, _merge_ranges(covered))
+
+    def _write(self, key, arr, ranges):
+        data_path, meta_path = self._paths(key)
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        # Drop our own map before replacing the file underneath it
+        self._arrays.pop(key, None)
+        tmp_path = data_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, arr)
+        os.replace(tmp_path, data_path)
+        with open(meta_path + ".tmp", 'w') as f:
+            json.dump({'coverage': ranges}, f)
+        os.replace(meta_path + ".tmp", meta_path)
+        self._coverage[key] = ranges
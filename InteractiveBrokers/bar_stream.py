@@ -0,0 +1,86 @@
+import threading
+
+
+class BarSubscription:
+    # Handle returned by BarStream.subscribe; cancel() stops the callback
+
+    def __init__(self, stream, key, callback):
+        self.stream = stream
+        self.key = key
+        self.callback = callback
+
+    def cancel(self):
+        self.stream.unsubscribe(self)
+
+
+class BarStream:
+    # Fans real-time bars out to callbacks from ib_insync's barUpdateEvent,
+    # so every symbol is served by the IB event loop instead of a polling
+    # thread per subscription. Callbacks for the same contract share one
+    # reqRealTimeBars line, which is cancelled when the last one leaves.
+
+    def __init__(self, ib, bar_size=5, what_to_show="TRADES", use_rth=False):
+        self.ib = ib
+        self.bar_size = bar_size
+        self.what_to_show = what_to_show
+        self.use_rth = use_rth
+        self._lines = {}        # key -> RealTimeBarList
+        self._subscribers = {}  # reqId -> tuple of BarSubscription
+        self._lock = threading.Lock()
+        ib.barUpdateEvent += self._on_bar_update
+
+    def __len__(self):
+        return len(self._lines)
+
+    def subscribe(self, contract, callback):
+        key = contract.conId or contract.symbol
+        sub = BarSubscription(self, key, callback)
+        with self._lock:
+            bars = self._lines.get(key)
+            if bars is None:
+                bars = self.ib.reqRealTimeBars(contract, self.bar_size, self.what_to_show, self.use_rth)
+                self._lines[key] = bars
+            # Replace rather than mutate so the dispatcher never needs the lock
+            self._subscribers[bars.reqId] = self._subscribers.get(bars.reqId, ()) + (sub,)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            bars = self._lines.get(sub.key)
+            if bars is None:
+                return False
+            subs = tuple(s for s in self._subscribers.get(bars.reqId, ()) if s is not sub)
+            if subs:
+                self._subscribers[bars.reqId] = subs
+                return True
+            del self._subscribers[bars.reqId]
+            del self._lines[sub.key]
+        self.ib.cancelRealTimeBars(bars)
+        return True
+
+    def close(self):
+        with self._lock:
+            lines = list(self._lines.values())
+            self._lines.clear()
+            self._subscribers.clear()
+        for bars in lines:
+            self.ib.cancelRealTimeBars(bars)
+
+    def _on_bar_update(self, bars, has_new_bar):
+        subs = self._subscribers.get(getattr(bars, 'reqId', None))
+        if not subs or not has_new_bar:
+            return
+        bar = bars[-1]
+        tick = {
+            'time': bar.time,
+            'open': bar.open_,
+            'high': bar.high,
+            'low': bar.low,
+            'close': bar.close,
+            'volume': bar.volume
+        }
+        for sub in subs:
+            try:
+                sub.callback(tick)
+            except Exception as e:
+                print(f"Bar callback error for {bars.contract.symbol}: {e}")
@@ -0,0 +1,126 @@
+import itertools
+import threading
+import time
+
+from order_book import TERMINAL_STATUSES
+
+
+class BasketLeg:
+    __slots__ = ('symbol', 'action', 'qty', 'order_type', 'lmt_price', 'tif',
+                 'orderId', 'status', 'filled', 'avg_fill_price', 'sent_at', 'done_at')
+
+    def __init__(self, symbol, action, qty, order_type="MKT", lmt_price=None, tif="DAY"):
+        self.symbol = symbol
+        self.action = action
+        self.qty = qty
+        self.order_type = order_type
+        self.lmt_price = lmt_price
+        self.tif = tif
+        self.orderId = None
+        self.status = "Queued"
+        self.filled = 0
+        self.avg_fill_price = 0.0
+        self.sent_at = None
+        self.done_at = None
+
+    @property
+    def done(self):
+        return self.done_at is not None
+
+
+class Basket:
+    # A group of orders sent together. Each leg follows its order through
+    # the OrderBook; the basket is complete when every leg is terminal (or
+    # was rejected before it was sent).
+
+    _ids = itertools.count(1)
+
+    def __init__(self, legs, name=""):
+        self.id = next(self._ids)
+        self.name = name or f"Basket {self.id}"
+        self.legs = list(legs)
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._pending = len(self.legs)
+        self._lock = threading.Lock()
+
+    @property
+    def done(self):
+        return self.finished is not None
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    def leg_done(self, leg, status):
+        with self._lock:
+            if leg.done:
+                return
+            leg.status = status
+            leg.done_at = time.perf_counter()
+            self._pending -= 1
+            if not self._pending:
+                self.finished = leg.done_at
+
+    def summary(self):
+        counts = {}
+        for leg in self.legs:
+            counts[leg.status] = counts.get(leg.status, 0) + 1
+        return {'name': self.name, 'legs': len(self.legs), 'statuses': counts,
+                'done': self.done, 'elapsed_s': self.elapsed}
+
+
+class BasketSender:
+    # Pipelines basket legs through IBApiClient.submit_order from a worker
+    # thread, paced by a TokenBucket so a large basket stays under the TWS
+    # message-rate limit. Leg status comes from the order book's on_change.
+
+    def __init__(self, ibapi, pacer):
+        self.ibapi = ibapi
+        self.pacer = pacer
+        self._legs = {}   # orderId -> (basket, leg, on_update)
+        ibapi.orders.on_change.append(self._on_order_change)
+
+    def submit(self, basket, on_update=None):
+        threading.Thread(target=self._send, args=(basket, on_update), daemon=True).start()
+        return basket
+
+    def _send(self, basket, on_update):
+        basket.started = time.perf_counter()
+        if not basket.legs:
+            basket.finished = basket.started
+        for leg in basket.legs:
+            self.pacer.acquire()
+            order_id = self.ibapi.submit_order(leg.symbol, leg.action, leg.qty, leg.order_type,
+                                               leg.lmt_price, leg.tif, on_submit=self._track(basket, leg, on_update))
+            if order_id is None:
+                basket.leg_done(leg, "Rejected")
+                if on_update:
+                    on_update(basket, leg)
+
+    def _track(self, basket, leg, on_update):
+        # Registered before placeOrder so no status can arrive untracked
+        def track(order_id):
+            leg.orderId = order_id
+            leg.status = "Sent"
+            leg.sent_at = time.perf_counter()
+            self._legs[order_id] = (basket, leg, on_update)
+        return track
+
+    def _on_order_change(self, state):
+        entry = self._legs.get(state.orderId)
+        if entry is None:
+            return
+        basket, leg, on_update = entry
+        leg.filled = state.filled
+        leg.avg_fill_price = state.avg_fill_price
+        if state.status in TERMINAL_STATUSES:
+            self._legs.pop(state.orderId, None)
+            basket.leg_done(leg, state.status)
+        else:
+            leg.status = state.status
+        if on_update:
+            on_update(basket, leg)
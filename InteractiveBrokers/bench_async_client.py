@@ -0,0 +1,185 @@
+import argparse
+import asyncio
+import time
+import zlib
+
+from async_client import DEFAULT_CONCURRENCY, AsyncIBClient
+from contract_cache import ContractCache
+from Ib_client import IBClient
+
+
+SYMBOLS = ["AAPL", "MSFT", "GOOGL", "AMZN", "META", "NVDA", "TSLA", "AMD", "INTC", "NFLX",
+           "ORCL", "CRM", "ADBE", "CSCO", "QCOM", "TXN", "AVGO", "IBM", "UBER", "SHOP",
+           "JPM", "BAC", "WFC", "GS", "MS", "C", "V", "MA", "PYPL", "AXP",
+           "XOM", "CVX", "COP", "PFE", "MRK", "JNJ", "ABBV", "LLY", "UNH", "CVS",
+           "KO", "PEP", "MCD", "SBUX", "NKE", "WMT", "COST", "HD", "DIS", "T"]
+
+
+class SimulatedIB:
+    # Stands in for ib_insync.IB with a fixed round trip per request, in
+    # both the blocking and the *Async flavours, and records how many
+    # requests were outstanding at once
+
+    def __init__(self, rtt, history_rtt, snapshot_rtt):
+        self.rtt = rtt
+        self.history_rtt = history_rtt
+        self.snapshot_rtt = snapshot_rtt
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def reset(self):
+        self.requests = self.in_flight = self.max_in_flight = 0
+
+    def _qualified(self, contracts):
+        for contract in contracts:
+            contract.conId = zlib.crc32(contract.symbol.encode())
+        return list(contracts)
+
+    def _blocking(self, delay):
+        self.requests += 1
+        self.max_in_flight = max(self.max_in_flight, 1)
+        time.sleep(delay)
+
+    async def _request(self, delay):
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self.in_flight -= 1
+
+    def qualifyContracts(self, *contracts):
+        # ib_insync sends these together, so one round trip however many
+        self._blocking(self.rtt)
+        return self._qualified(contracts)
+
+    async def qualifyContractsAsync(self, *contracts):
+        await self._request(self.rtt)
+        return self._qualified(contracts)
+
+    def reqHistoricalData(self, contract, **kwargs):
+        self._blocking(self.history_rtt)
+        return []
+
+    async def reqHistoricalDataAsync(self, contract, **kwargs):
+        await self._request(self.history_rtt)
+        return []
+
+    def reqHistoricalNews(self, **kwargs):
+        self._blocking(self.rtt)
+
+    async def reqHistoricalNewsAsync(self, **kwargs):
+        await self._request(self.rtt)
+
+    def reqTickers(self, *contracts):
+        self._blocking(self.snapshot_rtt)
+        return [None] * len(contracts)
+
+    async def reqTickersAsync(self, *contracts):
+        await self._request(self.snapshot_rtt)
+        return [None] * len(contracts)
+
+
+def load_sequential(client, symbols, bar_size, duration):
+    # What loading a watchlist through Ib_client.IBClient costs today:
+    # one blocking call after another
+    errors = 0
+    for symbol in symbols:
+        try:
+            client.get_historical_bars(symbol, bar_size, duration)
+            client.ib.reqTickers(client.contracts.get(symbol))
+            client.get_news_headlines(symbol=symbol)
+        except Exception as e:
+            errors += 1
+            print(f"{symbol}: {e}")
+    return errors
+
+
+async def load_concurrent(client, symbols, bar_size, duration):
+    loaded = await client.load_watchlist(symbols, bar_size, duration)
+    errors = 0
+    for kind, results in loaded.items():
+        for symbol, result in results.items():
+            if isinstance(result, Exception):
+                errors += 1
+                print(f"{symbol} {kind}: {result}")
+    return errors
+
+
+def report(name, elapsed, errors, baseline=None, extra=""):
+    speedup = f"  x{baseline / elapsed:5.1f}" if baseline else ""
+    print(f"{name:<22} {elapsed * 1000:9.1f} ms  errors={errors}{speedup}{extra}")
+
+
+def run_simulated(args, symbols):
+    ib = SimulatedIB(args.rtt_ms / 1000, args.history_ms / 1000, args.snapshot_ms / 1000)
+    client = IBClient()
+    client.ib = ib
+    client.contracts = ContractCache(ib)
+    start = time.perf_counter()
+    errors = load_sequential(client, symbols, args.bar_size, args.duration)
+    baseline = time.perf_counter() - start
+    report("sequential IBClient", baseline, errors, extra=f"  requests={ib.requests}")
+
+    for concurrency in args.concurrency:
+        ib.reset()
+
+        async def run():
+            client = AsyncIBClient(concurrency=concurrency, ib=ib)
+            start = time.perf_counter()
+            errors = await load_concurrent(client, symbols, args.bar_size, args.duration)
+            return time.perf_counter() - start, errors
+        elapsed, errors = asyncio.run(run())
+        report(f"AsyncIBClient c={concurrency}", elapsed, errors, baseline,
+               f"  requests={ib.requests} max_in_flight={ib.max_in_flight}")
+
+
+def run_tws(args, symbols):
+    client = IBClient()
+    client.ib.connect(args.host, args.tws, clientId=args.client_id)
+    start = time.perf_counter()
+    errors = load_sequential(client, symbols, args.bar_size, args.duration)
+    baseline = time.perf_counter() - start
+    client.ib.disconnect()
+    report("sequential IBClient", baseline, errors)
+
+    for concurrency in args.concurrency:
+        async def run():
+            client = AsyncIBClient(concurrency=concurrency)
+            await client.connect(args.host, args.tws, args.client_id)
+            try:
+                start = time.perf_counter()
+                errors = await load_concurrent(client, symbols, args.bar_size, args.duration)
+                return time.perf_counter() - start, errors
+            finally:
+                client.disconnect()
+        elapsed, errors = asyncio.run(run())
+        report(f"AsyncIBClient c={concurrency}", elapsed, errors, baseline)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watchlist load time: sequential IBClient vs AsyncIBClient fan-out")
+    parser.add_argument('--symbols', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, DEFAULT_CONCURRENCY, 16])
+    parser.add_argument('--bar-size', type=int, default=5)
+    parser.add_argument('--duration', default='1 D')
+    parser.add_argument('--rtt-ms', type=float, default=40, help="simulated round trip for contract details and news")
+    parser.add_argument('--history-ms', type=float, default=250, help="simulated historical data round trip")
+    parser.add_argument('--snapshot-ms', type=float, default=150, help="simulated snapshot round trip")
+    parser.add_argument('--tws', type=int, metavar='PORT', help="run against a real TWS/Gateway on this port instead")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--client-id', type=int, default=31)
+    args = parser.parse_args()
+
+    symbols = SYMBOLS[:args.symbols]
+    print(f"{len(symbols)} symbols: bars + snapshot + headlines each")
+    if args.tws:
+        run_tws(args, symbols)
+    else:
+        run_simulated(args, symbols)
+
+
+if __name__ == "__main__":
+    main()
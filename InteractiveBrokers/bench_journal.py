@@ -0,0 +1,60 @@
+import argparse
+import os
+import tempfile
+import time
+
+from ibapi.contract import Contract
+from ibapi.execution import Execution
+
+from app import IBApiClient
+from journal import Journal, JournalReplayer, read_journal
+
+
+def write_cost_us(journal, count):
+    samples = []
+    for i in range(count):
+        start = time.perf_counter()
+        journal.tick_price(1, 1 + i % 2, 100.0 + (i % 100) * 0.01, "AAPL")
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99)], max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Journal append cost and replay throughput")
+    parser.add_argument('--events', type=int, default=500000)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="journal_bench_")
+    journal = Journal(root)
+    p50, p99, worst = write_cost_us(journal, args.events)
+    print(f"tick_price append  p50={p50:6.2f} us  p99={p99:6.2f} us  max={worst:8.1f} us  ({args.events} events)")
+
+    contract = Contract()
+    contract.symbol = "AAPL"
+    execution = Execution()
+    execution.execId, execution.side, execution.exchange, execution.time = "0001.01", "BOT", "ISLAND", "20240102 10:00:00"
+    execution.shares, execution.price, execution.orderId = 100, 101.5, 7
+    journal.position("DU123", contract, 100, 100.0)
+    journal.execution(-1, contract, execution)
+    journal.account_summary(9001, "DU123", "NetLiquidation", "1000000", "USD")
+    journal.close()
+    size = os.path.getsize(journal.path)
+    print(f"file {journal.path}: {size / 1e6:.1f} MB")
+
+    start = time.perf_counter()
+    records = sum(1 for _ in read_journal(journal.path))
+    elapsed = time.perf_counter() - start
+    print(f"read               {records / elapsed:,.0f} records/s")
+
+    events = []
+    client = IBApiClient(gui_callback=lambda kind, data: events.append(kind))
+    start = time.perf_counter()
+    replayed = JournalReplayer(journal.path, speed=None).replay(client)
+    elapsed = time.perf_counter() - start
+    print(f"replay             {replayed / elapsed:,.0f} events/s through IBApiClient, "
+          f"{len(events)} gui events, pnl {client.pnl.totals()}")
+
+
+if __name__ == "__main__":
+    main()
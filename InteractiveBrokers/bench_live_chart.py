@@ -0,0 +1,72 @@
+import argparse
+import random
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+from mplfinance.original_flavor import candlestick_ohlc
+
+from live_chart import LiveCandleChart, epoch_to_num
+
+
+def make_bars(n, bar_seconds, start_price=100.0):
+    rng = random.Random(7)
+    bars = []
+    t = int(time.time()) - n * bar_seconds
+    price = start_price
+    for _ in range(n):
+        open_p = price
+        close_p = price + rng.uniform(-0.5, 0.5)
+        bars.append((t, open_p, max(open_p, close_p) + 0.2, min(open_p, close_p) - 0.2, close_p))
+        price = close_p
+        t += bar_seconds
+    return bars
+
+
+def full_redraw_ms(bars, bar_seconds, repeat):
+    # What update_chart used to do for every change
+    fig, ax = plt.subplots(1, 1, figsize=(4, 2.5))
+    ohlc = [(epoch_to_num(t), o, h, l, c) for t, o, h, l, c in bars]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        ax.clear()
+        candlestick_ohlc(ax, ohlc, width=0.7 * bar_seconds / 86400, colorup='g', colordown='r')
+        fig.canvas.draw()
+    plt.close(fig)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def live_update_stats(bars, bar_seconds, ticks):
+    fig, ax = plt.subplots(1, 1, figsize=(4, 2.5))
+    chart = LiveCandleChart(ax, fig.canvas, max_bars=len(bars) + ticks)
+    chart.set_bars(bars, bar_seconds)
+    chart.draw()
+    t, _, _, _, price = bars[-1]
+    rng = random.Random(11)
+    for _ in range(ticks):
+        # Ticks stay inside the visible price range so only blits happen
+        price = min(max(price + rng.uniform(-0.05, 0.05), bars[-1][3]), bars[-1][2])
+        chart.update_price(t + rng.uniform(0, bar_seconds - 1), price)
+    stats = chart.frame_stats()
+    plt.close(fig)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live candle chart frame-time benchmark")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50, 200, 1000])
+    parser.add_argument('--ticks', type=int, default=500)
+    parser.add_argument('--bar-seconds', type=int, default=60)
+    args = parser.parse_args()
+
+    print(f"{'bars':>6} {'full redraw ms':>15} {'live p50 ms':>12} {'live p99 ms':>12}")
+    for n in args.sizes:
+        bars = make_bars(n, args.bar_seconds)
+        full_ms = full_redraw_ms(bars, args.bar_seconds, repeat=5)
+        stats = live_update_stats(bars, args.bar_seconds, args.ticks)
+        print(f"{n:>6} {full_ms:>15.2f} {stats['frame_ms']['p50']:>12.3f} {stats['frame_ms']['p99']:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import threading
+import time
+
+from app import WATCHLIST, SimulatedIBApiClient
+
+
+SYMBOLS = WATCHLIST + ["GOOGL", "META", "AMD", "NFLX", "INTC", "ORCL", "IBM", "JPM", "XOM", "KO"]
+
+
+def run_speed(speed, args):
+    gui_events = [0]
+
+    def on_event(kind, data):
+        gui_events[0] += 1
+    ibapi = SimulatedIBApiClient(on_event, args.seed, speed)
+    ibapi.connect()
+    threading.Thread(target=ibapi.run, daemon=True).start()
+    while not ibapi.order_ids.ready:
+        time.sleep(0.01)
+    for reqId, symbol in enumerate(SYMBOLS[:args.symbols], start=1):
+        ibapi.subscriptions.add(symbol, reqId, ibapi.make_stock_contract(symbol))
+        ibapi.request_market_data(symbol, reqId)
+
+    # Orders at a fixed rate of simulated time, so they scale with the clock
+    rate = args.order_rate * speed
+    start = time.perf_counter()
+    sent = 0
+    while time.perf_counter() - start < args.seconds:
+        due = start + sent / rate
+        now = time.perf_counter()
+        if due > now:
+            time.sleep(min(due - now, 0.01))
+            continue
+        symbol = SYMBOLS[sent % args.symbols]
+        ibapi.place_order(symbol, "BUY" if sent % 2 else "SELL", 100, "MKT", None, "DAY")
+        sent += 1
+    stats = ibapi.sim_stats()
+    latency = ibapi.order_latency.summary()
+    ibapi.disconnect()
+    fill = latency['submit_to_fill']
+    print(f"{speed:>6.0f}x  achieved {stats['achieved_speed']:7.1f}x  lag {stats['lag_s']:7.1f} s  "
+          f"ticks/s {stats['ticks_per_s']:9,.0f}  orders/s {stats['orders_per_s']:7,.0f}  "
+          f"fills {stats['fills']:>6}  fill p99 {fill.get('p99_ms', 0.0):8.1f} ms  gui events {gui_events[0]:,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Market simulator throughput from 1x to 1000x real time")
+    parser.add_argument('--speeds', type=float, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--seconds', type=float, default=5.0, help="wall time per speed")
+    parser.add_argument('--symbols', type=int, default=10)
+    parser.add_argument('--order-rate', type=float, default=1.0, help="orders per simulated second")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    for speed in args.speeds:
+        run_speed(speed, args)
+
+
+if __name__ == "__main__":
+    main()
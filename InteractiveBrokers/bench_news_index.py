@@ -0,0 +1,67 @@
+import argparse
+import datetime
+import random
+import time
+
+from bench_news_tagger import make_headlines, make_universe
+from event_store import EventStore
+from news_index import NewsIndex
+from news_tagger import NewsTagger
+
+
+SOURCES = ["NASDAQ", "NYSE", "BRFG", "DJ-N", "FLY"]
+
+
+def timed_us(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99)], len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="News index search latency and append cost")
+    parser.add_argument('--retention', type=int, default=10000, help="items kept in the store")
+    parser.add_argument('--items', type=int, default=30000, help="items appended (the rest are evicted)")
+    parser.add_argument('--symbols', type=int, default=2000)
+    parser.add_argument('--limit', type=int, default=200, help="rows a search returns, as the news panel asks")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    universe = make_universe(args.symbols, rng)
+    tagger = NewsTagger(aliases=None)
+    for ticker, name in universe.items():
+        tagger.add(ticker, name)
+    store = EventStore(args.retention, key=lambda n: n['headline'], symbol=lambda n: n['symbol'])
+    index = NewsIndex(store)
+
+    now = datetime.datetime.now()
+    start = time.perf_counter()
+    for n, (headline, _) in enumerate(make_headlines(universe, args.items, rng)):
+        headline = f"{headline} #{n}"
+        symbols = tagger.tag(headline)
+        item = {'datetime': now, 'source': rng.choice(SOURCES), 'symbol': symbols[0] if symbols else "",
+                'symbols': symbols, 'headline': headline}
+        if store.append(item):
+            index.add(item)
+    elapsed = time.perf_counter() - start
+    print(f"append   {args.items / elapsed:,.0f} items/s incl. tagging, {len(index)} kept, "
+          f"{len(index._vocab)} distinct keys")
+
+    symbol = rng.choice(list(universe))
+    queries = [("s", None), ("so", None), ("soar", None), ("soar to", None), ("$" + symbol, None),
+               ("@nasdaq stock", None), ("", symbol), ("high", symbol), ("zzzz", None)]
+    for query, sym in queries:
+        p50, p99, hits = timed_us(lambda: index.search(query, sym, limit=args.limit), 200)
+        print(f"search {query!r:<18} symbol={sym or '-':<6} p50 {p50 / 1000:7.3f} ms  p99 {p99 / 1000:7.3f} ms  "
+              f"{hits} hits")
+    p50, p99, hits = timed_us(lambda: index.search("", None, index.last_seq - 5), 1000)
+    print(f"new items since last refresh    p50 {p50 / 1000:7.3f} ms  p99 {p99 / 1000:7.3f} ms  {hits} hits")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import argparse
+import random
+import re
+import string
+import time
+
+from news_tagger import AMBIGUOUS_TICKERS, NewsTagger
+
+
+TEMPLATES = [
+    "Breaking News: [{t}] hits all time high!",
+    "Why Is {n} Stock ({t}) Up {p}% Today?",
+    "{n} Soars {p} percent on Industry Growth",
+    "{N} COMMENTS ON RECENT STOCK PRICE VOLATILITY",
+    "${t} stock is up {p}% today. Here's what we see in our data.",
+    "{n} to Host First Quarter 2025 Financial Results Conference Call",
+    "{n}({t}) Shares Soar {p}% on AI Tech Advancements",
+    "Analysts see {t} and {t2} leading the sector higher",
+    "{n} Rings Nasdaq Opening Bell, listed as NASDAQ: {t}",
+]
+
+WORDS = ["Pharmaceuticals", "Power", "Bancorp", "Healthcare", "Dynamics", "Systems", "Energy",
+         "Therapeutics", "Networks", "Robotics", "Materials", "Labs"]
+
+
+def make_universe(count, rng):
+    tickers = set()
+    while len(tickers) < count:
+        ticker = "".join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(2, 4)))
+        if ticker not in AMBIGUOUS_TICKERS:
+            tickers.add(ticker)
+    universe = {}
+    for ticker in sorted(tickers):
+        stem = ticker.capitalize() + "".join(rng.choice(string.ascii_lowercase) for _ in range(4))
+        universe[ticker] = f"{stem} {rng.choice(WORDS)}"
+    return universe
+
+
+def make_headlines(universe, count, rng):
+    tickers = list(universe)
+    headlines = []
+    for _ in range(count):
+        t, t2 = rng.choice(tickers), rng.choice(tickers)
+        template = rng.choice(TEMPLATES)
+        headline = template.format(t=t, t2=t2, n=universe[t], N=universe[t].upper(), p=rng.randint(2, 150))
+        headlines.append((headline, t))
+    return headlines
+
+
+def regex_symbol(message):
+    # The bulletin handlers' previous approach, for comparison
+    match = re.search(r"\[([A-Z]+)\]", message)
+    if match:
+        return match.group(1)
+    for part in message.split():
+        if part.isupper() and len(part) <= 5:
+            return part
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="News headline tagging throughput")
+    parser.add_argument('--symbols', type=int, default=5000, help="size of the symbol universe")
+    parser.add_argument('--headlines', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    universe = make_universe(args.symbols, rng)
+    headlines = make_headlines(universe, args.headlines, rng)
+    texts = [h for h, _ in headlines]
+
+    start = time.perf_counter()
+    tagger = NewsTagger(aliases=None)
+    for ticker, name in universe.items():
+        tagger.add(ticker, name)
+    tagger.tag("")
+    print(f"build      {len(tagger)} symbols in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    for name, run in (("regex", lambda: [regex_symbol(h) for h in texts]),
+                      ("tagger", lambda: tagger.tag_many(texts))):
+        start = time.perf_counter()
+        results = run()
+        elapsed = time.perf_counter() - start
+        first = [r[0] if r else None for r in results] if name == "tagger" else results
+        correct = sum(1 for got, (_, want) in zip(first, headlines) if got == want)
+        print(f"{name:<10} {len(texts) / elapsed:10,.0f} headlines/s  "
+              f"primary symbol right {correct / len(texts):6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import threading
+import time
+
+import app
+from fake_tws import FakeTWS
+
+
+def send_path_us(ibapi, count):
+    # Time spent inside place_order, i.e. what the GUI thread pays per order
+    samples = []
+    for i in range(count):
+        start = time.perf_counter()
+        ibapi.place_order("AAPL", "BUY" if i % 2 else "SELL", 1, "LMT", "100.0", "DAY")
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99)]
+
+
+def wait_for_scheduler(ibapi):
+    while ibapi.scheduler.pending():
+        time.sleep(0.05)
+
+
+def allocator_is_unique(ibapi, threads, per_thread):
+    ids = []
+    lock = threading.Lock()
+
+    def worker():
+        mine = [ibapi.order_ids.next() for _ in range(per_thread)]
+        with lock:
+            ids.extend(mine)
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return len(ids) == len(set(ids)) == threads * per_thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Order submission latency against a local fake TWS")
+    parser.add_argument('--orders', type=int, default=400)
+    parser.add_argument('--rate', type=int, default=40, help="orders per second (the scheduler queues above ~45/s)")
+    args = parser.parse_args()
+
+    server = FakeTWS().start()
+    ibapi = app.IBApiClient(gui_callback=None)
+    ibapi.connect("127.0.0.1", server.port, 100)
+    threading.Thread(target=ibapi.run, daemon=True).start()
+    server.api_started.wait(10)
+    while not ibapi.order_ids.ready:
+        time.sleep(0.01)
+
+    start = time.perf_counter()
+    for i in range(args.orders):
+        delay = start + i / args.rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        ibapi.place_order("AAPL", "BUY", 1, "MKT", None, "DAY")
+    wait_for_scheduler(ibapi)
+    time.sleep(0.5)
+
+    summary = ibapi.order_latency.summary()
+    for name, stats in summary.items():
+        if stats['count']:
+            print(f"{name:<16} n={stats['count']:>6}  p50={stats['p50_ms']:7.3f} ms  "
+                  f"p99={stats['p99_ms']:7.3f} ms  max={stats['max_ms']:7.3f} ms")
+        else:
+            print(f"{name:<16} no samples")
+    sched = ibapi.scheduler.stats()['order']
+    print(f"scheduler        sent={sched['sent']} inline={sched['inline']} max_depth={sched['max_depth']} "
+          f"wait p99={sched['wait_p99_ms']:.3f} ms")
+    p50, p99 = send_path_us(ibapi, args.orders)
+    print(f"place_order call  p50={p50:7.1f} us  p99={p99:7.1f} us")
+    wait_for_scheduler(ibapi)
+    print(f"order ids unique across 8 threads: {allocator_is_unique(ibapi, 8, 10000)}")
+    ibapi.disconnect()
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import heapq
+import itertools
+import random
+import threading
+import time
+
+from render_scheduler import RenderScheduler
+
+
+# Panel -> (redraw cost in ms, events per second from the IB thread); the
+# chart stands in for a full matplotlib redraw
+PANELS = {
+    'quotes': (1.0, 2000),
+    'account': (0.5, 2),
+    'portfolio': (2.0, 50),
+    'orders': (1.5, 20),
+    'activity': (1.0, 20),
+    'news': (0.5, 1),
+    'chart': (25.0, 1),
+}
+
+
+class EventLoop:
+    # Stand-in for Tk's mainloop: after(ms, fn) callbacks on one thread
+
+    def __init__(self):
+        self._queue = []
+        self._seq = itertools.count()
+
+    def after(self, ms, fn):
+        heapq.heappush(self._queue, (time.perf_counter() + ms / 1000, next(self._seq), fn))
+
+    def run(self, seconds):
+        end = time.perf_counter() + seconds
+        while self._queue and time.perf_counter() < end:
+            due, _, fn = self._queue[0]
+            now = time.perf_counter()
+            if due > now:
+                time.sleep(min(due - now, end - now))
+                continue
+            heapq.heappop(self._queue)
+            fn()
+
+
+def busy(ms):
+    end = time.perf_counter() + ms / 1000
+    while time.perf_counter() < end:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render loop under an event storm: budget, deferrals, staleness")
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--hz', type=float, default=20, help="frames per second")
+    parser.add_argument('--budget-ms', type=float, default=None, help="per-frame budget (default 60%% of a frame)")
+    parser.add_argument('--load', type=float, default=1.0, help="multiplier on every event rate")
+    args = parser.parse_args()
+
+    loop = EventLoop()
+    scheduler = RenderScheduler(loop.after, max(1, int(1000 / args.hz)), args.budget_ms)
+    for name, (cost, _) in PANELS.items():
+        scheduler.add_panel(name, lambda payloads, cost=cost: busy(cost))
+
+    stop = threading.Event()
+    events = [0]
+
+    def ib_thread():
+        rng = random.Random(0)
+        names = list(PANELS)
+        weights = [rate * args.load for _, rate in PANELS.values()]
+        interval = 1.0 / sum(weights)
+        while not stop.is_set():
+            scheduler.mark(rng.choices(names, weights)[0], events[0])
+            events[0] += 1
+            time.sleep(interval)
+    threading.Thread(target=ib_thread, daemon=True).start()
+    scheduler.start()
+    loop.run(args.seconds)
+    stop.set()
+
+    stats = scheduler.stats()
+    frame = stats['frame']
+    print(f"{events[0]:,} events, {stats['frames']} frames, {stats['over_budget']} over the "
+          f"{stats['budget_ms']:.0f} ms budget; frame p50 {frame['p50_ms']:.1f} ms  p99 {frame['p99_ms']:.1f} ms")
+    for name, panel in stats['panels'].items():
+        render, stale = panel['render'], panel['staleness']
+        print(f"  {name:<10} {panel['renders']:>5} renders {panel['deferred']:>5} deferred  "
+              f"render p50 {render.get('p50_ms', 0.0):6.2f} ms  staleness p99 {stale.get('p99_ms', 0.0):7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import time
+
+import numpy as np
+
+from tick_buffer import TICK_DTYPE, TickRingBuffer, TickStore
+
+
+def bench_ring(n_ticks, capacity):
+    buf = TickRingBuffer(capacity)
+    prices = 100 + np.cumsum(np.random.default_rng(1).normal(0, 0.01, n_ticks))
+    start = time.perf_counter()
+    for i, p in enumerate(prices.tolist()):
+        buf.append(i, p - 0.01, p + 0.01, p, 100)
+    elapsed = time.perf_counter() - start
+    return n_ticks / elapsed, buf
+
+
+def bench_store(n_ticks, n_symbols, capacity):
+    store = TickStore(capacity_per_symbol=capacity)
+    symbols = [f"SYM{i}" for i in range(n_symbols)]
+    fields = ('bid', 'ask', 'last', 'size')
+    start = time.perf_counter()
+    for i in range(n_ticks):
+        store.record(symbols[i % n_symbols], fields[i & 3], 100.0 + (i % 50) * 0.01, i)
+    elapsed = time.perf_counter() - start
+    return n_ticks / elapsed, store
+
+
+def bench_window(buf, n, repeat=10000):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        view = buf.window(n)
+    elapsed = time.perf_counter() - start
+    return elapsed / repeat * 1e6, np.shares_memory(view, buf._data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tick ring buffer ingest benchmark")
+    parser.add_argument('--ticks', type=int, default=1_000_000)
+    parser.add_argument('--symbols', type=int, default=100)
+    parser.add_argument('--capacity', type=int, default=16384)
+    args = parser.parse_args()
+
+    rate, buf = bench_ring(args.ticks, args.capacity)
+    print(f"ring append:      {rate:,.0f} ticks/s ({args.ticks:,} ticks, capacity {args.capacity:,})")
+
+    rate, store = bench_store(args.ticks, args.symbols, args.capacity)
+    print(f"store record:     {rate:,.0f} ticks/s across {args.symbols} symbols")
+
+    per_call_us, zero_copy = bench_window(buf, 1000)
+    print(f"window(1000):     {per_call_us:.2f} us/call, zero-copy={zero_copy}")
+
+    # Each tick is stored twice so windows stay contiguous
+    per_million = 2 * TICK_DTYPE.itemsize * 1_000_000
+    print(f"memory:           {per_million / 2**20:.1f} MiB per million ticks of capacity")
+    print(f"store footprint:  {store.nbytes / 2**20:.1f} MiB for {len(store.symbols())} symbols "
+          f"(ceiling {store.max_symbols} symbols)")
+
+
+if __name__ == "__main__":
+    main()
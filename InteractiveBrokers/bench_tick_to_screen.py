@@ -0,0 +1,229 @@
+import argparse
+import threading
+import time
+
+import app
+from fake_tws import FakeTWS
+
+
+BASE_PRICE = 100.0
+
+
+def percentile(samples, p):
+    if not samples:
+        return float('nan')
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def report(name, samples):
+    ms = [s * 1000 for s in samples]
+    print(f"{name:<28} n={len(ms):>7}  p50={percentile(ms, 50):8.3f} ms  "
+          f"p99={percentile(ms, 99):8.3f} ms  max={max(ms) if ms else float('nan'):8.3f} ms")
+
+
+class Probe:
+    # Hooks the IBApiClient instance inside IBClient/IBDashboard and stamps
+    # when each scripted message reaches its handler.
+
+    def __init__(self, server, ibapi):
+        self.server = server
+        self.ibapi = ibapi
+        self.tick_seen = {}
+        self.exec_seen = {}
+        self.news_seen = {}
+        self.done = threading.Event()
+        self.expect = None
+        self._wrap('tickPrice', self._on_tick)
+        self._wrap('execDetails', self._on_exec)
+        self._wrap('updateNewsBulletin', self._on_news)
+
+    def _wrap(self, name, after):
+        original = getattr(self.ibapi, name)
+
+        def wrapped(*args):
+            original(*args)
+            after(*args)
+        setattr(self.ibapi, name, wrapped)
+
+    def reset(self, expect):
+        self.tick_seen.clear()
+        self.exec_seen.clear()
+        self.news_seen.clear()
+        self.server.sent_at.clear()
+        self.expect = expect
+        self.done.clear()
+
+    def _mark(self, seen, seq):
+        seen[seq] = time.perf_counter()
+        if seq == self.expect:
+            self.done.set()
+
+    def _on_tick(self, reqId, tickType, price, attrib):
+        self._mark(self.tick_seen, round((price - BASE_PRICE) * 100))
+
+    def _on_exec(self, reqId, contract, execution):
+        if execution.execId.startswith("bench."):
+            self._mark(self.exec_seen, int(execution.execId.split(".")[1]))
+
+    def _on_news(self, msgId, msgType, message, exchange):
+        self._mark(self.news_seen, int(msgId))
+
+    def latencies(self, seen):
+        sent = self.server.sent_at
+        return [t - sent[seq] for seq, t in seen.items() if seq in sent]
+
+
+class FrameTimes:
+    # When a frame showed each batch. The conflator merges every tick since
+    # the last frame into one quote, so timing a frame from the newest tick
+    # it shows understates how long the oldest one in the batch waited; both
+    # are kept.
+
+    def __init__(self):
+        self.newest = {}
+        self.oldest = {}
+        self.last = -1
+
+    def reset(self):
+        self.newest.clear()
+        self.oldest.clear()
+        self.last = -1
+
+    def frame(self, seq, t):
+        # seq: the newest tick the frame drew; ticks arrive in order, so the
+        # batch started right after the previous frame's newest
+        if seq > self.last:
+            self.newest[seq] = t
+            self.oldest[self.last + 1] = t
+            self.last = seq
+
+
+def run_stream(probe, send, count, timeout):
+    probe.reset(count - 1)
+    elapsed = send()
+    probe.done.wait(timeout)
+    return elapsed
+
+
+def bench_headless(args):
+    server = FakeTWS().start()
+    events = []
+    client = app.IBClient(gui_callback=lambda kind, data: events.append(kind), port=server.port)
+    server.api_started.wait(10)
+    threading.Thread(target=client.ibapi.run, daemon=True).start()
+    probe = Probe(server, client.ibapi)
+    req_id = client.subscribe_market_data("AAPL")
+    server.wait_for_subscription("AAPL")
+
+    # Stand-in for the GUI frame loop: drain the conflator at TICK_FLUSH_HZ
+    frames = FrameTimes()
+    stop = threading.Event()
+
+    def frame_loop():
+        while not stop.is_set():
+            batch = client.ibapi.tick_conflator.drain()
+            quote = batch.get(req_id)
+            if quote and 'last' in quote:
+                frames.frame(round((quote['last'] - BASE_PRICE) * 100), time.perf_counter())
+            time.sleep(1 / args.hz)
+    threading.Thread(target=frame_loop, daemon=True).start()
+
+    print(f"-- latency at {args.rate:,} msg/s --")
+    frames.reset()
+    run_stream(probe, lambda: server.stream_ticks(req_id, args.count, args.rate, BASE_PRICE), args.count, 10)
+    time.sleep(2 / args.hz)
+    report("tick wire -> tickPrice", probe.latencies(probe.tick_seen))
+    report(f"newest tick -> frame ({args.hz} Hz)", probe.latencies(frames.newest))
+    report(f"oldest tick -> frame ({args.hz} Hz)", probe.latencies(frames.oldest))
+    run_stream(probe, lambda: server.stream_executions("AAPL", args.count, args.rate), args.count, 10)
+    report("fill wire -> execDetails", probe.latencies(probe.exec_seen))
+    run_stream(probe, lambda: server.stream_news(args.count, args.rate), args.count, 10)
+    report("news wire -> bulletin", probe.latencies(probe.news_seen))
+
+    print("-- tick throughput ramp --")
+    best = 0
+    for rate in args.ramp:
+        count = max(1000, int(rate * args.ramp_seconds))
+        run_stream(probe, lambda: server.stream_ticks(req_id, count, rate, BASE_PRICE), count, 10)
+        lat = probe.latencies(probe.tick_seen)
+        p99 = percentile(lat, 99) * 1000
+        kept_up = len(lat) == count and p99 < args.max_p99_ms
+        print(f"{rate:>9,} ticks/s  received={len(lat):>8,}/{count:<8,} p99={p99:8.3f} ms  "
+              f"{'ok' if kept_up else 'FALLING BEHIND'}")
+        if not kept_up:
+            break
+        best = rate
+    start = time.perf_counter()
+    run_stream(probe, lambda: server.stream_ticks(req_id, args.count * 10, None, BASE_PRICE), args.count * 10, 30)
+    blast = len(probe.tick_seen) / (time.perf_counter() - start)
+    print(f"max sustainable rate (p99 < {args.max_p99_ms} ms): {best:,} ticks/s; unthrottled: {blast:,.0f} ticks/s")
+    print(f"conflator: {client.ibapi.tick_conflator.stats()}")
+    stop.set()
+    client.ibapi.disconnect()
+    server.stop()
+
+
+def bench_gui(args):
+    server = FakeTWS().start()
+    dashboard = app.IBDashboard(tick_flush_hz=args.hz, port=server.port)
+    probe = Probe(server, dashboard.ib_client.ibapi)
+    frames = FrameTimes()
+    drawn = [-1]
+    original_drain = dashboard.ib_client.drain_quotes
+    original_flush = dashboard.flush_market_data
+
+    def timed_drain():
+        # The newest tick in the batch this frame is about to draw
+        batch = original_drain()
+        quote = batch.get(dashboard.ib_client.current_symbol)
+        if quote and 'last' in quote:
+            drawn[0] = round((quote['last'] - BASE_PRICE) * 100)
+        return batch
+
+    def timed_flush():
+        drawn[0] = -1
+        original_flush()
+        dashboard.update_idletasks()
+        if drawn[0] >= 0:
+            frames.frame(drawn[0], time.perf_counter())
+    dashboard.ib_client.drain_quotes = timed_drain
+    dashboard.flush_market_data = timed_flush
+
+    def drive():
+        # IBClient.start subscribes the chart symbol a few seconds in
+        req_id = server.wait_for_subscription(dashboard.ib_client.current_symbol, timeout=15)
+        run_stream(probe, lambda: server.stream_ticks(req_id, args.count, args.rate, BASE_PRICE), args.count, 10)
+        time.sleep(0.5)
+        dashboard.after(0, dashboard.on_close)
+    threading.Thread(target=drive, daemon=True).start()
+    dashboard.mainloop()
+
+    print(f"-- GUI latency at {args.rate:,} ticks/s, {args.hz} Hz frames --")
+    report("tick wire -> tickPrice", probe.latencies(probe.tick_seen))
+    report("newest tick -> account_text", probe.latencies(frames.newest))
+    report("oldest tick -> account_text", probe.latencies(frames.oldest))
+    server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tick-to-screen latency benchmark against a local fake TWS")
+    parser.add_argument('--gui', action='store_true', help="drive IBDashboard (needs a display)")
+    parser.add_argument('--count', type=int, default=5000)
+    parser.add_argument('--rate', type=int, default=2000, help="messages per second for latency runs")
+    parser.add_argument('--hz', type=int, default=app.TICK_FLUSH_HZ)
+    parser.add_argument('--ramp', type=int, nargs='+', default=[1000, 5000, 10000, 25000, 50000, 100000])
+    parser.add_argument('--ramp-seconds', type=float, default=1.0)
+    parser.add_argument('--max-p99-ms', type=float, default=50.0)
+    args = parser.parse_args()
+    if args.gui:
+        try:
+            bench_gui(args)
+            return
+        except app.tk.TclError as e:
+            print(f"no display ({e}); running headless")
+    bench_headless(args)
+
+
+if __name__ == "__main__":
+    main()
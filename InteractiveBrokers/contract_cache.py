@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+import threading
+
+from ib_insync import Contract, util
+
+
+DEFAULT_CONTRACT_CACHE = os.path.join(os.path.expanduser("~"), ".ib_dashboard", "contracts.json")
+
+
+def contract_key(symbol, sec_type='STK', exchange='SMART', currency='USD'):
+    return (symbol.upper(), sec_type, exchange, currency)
+
+
+class ContractCache:
+    # Qualified contracts keyed by (symbol, secType, exchange, currency) so
+    # qualifyContracts, a blocking round trip to TWS, runs once per
+    # instrument instead of before every order or subscription.
+
+    def __init__(self, ib, path=None):
+        self.ib = ib
+        self.path = path
+        self._contracts = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Last qualification error per key, for contracts that did not qualify
+        self.errors = {}
+        if path:
+            self.load()
+
+    def __contains__(self, key):
+        return key in self._contracts
+
+    def __len__(self):
+        return len(self._contracts)
+
+    def get(self, symbol, sec_type='STK', exchange='SMART', currency='USD'):
+        key = contract_key(symbol, sec_type, exchange, currency)
+        contract = self._contracts.get(key)
+        if contract is not None:
+            self.hits += 1
+            return contract
+        self.misses += 1
+        qualified = self._qualify({key: self._make(key)})
+        return qualified.get(key)
+
+    def qualify(self, contract):
+        # Qualify an arbitrary contract in place, through the cache
+        key = contract_key(contract.symbol, contract.secType or 'STK',
+                           contract.exchange or 'SMART', contract.currency or 'USD')
+        cached = self._contracts.get(key)
+        if cached is None:
+            self.misses += 1
+            cached = self._qualify({key: contract}).get(key)
+        else:
+            self.hits += 1
+        if cached is not None and cached is not contract:
+            contract.conId = cached.conId
+            contract.primaryExchange = cached.primaryExchange
+            contract.localSymbol = cached.localSymbol
+            contract.tradingClass = cached.tradingClass
+        return cached
+
+    def qualify_many(self, symbols, sec_type='STK', exchange='SMART', currency='USD'):
+        # One qualifyContracts call for every symbol not cached yet
+        keys = [contract_key(s, sec_type, exchange, currency) for s in symbols]
+        missing = {key: self._make(key) for key in keys if key not in self._contracts}
+        if missing:
+            self.misses += len(missing)
+            self._qualify(missing)
+        return {key[0]: self._contracts.get(key) for key in keys}
+
+    async def qualify_many_async(self, symbols, sec_type='STK', exchange='SMART', currency='USD', limit=None):
+        # Same as qualify_many on ib_insync's qualifyContractsAsync, one
+        # request per contract; with an asyncio.Semaphore as `limit` at most
+        # that many are in flight. A contract whose request fails (with
+        # RaiseRequestErrors set) is left unqualified, its error kept in
+        # self.errors, and the others are still stored.
+        keys = [contract_key(s, sec_type, exchange, currency) for s in symbols]
+        missing = {key: self._make(key) for key in keys if key not in self._contracts}
+        if missing:
+            self.misses += len(missing)
+
+            async def qualify_one(key, contract):
+                try:
+                    if limit is None:
+                        await self.ib.qualifyContractsAsync(contract)
+                    else:
+                        async with limit:
+                            await self.ib.qualifyContractsAsync(contract)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.errors[key] = e
+                    contract.conId = 0
+            await asyncio.gather(*(qualify_one(key, c) for key, c in missing.items()))
+            self._store(missing)
+        return {key[0]: self._contracts.get(key) for key in keys}
+
+    def _make(self, key):
+        symbol, sec_type, exchange, currency = key
+        return Contract(secType=sec_type, symbol=symbol, exchange=exchange, currency=currency)
+
+    def _qualify(self, pending):
+        self.ib.qualifyContracts(*pending.values())
+        return self._store(pending)
+
+    def _store(self, pending):
+        qualified = {key: c for key, c in pending.items() if c.conId}
+        for key in qualified:
+            self.errors.pop(key, None)
+        if qualified:
+            with self._lock:
+                self._contracts.update(qualified)
+            if self.path:
+                self.save()
+        return qualified
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            entries = json.load(f)
+        with self._lock:
+            for entry in entries:
+                key = tuple(entry['key'])
+                self._contracts[key] = Contract.create(**entry['contract'])
+
+    def save(self):
+        with self._lock:
+            entries = [{'key': list(key), 'contract': util.dataclassNonDefaults(c)}
+                       for key, c in self._contracts.items()]
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.path)
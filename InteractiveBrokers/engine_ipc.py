@@ -0,0 +1,221 @@
+import itertools
+import os
+import threading
+from collections import deque
+from multiprocessing.connection import Client, Listener
+
+
+DEFAULT_ENGINE_ADDRESS = os.path.join(os.path.expanduser("~"), ".ib_dashboard", "engine.sock")
+ENGINE_AUTHKEY = b"ib_dashboard"
+
+
+class _Subscriber:
+    # Outbound side of one attached GUI. Events are sent in order; quotes are
+    # conflated per symbol, so a subscriber that falls behind only ever gets
+    # the latest quote and never makes the engine wait.
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.events = deque()
+        self.quotes = {}
+        self.cond = threading.Condition()
+        self.alive = True
+        self.quotes_conflated = 0
+
+    def push(self, kind, data):
+        with self.cond:
+            self.events.append((kind, data))
+            self.cond.notify()
+
+    def push_quotes(self, quotes):
+        with self.cond:
+            for symbol, quote in quotes.items():
+                if symbol in self.quotes:
+                    self.quotes_conflated += 1
+                self.quotes[symbol] = quote
+            self.cond.notify()
+
+    def close(self):
+        with self.cond:
+            self.alive = False
+            self.cond.notify()
+        self.conn.close()
+
+    def run_sender(self):
+        while True:
+            with self.cond:
+                while self.alive and not self.events and not self.quotes:
+                    self.cond.wait()
+                if not self.alive:
+                    return
+                events = list(self.events)
+                self.events.clear()
+                quotes, self.quotes = self.quotes, {}
+            if quotes:
+                events.append(('quotes', quotes))
+            for event in events:
+                try:
+                    self.conn.send(event)
+                except (OSError, EOFError):
+                    self.alive = False
+                    return
+                except Exception as e:
+                    print(f"Engine could not send {event[0]}: {e}")
+
+
+class EventPublisher:
+    # Engine side: accepts any number of subscribers on a Unix socket,
+    # fans events out to them and answers their calls. snapshot() is sent
+    # to each new subscriber; handle_call(method, args) runs their requests.
+
+    def __init__(self, snapshot, handle_call, address=DEFAULT_ENGINE_ADDRESS, authkey=ENGINE_AUTHKEY):
+        self.address = address
+        self.authkey = authkey
+        self.snapshot = snapshot
+        self.handle_call = handle_call
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def start(self):
+        directory = os.path.dirname(self.address)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        self._listener = Listener(self.address, family='AF_UNIX', authkey=self.authkey)
+        threading.Thread(target=self._accept, daemon=True).start()
+        return self
+
+    def stop(self):
+        with self._lock:
+            subscribers, self._subscribers = self._subscribers, []
+        for sub in subscribers:
+            sub.close()
+        if self._listener is not None:
+            self._listener.close()
+
+    @property
+    def subscribers(self):
+        return len(self._subscribers)
+
+    def publish(self, kind, data):
+        for sub in self._subscribers:
+            sub.push(kind, data)
+
+    def publish_quotes(self, quotes):
+        for sub in self._subscribers:
+            sub.push_quotes(quotes)
+
+    def _accept(self):
+        while True:
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError):
+                return
+            except Exception as e:
+                # e.g. a client with the wrong authkey
+                print(f"Engine rejected a subscriber: {e}")
+                continue
+            sub = _Subscriber(conn)
+            with self._lock:
+                self._subscribers = self._subscribers + [sub]
+            threading.Thread(target=sub.run_sender, daemon=True).start()
+            threading.Thread(target=self._serve, args=(sub,), daemon=True).start()
+
+    def _serve(self, sub):
+        while sub.alive:
+            try:
+                message = sub.conn.recv()
+            except (OSError, EOFError):
+                break
+            kind = message[0]
+            if kind == 'snapshot':
+                sub.push('snapshot', self.snapshot())
+            elif kind == 'call':
+                _, call_id, method, args = message
+                try:
+                    reply = (call_id, True, self.handle_call(method, args))
+                except Exception as e:
+                    reply = (call_id, False, f"{type(e).__name__}: {e}")
+                if call_id is not None:
+                    sub.push('reply', reply)
+        sub.close()
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not sub]
+
+
+class EngineConnection:
+    # Subscriber side: on_event(kind, data) runs on a reader thread for
+    # every published event; call() is a blocking request/reply, call_async()
+    # hands the reply to a callback and cast() is a fire-and-forget request.
+
+    def __init__(self, on_event, address=DEFAULT_ENGINE_ADDRESS, authkey=ENGINE_AUTHKEY):
+        self.address = address
+        self.authkey = authkey
+        self.on_event = on_event
+        self._conn = None
+        self._send_lock = threading.Lock()
+        self._call_ids = itertools.count(1)
+        self._pending = {}
+
+    def connect(self):
+        self._conn = Client(self.address, family='AF_UNIX', authkey=self.authkey)
+        threading.Thread(target=self._read, daemon=True).start()
+        return self
+
+    def request_snapshot(self):
+        # Answered with a 'snapshot' event
+        self._send(('snapshot',))
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+
+    def call(self, method, *args, timeout=5.0):
+        call_id = next(self._call_ids)
+        done = threading.Event()
+        self._pending[call_id] = [done, None]
+        self._send(('call', call_id, method, args))
+        if not done.wait(timeout):
+            self._pending.pop(call_id, None)
+            raise TimeoutError(f"engine did not answer {method} within {timeout}s")
+        ok, result = self._pending.pop(call_id)[1]
+        if not ok:
+            raise RuntimeError(f"engine {method} failed: {result}")
+        return result
+
+    def call_async(self, method, *args, callback=None):
+        # callback(ok, result) runs on the reader thread once the engine
+        # answers; a call the engine never answers is simply dropped
+        if callback is None:
+            return self.cast(method, *args)
+        call_id = next(self._call_ids)
+        self._pending[call_id] = callback
+        self._send(('call', call_id, method, args))
+
+    def cast(self, method, *args):
+        self._send(('call', None, method, args))
+
+    def _send(self, message):
+        with self._send_lock:
+            self._conn.send(message)
+
+    def _read(self):
+        while True:
+            try:
+                kind, data = self._conn.recv()
+            except (OSError, EOFError):
+                self.on_event('engine_disconnected', None)
+                return
+            if kind == 'reply':
+                call_id, ok, result = data
+                pending = self._pending.get(call_id)
+                if callable(pending):
+                    del self._pending[call_id]
+                    pending(ok, result)
+                elif pending is not None:
+                    pending[1] = (ok, result)
+                    pending[0].set()
+            else:
+                self.on_event(kind, data)
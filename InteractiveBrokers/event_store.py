@@ -0,0 +1,145 @@
+import threading
+import time
+from bisect import bisect_left
+
+
+class _SeqIndex:
+    # Append-only list with a moving head: O(1) append, amortized O(1)
+    # popleft, and bisect over the (non-decreasing) arrival times.
+
+    def __init__(self):
+        self.items = []
+        self.times = []
+        self.head = 0
+
+    def __len__(self):
+        return len(self.items) - self.head
+
+    def append(self, t, item):
+        self.items.append(item)
+        self.times.append(t)
+
+    def popleft(self):
+        item = self.items[self.head]
+        self.items[self.head] = None
+        self.head += 1
+        if self.head >= 64 and self.head * 2 >= len(self.items):
+            del self.items[:self.head]
+            del self.times[:self.head]
+            self.head = 0
+        return item
+
+    def get(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.items[self.head + i]
+
+    def last(self, n):
+        return self.items[max(self.head, len(self.items) - n):]
+
+    def since(self, t):
+        return self.items[bisect_left(self.times, t, self.head):]
+
+    def all(self):
+        return self.items[self.head:]
+
+
+class EventStore:
+    # Bounded, insertion-ordered event log (news, fills, activity). Appends
+    # and evictions are O(1); duplicates are rejected by hash key; events are
+    # also indexed by symbol, and every index can be range-queried by arrival
+    # time. Since eviction is FIFO, the event leaving the store is always the
+    # oldest one in its symbol index as well.
+
+    def __init__(self, maxlen=1000, key=None, symbol=None):
+        self.maxlen = maxlen
+        self._key = key
+        self._symbol = symbol
+        self._all = _SeqIndex()
+        self._by_symbol = {}
+        self._keys = set()
+        self._last_time = 0.0
+        self._lock = threading.RLock()
+        self.on_evict = []
+
+    def __len__(self):
+        return len(self._all)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(self._all.all())
+
+    def __getitem__(self, i):
+        with self._lock:
+            return self._all.get(i)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def append(self, event, t=None):
+        with self._lock:
+            if self._key is not None:
+                k = self._key(event)
+                if k in self._keys:
+                    return False
+                self._keys.add(k)
+            # Keep the time index sorted even if the wall clock steps back
+            t = max(time.time() if t is None else t, self._last_time)
+            self._last_time = t
+            while len(self._all) >= self.maxlen:
+                self._evict()
+            self._all.append(t, event)
+            if self._symbol is not None:
+                sym = self._symbol(event)
+                index = self._by_symbol.get(sym)
+                if index is None:
+                    index = self._by_symbol[sym] = _SeqIndex()
+                index.append(t, event)
+            return True
+
+    def _evict(self):
+        event = self._all.popleft()
+        if self._key is not None:
+            self._keys.discard(self._key(event))
+        if self._symbol is not None:
+            sym = self._symbol(event)
+            index = self._by_symbol[sym]
+            index.popleft()
+            if not len(index):
+                del self._by_symbol[sym]
+        for callback in self.on_evict:
+            callback(event)
+
+    def set_maxlen(self, maxlen):
+        with self._lock:
+            self.maxlen = maxlen
+            while len(self._all) > maxlen:
+                self._evict()
+
+    def clear(self):
+        with self._lock:
+            while len(self._all):
+                self._evict()
+
+    def symbols(self):
+        with self._lock:
+            return list(self._by_symbol)
+
+    def last(self, n, symbol=None):
+        with self._lock:
+            index = self._index(symbol)
+            return index.last(n) if index else []
+
+    def since(self, t, symbol=None):
+        if hasattr(t, 'timestamp'):
+            t = t.timestamp()
+        with self._lock:
+            index = self._index(symbol)
+            return index.since(t) if index else []
+
+    def _index(self, symbol):
+        if symbol is None:
+            return self._all
+        return self._by_symbol.get(symbol)
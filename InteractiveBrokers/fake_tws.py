@@ -0,0 +1,229 @@
+import socket
+import struct
+import threading
+import time
+
+
+# Speaks just enough of the TWS socket protocol for IBApiClient to connect,
+# subscribe, place orders and receive ticks, fills and news bulletins. The
+# server always negotiates version 111, the oldest one that accepts orders
+# from the ibapi client (cash quantity support), so every message below
+# uses the long-standing field layouts.
+SERVER_VERSION = 111
+
+# Incoming message ids (client -> server)
+REQ_MKT_DATA = 1
+CANCEL_MKT_DATA = 2
+PLACE_ORDER = 3
+CANCEL_ORDER = 4
+REQ_EXECUTIONS = 7
+REQ_NEWS_BULLETINS = 12
+REQ_HISTORICAL_DATA = 20
+REQ_REAL_TIME_BARS = 50
+REQ_POSITIONS = 61
+REQ_ACCOUNT_SUMMARY = 62
+START_API = 71
+
+# Outgoing message ids (server -> client)
+TICK_PRICE = 1
+TICK_SIZE = 2
+ORDER_STATUS = 3
+ERR_MSG = 4
+NEXT_VALID_ID = 9
+EXECUTION_DATA = 11
+NEWS_BULLETINS = 14
+MANAGED_ACCTS = 15
+EXECUTION_DATA_END = 55
+POSITION_DATA = 61
+POSITION_END = 62
+ACCOUNT_SUMMARY = 63
+ACCOUNT_SUMMARY_END = 64
+
+ACCOUNT = "DU0000000"
+
+
+def encode(*fields):
+    payload = "".join(f"{f}\0" for f in fields).encode()
+    return struct.pack("!I", len(payload)) + payload
+
+
+class FakeTWS:
+    # Local TWS/Gateway stand-in for benchmarks. One client connection at a
+    # time; scripted streams are sent from the caller's thread. sent_at maps
+    # a stream sequence number to its perf_counter() send time so consumers
+    # can compute wire-to-handler latency.
+
+    def __init__(self, host="127.0.0.1", port=0, fill_orders=True):
+        self.host = host
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind((host, port))
+        self._listener.listen(1)
+        self.port = self._listener.getsockname()[1]
+        self.fill_orders = fill_orders
+        self._conn = None
+        self._send_lock = threading.Lock()
+        self.connected = threading.Event()
+        self.api_started = threading.Event()
+        self.subscriptions = {}
+        self.subscribed = threading.Condition()
+        self.next_order_id = 1
+        self.next_exec_id = 1
+        self.orders = {}
+        self.sent_at = {}
+        self.messages_in = 0
+        self.messages_out = 0
+        self._running = True
+
+    def start(self):
+        threading.Thread(target=self._serve, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._running = False
+        try:
+            self._listener.close()
+        finally:
+            if self._conn is not None:
+                self._conn.close()
+
+    def _serve(self):
+        try:
+            conn, _ = self._listener.accept()
+        except OSError:
+            return
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._conn = conn
+        buf = b""
+        # Handshake: "API\0" + length-prefixed "v<min>..<max>"
+        while len(buf) < 8 or len(buf) < 8 + struct.unpack("!I", buf[4:8])[0]:
+            chunk = conn.recv(4096)
+            if not chunk:
+                return
+            buf += chunk
+        size = struct.unpack("!I", buf[4:8])[0]
+        buf = buf[8 + size:]
+        self._send(encode(SERVER_VERSION, time.strftime("%Y%m%d %H:%M:%S EST")))
+        self.connected.set()
+        while self._running:
+            while len(buf) >= 4:
+                size = struct.unpack("!I", buf[:4])[0]
+                if len(buf) < 4 + size:
+                    break
+                fields = buf[4:4 + size].split(b"\0")[:-1]
+                buf = buf[4 + size:]
+                self.messages_in += 1
+                self._handle([f.decode() for f in fields])
+            try:
+                chunk = conn.recv(65536)
+            except OSError:
+                return
+            if not chunk:
+                return
+            buf += chunk
+
+    def _send(self, data):
+        with self._send_lock:
+            self._conn.sendall(data)
+            self.messages_out += 1
+
+    def _handle(self, fields):
+        msg_id = int(fields[0])
+        if msg_id == START_API:
+            self._send(encode(NEXT_VALID_ID, 1, self.next_order_id))
+            self._send(encode(MANAGED_ACCTS, 1, ACCOUNT))
+            self.api_started.set()
+        elif msg_id == REQ_MKT_DATA:
+            # msgId, version, reqId, conId, symbol, ...
+            with self.subscribed:
+                self.subscriptions[fields[4]] = int(fields[2])
+                self.subscribed.notify_all()
+        elif msg_id == CANCEL_MKT_DATA:
+            req_id = int(fields[2])
+            for symbol, r in list(self.subscriptions.items()):
+                if r == req_id:
+                    del self.subscriptions[symbol]
+        elif msg_id == PLACE_ORDER:
+            # msgId, version, orderId, conId, symbol, secType, expiry, strike,
+            # right, multiplier, exchange, primaryExch, currency, localSymbol,
+            # tradingClass, secIdType, secId, action, totalQuantity, ...
+            order_id = int(fields[2])
+            symbol, action, qty = fields[4], fields[17], float(fields[18])
+            self.orders[order_id] = (symbol, action, qty)
+            self.send_order_status(order_id, "Submitted", 0, qty)
+            if self.fill_orders:
+                self.send_execution(symbol, action, qty, 100.0, order_id=order_id)
+                self.send_order_status(order_id, "Filled", qty, 0, avg_price=100.0)
+        elif msg_id == CANCEL_ORDER:
+            order_id = int(fields[2])
+            if order_id in self.orders:
+                self.send_order_status(order_id, "Cancelled", 0, self.orders[order_id][2])
+        elif msg_id == REQ_EXECUTIONS:
+            self._send(encode(EXECUTION_DATA_END, 1, fields[2]))
+        elif msg_id == REQ_POSITIONS:
+            self._send(encode(POSITION_END, 1))
+        elif msg_id == REQ_ACCOUNT_SUMMARY:
+            req_id = fields[2]
+            self._send(encode(ACCOUNT_SUMMARY, 1, req_id, ACCOUNT, "NetLiquidation", "1000000.00", "USD"))
+            self._send(encode(ACCOUNT_SUMMARY_END, 1, req_id))
+        elif msg_id in (REQ_HISTORICAL_DATA, REQ_REAL_TIME_BARS):
+            self._send(encode(ERR_MSG, 2, fields[2], 162, "Historical Market Data Service error message:HMDS query returned no data"))
+
+    def wait_for_subscription(self, symbol, timeout=10):
+        with self.subscribed:
+            self.subscribed.wait_for(lambda: symbol in self.subscriptions, timeout)
+        return self.subscriptions.get(symbol)
+
+    # ---- scripted streams ----
+
+    def send_tick(self, req_id, tick_type, price, size=100):
+        self._send(encode(TICK_PRICE, 6, req_id, tick_type, repr(float(price)), size, 0))
+
+    def send_order_status(self, order_id, status, filled, remaining, avg_price=0.0):
+        self._send(encode(ORDER_STATUS, 6, order_id, status, int(filled), int(remaining),
+                          avg_price, order_id + 1000, 0, avg_price, 0, ""))
+
+    def send_execution(self, symbol, side, qty, price, order_id=0, exec_id=None, req_id=-1):
+        if exec_id is None:
+            exec_id = f"0000e1a7.{self.next_exec_id:08d}.01.01"
+            self.next_exec_id += 1
+        side = "BOT" if side.upper() in ("BUY", "BOT") else "SLD"
+        self._send(encode(EXECUTION_DATA, 10, req_id, order_id,
+                          0, symbol, "STK", "", 0.0, "", "", "SMART", "USD", symbol, symbol,
+                          exec_id, time.strftime("%Y%m%d  %H:%M:%S"), ACCOUNT, "SMART", side,
+                          int(qty), price, order_id + 1000, 0, 0, int(qty), price, "", "", "", ""))
+
+    def send_position(self, symbol, position, avg_cost):
+        self._send(encode(POSITION_DATA, 3, ACCOUNT, 0, symbol, "STK", "", 0.0, "", "",
+                          "SMART", "USD", symbol, symbol, int(position), avg_cost))
+
+    def send_news(self, msg_id, message, exchange="NASDAQ"):
+        self._send(encode(NEWS_BULLETINS, 1, msg_id, 1, message, exchange))
+
+    def stream(self, count, rate, send_one):
+        # Calls send_one(seq) count times at `rate` messages per second
+        # (rate=None sends as fast as possible) and records send times.
+        start = time.perf_counter()
+        for seq in range(count):
+            if rate:
+                target = start + seq / rate
+                delay = target - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            self.sent_at[seq] = time.perf_counter()
+            send_one(seq)
+        return time.perf_counter() - start
+
+    def stream_ticks(self, req_id, count, rate=None, base_price=100.0):
+        # The price encodes the sequence number: base + seq / 100
+        return self.stream(count, rate,
+                           lambda seq: self.send_tick(req_id, 4, base_price + seq / 100.0))
+
+    def stream_executions(self, symbol, count, rate=None):
+        return self.stream(count, rate,
+                           lambda seq: self.send_execution(symbol, "BUY", 1, 100.0,
+                                                           exec_id=f"bench.{seq:08d}"))
+
+    def stream_news(self, count, rate=None, symbols=("AAPL",)):
+        return self.stream(count, rate,
+                           lambda seq: self.send_news(seq, f"Bench [{symbols[seq % len(symbols)]}] headline {seq}"))
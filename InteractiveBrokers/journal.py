@@ -0,0 +1,275 @@
+import datetime
+import glob
+import mmap
+import os
+import struct
+import threading
+import time
+
+from ibapi.contract import Contract
+from ibapi.execution import Execution
+
+
+DEFAULT_JOURNAL_DIR = os.path.join(os.path.expanduser("~"), ".ib_dashboard", "journal")
+
+MAGIC = b"IBJ1"
+# time, kind, tick type, reqId, orderId, permId, four numbers, symbol and two
+# text fields: 160 bytes, so record i sits at (i + 1) * 160. The second text
+# field holds an execution's side|exchange|time, and IB's time can carry a
+# timezone name ("20240102 10:00:00 US/Eastern").
+VERSION = 2
+SYMBOL_BYTES = 12
+TEXT_BYTES = 28
+TEXT2_BYTES = 60
+RECORD = struct.Struct(f"<dBBxxiiqdddd{SYMBOL_BYTES}s{TEXT_BYTES}s{TEXT2_BYTES}s")
+RECORD_SIZE = RECORD.size
+# Version 1 files, with a 28 byte second text field, can still be read
+LAYOUTS = {1: struct.Struct("<dBBxxiiqdddd12s28s28s"), VERSION: RECORD}
+HEADER = struct.Struct("<4sHH")
+# Files grow by this many records at a time
+CHUNK_RECORDS = 65536
+
+TICK_PRICE = 1
+TICK_SIZE = 2
+EXECUTION = 3
+POSITION = 4
+ACCOUNT_SUMMARY = 5
+
+
+def _text(value, size):
+    # A field that does not fit is an error, not something to cut short;
+    # Journal drops the record and counts it
+    text = str(value).encode('utf-8', 'replace')
+    if len(text) > size:
+        raise ValueError(f"{value!r} does not fit a {size} byte journal field")
+    return text
+
+
+def _next_midnight(ts):
+    day = datetime.date.fromtimestamp(ts) + datetime.timedelta(days=1)
+    return datetime.datetime(day.year, day.month, day.day).timestamp()
+
+
+class Journal:
+    # Append-only journal of everything IBApiClient receives, one file per
+    # day (journal-YYYYMMDD.bin). Events are packed into fixed 160 byte
+    # records straight into a memory map, so an append is a struct.pack_into
+    # and no system call; the kernel writes the pages back on its own. The
+    # file grows CHUNK_RECORDS at a time and is trimmed to its records on
+    # rotation and close. Reopening today's file appends after what is there;
+    # one written with another record layout is moved aside first. The
+    # journal is called from the IB reader thread, so it never raises: a
+    # record that cannot be written is counted in dropped and skipped.
+
+    def __init__(self, root=DEFAULT_JOURNAL_DIR, chunk_records=CHUNK_RECORDS):
+        self.root = root
+        self.chunk_records = chunk_records
+        self._lock = threading.Lock()
+        self._file = None
+        self._map = None
+        self._capacity = 0
+        self._count = 0
+        self._rotate_at = 0.0
+        self.path = None
+        self.written = 0
+        self.dropped = 0
+        self.last_error = None
+        os.makedirs(root, exist_ok=True)
+
+    def _open(self, ts):
+        self._close_file()
+        day = datetime.date.fromtimestamp(ts)
+        self.path = os.path.join(self.root, f"journal-{day:%Y%m%d}.bin")
+        self._move_other_layout(self.path)
+        self._file = open(self.path, 'a+b')
+        size = os.fstat(self._file.fileno()).st_size
+        records = max(0, size // RECORD_SIZE - 1)
+        self._map_capacity(records + self.chunk_records)
+        HEADER.pack_into(self._map, 0, MAGIC, RECORD_SIZE, VERSION)
+        self._count = self._find_end(records)
+        self._rotate_at = _next_midnight(ts)
+
+    @staticmethod
+    def _move_other_layout(path):
+        # journal-YYYYMMDD-N.bin sorts before journal-YYYYMMDD.bin, so the
+        # day still replays in order
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(HEADER.size)
+        except FileNotFoundError:
+            return
+        if len(header) < HEADER.size or HEADER.unpack(header)[1:] == (RECORD_SIZE, VERSION):
+            return
+        n = 0
+        while os.path.exists(f"{path[:-4]}-{n}.bin"):
+            n += 1
+        os.replace(path, f"{path[:-4]}-{n}.bin")
+
+    def _map_capacity(self, records):
+        if self._map is not None:
+            self._map.close()
+        self._file.truncate((records + 1) * RECORD_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), (records + 1) * RECORD_SIZE)
+        self._capacity = records
+
+    def _find_end(self, records):
+        # A file left by a crash still has its preallocated zero tail;
+        # records are contiguous, so binary search for the first empty one
+        lo, hi = 0, records
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._map[(mid + 1) * RECORD_SIZE + 8]:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _close_file(self):
+        if self._file is None:
+            return
+        self._map.flush()
+        self._map.close()
+        self._map = None
+        self._file.truncate((self._count + 1) * RECORD_SIZE)
+        self._file.close()
+        self._file = None
+
+    def _append(self, kind, tick_type=0, req_id=0, order_id=0, perm_id=0,
+                v1=0.0, v2=0.0, v3=0.0, v4=0.0, symbol="", text="", text2=""):
+        ts = time.time()
+        with self._lock:
+            try:
+                if ts >= self._rotate_at:
+                    self._open(ts)
+                if self._count == self._capacity:
+                    self._map_capacity(self._capacity + self.chunk_records)
+                RECORD.pack_into(self._map, (self._count + 1) * RECORD_SIZE, ts, kind, tick_type, req_id,
+                                 order_id, perm_id, float(v1), float(v2), float(v3), float(v4),
+                                 _text(symbol, SYMBOL_BYTES), _text(text, TEXT_BYTES), _text(text2, TEXT2_BYTES))
+            except Exception as e:
+                if not self.dropped:
+                    print(f"Journal: dropping records that cannot be written ({type(e).__name__}: {e})")
+                self.dropped += 1
+                self.last_error = e
+                return
+            self._count += 1
+            self.written += 1
+
+    def tick_price(self, reqId, tickType, price, symbol=None):
+        self._append(TICK_PRICE, tickType, reqId, v1=price, symbol=symbol or "")
+
+    def tick_size(self, reqId, tickType, size, symbol=None):
+        self._append(TICK_SIZE, tickType, reqId, v1=size, symbol=symbol or "")
+
+    def execution(self, reqId, contract, execution):
+        self._append(EXECUTION, 0, reqId, execution.orderId, execution.permId,
+                     execution.shares, execution.price, execution.cumQty, execution.avgPrice,
+                     contract.symbol, execution.execId, f"{execution.side}|{execution.exchange}|{execution.time}")
+
+    def position(self, account, contract, position, avgCost):
+        self._append(POSITION, v1=position, v2=avgCost, symbol=contract.symbol, text=account)
+
+    def account_summary(self, reqId, account, tag, value, currency):
+        self._append(ACCOUNT_SUMMARY, 0, reqId, symbol=account, text=tag, text2=f"{value}|{currency}")
+
+    def flush(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.flush()
+
+    def close(self):
+        with self._lock:
+            self._close_file()
+            self._rotate_at = 0.0
+
+
+def read_journal(path):
+    # (time, kind, tick_type, reqId, orderId, permId, v1, v2, v3, v4,
+    #  symbol, text, text2) for every record, oldest first
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < HEADER.size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            magic, record_size, version = HEADER.unpack_from(data, 0)
+            layout = LAYOUTS.get(version)
+            if magic != MAGIC or layout is None or record_size != layout.size:
+                raise ValueError(f"{path} is not a journal file")
+            for offset in range(record_size, len(data) - record_size + 1, record_size):
+                record = layout.unpack_from(data, offset)
+                if record[1] == 0:
+                    # Preallocated space after the last record of a live file
+                    return
+                yield record[:10] + tuple(field.rstrip(b"\0").decode('utf-8', 'replace')
+                                          for field in record[10:])
+
+
+def journal_files(root=DEFAULT_JOURNAL_DIR):
+    return sorted(glob.glob(os.path.join(root, "journal-*.bin")))
+
+
+class JournalReplayer:
+    # Feeds journal records back through an IBApiClient's wrapper methods,
+    # so its state and gui_callback see the session as it happened. speed
+    # is a multiple of real time; None replays as fast as possible.
+
+    def __init__(self, paths, speed=1.0):
+        self.paths = [paths] if isinstance(paths, str) else list(paths)
+        self.speed = speed
+        self.replayed = 0
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def start(self, wrapper):
+        thread = threading.Thread(target=self.replay, args=(wrapper,), daemon=True)
+        thread.start()
+        return thread
+
+    def replay(self, wrapper):
+        first = None
+        started = time.monotonic()
+        for path in self.paths:
+            for record in read_journal(path):
+                if self._stop.is_set():
+                    return self.replayed
+                if self.speed:
+                    if first is None:
+                        first = record[0]
+                    delay = (record[0] - first) / self.speed - (time.monotonic() - started)
+                    if delay > 0 and self._stop.wait(delay):
+                        return self.replayed
+                self.dispatch(wrapper, record)
+                self.replayed += 1
+        return self.replayed
+
+    def dispatch(self, wrapper, record):
+        ts, kind, tick_type, req_id, order_id, perm_id, v1, v2, v3, v4, symbol, text, text2 = record
+        if kind in (TICK_PRICE, TICK_SIZE):
+            subscriptions = getattr(wrapper, 'subscriptions', None)
+            if symbol and subscriptions is not None and subscriptions.symbol_for(req_id) is None:
+                subscriptions.add(symbol, req_id, wrapper.make_stock_contract(symbol))
+            if kind == TICK_PRICE:
+                wrapper.tickPrice(req_id, tick_type, v1, None)
+            else:
+                wrapper.tickSize(req_id, tick_type, v1)
+        elif kind == EXECUTION:
+            contract = Contract()
+            contract.symbol = symbol
+            execution = Execution()
+            execution.orderId = order_id
+            execution.permId = perm_id
+            execution.shares = v1
+            execution.price = v2
+            execution.cumQty = v3
+            execution.avgPrice = v4
+            execution.execId = text
+            execution.side, execution.exchange, execution.time = (text2.split("|", 2) + ["", ""])[:3]
+            wrapper.execDetails(req_id, contract, execution)
+        elif kind == POSITION:
+            contract = Contract()
+            contract.symbol = symbol
+            wrapper.position(text, contract, v1, v2)
+        elif kind == ACCOUNT_SUMMARY:
+            value, _, currency = text2.partition("|")
+            wrapper.accountSummary(req_id, symbol, text, value, currency)
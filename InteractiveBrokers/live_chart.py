@@ -0,0 +1,198 @@
+import datetime
+import time
+from collections import deque
+
+import matplotlib.dates as mdates
+from matplotlib.lines import Line2D
+from matplotlib.patches import Rectangle
+from mplfinance.original_flavor import candlestick_ohlc
+
+
+def epoch_to_num(ts):
+    return mdates.date2num(datetime.datetime.fromtimestamp(ts))
+
+
+class LiveCandleChart:
+    # Keeps the candle artists on an axes and moves only the newest one.
+    # The forming candle is an animated artist, so full draws leave it out of
+    # the cached background and each update is restore + draw_artist + blit.
+    # Finished candles are stamped into the background once, which keeps the
+    # per-update cost independent of how many bars are on screen.
+
+    def __init__(self, ax, canvas, colorup='g', colordown='r', width_frac=0.7,
+                 headroom_bars=10, max_bars=500):
+        self.ax = ax
+        self.canvas = canvas
+        self.colorup = colorup
+        self.colordown = colordown
+        self.width_frac = width_frac
+        self.headroom_bars = headroom_bars
+        self.max_bars = max_bars
+        self.bar_seconds = 60
+        self._bars = []
+        self._live = None
+        self._background = None
+        self.frame_times = deque(maxlen=1000)
+        self.full_draw_times = deque(maxlen=100)
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+    @property
+    def width(self):
+        return self.width_frac * self.bar_seconds / 86400.0
+
+    def set_bars(self, bars, bar_seconds):
+        # bars: sequence of (epoch seconds, open, high, low, close). Draws all
+        # but the last with candlestick_ohlc; the caller does the full draw.
+        self.bar_seconds = bar_seconds
+        self._bars = [list(bar) for bar in bars[-self.max_bars:]]
+        self._live = None
+        self._background = None
+        if not self._bars:
+            return
+        ohlc = [(epoch_to_num(t), o, h, l, c) for t, o, h, l, c in self._bars[:-1]]
+        candlestick_ohlc(self.ax, ohlc, width=self.width,
+                         colorup=self.colorup, colordown=self.colordown)
+        self._live = self._make_candle(*self._bars[-1])
+        self._fit_limits()
+
+    def draw(self):
+        start = time.perf_counter()
+        self.canvas.draw()
+        self.full_draw_times.append(time.perf_counter() - start)
+
+    def update_price(self, ts, price):
+        if not self._bars:
+            return
+        last = self._bars[-1]
+        if ts < last[0] + self.bar_seconds:
+            last[2] = max(last[2], price)
+            last[3] = min(last[3], price)
+            last[4] = price
+            self._refresh_live()
+        else:
+            start = last[0] + (ts - last[0]) // self.bar_seconds * self.bar_seconds
+            self.append_bar(start, price, price, price, price)
+
+    def update_bar(self, ts, open_p, high_p, low_p, close_p):
+        if self._bars and ts == self._bars[-1][0]:
+            self._bars[-1][1:] = [open_p, high_p, low_p, close_p]
+            self._refresh_live()
+        elif not self._bars or ts > self._bars[-1][0]:
+            self.append_bar(ts, open_p, high_p, low_p, close_p)
+
+    def append_bar(self, ts, open_p, high_p, low_p, close_p):
+        if not self._bars:
+            return
+        start = time.perf_counter()
+        finished = self._live
+        for artist in finished:
+            artist.set_animated(False)
+        self._bars.append([ts, open_p, high_p, low_p, close_p])
+        self._live = self._make_candle(*self._bars[-1])
+        if len(self._bars) > self.max_bars or self._needs_relimit():
+            self._full_draw()
+            return
+        if self._background is None:
+            self.canvas.draw_idle()
+            return
+        # Stamp the finished candle into the cached background
+        self.canvas.restore_region(self._background)
+        for artist in finished:
+            self.ax.draw_artist(artist)
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._blit_live()
+        self.frame_times.append(time.perf_counter() - start)
+
+    def frame_stats(self):
+        return {
+            'frames': len(self.frame_times),
+            'frame_ms': _summary(self.frame_times),
+            'full_draws': len(self.full_draw_times),
+            'full_draw_ms': _summary(self.full_draw_times),
+        }
+
+    def _make_candle(self, t, open_p, high_p, low_p, close_p):
+        # Same geometry as mplfinance's candlestick_ohlc
+        x = epoch_to_num(t)
+        wick = Line2D(xdata=(x, x), ydata=(low_p, high_p), linewidth=0.5, antialiased=True)
+        body = Rectangle(xy=(x - self.width / 2, 0), width=self.width, height=0)
+        wick.set_animated(True)
+        body.set_animated(True)
+        self.ax.add_line(wick)
+        self.ax.add_patch(body)
+        self._style_candle(wick, body, open_p, high_p, low_p, close_p)
+        return wick, body
+
+    def _style_candle(self, wick, body, open_p, high_p, low_p, close_p):
+        color = self.colorup if close_p >= open_p else self.colordown
+        wick.set_ydata((low_p, high_p))
+        wick.set_color(color)
+        body.set_y(min(open_p, close_p))
+        body.set_height(abs(close_p - open_p))
+        body.set_facecolor(color)
+        body.set_edgecolor(color)
+
+    def _refresh_live(self):
+        start = time.perf_counter()
+        self._style_candle(*self._live, *self._bars[-1][1:])
+        if self._needs_relimit():
+            self._full_draw()
+            return
+        if self._background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self._background)
+        self._blit_live()
+        self.frame_times.append(time.perf_counter() - start)
+
+    def _blit_live(self):
+        for artist in self._live:
+            self.ax.draw_artist(artist)
+        self.canvas.blit(self.ax.bbox)
+
+    def _needs_relimit(self):
+        t, _, high_p, low_p, _ = self._bars[-1]
+        y_lo, y_hi = self.ax.get_ylim()
+        x_right = self.ax.get_xlim()[1]
+        return high_p > y_hi or low_p < y_lo or epoch_to_num(t) + self.width > x_right
+
+    def _fit_limits(self):
+        lows = [bar[3] for bar in self._bars]
+        highs = [bar[2] for bar in self._bars]
+        pad = max((max(highs) - min(lows)) * 0.1, 0.01)
+        self.ax.set_ylim(min(lows) - pad, max(highs) + pad)
+        bar_days = self.bar_seconds / 86400.0
+        left = epoch_to_num(self._bars[0][0]) - bar_days
+        right = epoch_to_num(self._bars[-1][0]) + self.headroom_bars * bar_days
+        self.ax.set_xlim(left, right)
+
+    def _full_draw(self):
+        # Only when the live candle leaves the axes limits or too many bars
+        # piled up: rebuild the static candles and redraw everything once
+        bars = self._bars
+        if len(bars) > self.max_bars:
+            # Trim a little extra so the next trim is headroom_bars away
+            bars = bars[-(self.max_bars - self.headroom_bars):]
+        for artist in list(self.ax.lines) + list(self.ax.patches):
+            artist.remove()
+        self.set_bars(bars, self.bar_seconds)
+        self.draw()
+
+    def _on_draw(self, event):
+        # Any full draw (including resizes) refreshes the cached background
+        self._background = self.canvas.copy_from_bbox(self.ax.bbox)
+        if self._live is not None:
+            self._blit_live()
+
+
+def _summary(samples):
+    if not samples:
+        return {'mean': 0.0, 'p50': 0.0, 'p99': 0.0, 'max': 0.0}
+    ordered = sorted(samples)
+    n = len(ordered)
+    return {
+        'mean': sum(ordered) / n * 1000,
+        'p50': ordered[n // 2] * 1000,
+        'p99': ordered[min(n - 1, int(n * 0.99))] * 1000,
+        'max': ordered[-1] * 1000,
+    }
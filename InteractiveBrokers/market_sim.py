@@ -0,0 +1,444 @@
+import datetime
+import math
+import threading
+import time
+import zlib
+from collections import deque
+
+from ibapi.common import BarData
+from ibapi.execution import Execution
+from ibapi.order_state import OrderState
+
+from pacing import IB_HISTORY_WINDOW, IB_MAX_MSG_RATE
+from request_scheduler import RequestScheduler
+
+
+# The simulated market moves in 100 ms steps
+STEPS_PER_SECOND = 10
+# Independent price levels every 2**20 steps (~29 hours); everything in
+# between is filled in by midpoint displacement, so the price at any step
+# can be computed without walking the path up to it
+ANCHOR_STEPS = 1 << 20
+ANCHOR_VOL = 0.08
+DAILY_VOL = 0.02
+TRADES_PER_SECOND = 2.0
+REAL_TIME_BAR_STEPS = 5 * STEPS_PER_SECOND
+MAX_HISTORY_BARS = 10000
+DEFAULT_SIM_CASH = 1000000.0
+SIM_ACCOUNT = "SIM"
+
+_SIZE_UNITS = {'sec': 1, 'min': 60, 'hour': 3600, 'day': 86400, 'week': 7 * 86400, 'month': 30 * 86400}
+_DURATION_UNITS = {'S': 1, 'D': 86400, 'W': 7 * 86400, 'M': 30 * 86400, 'Y': 365 * 86400}
+
+
+_MASK = (1 << 64) - 1
+# Salts for the independent random streams of a symbol
+_BASE, _ANCHOR, _STEP, _TRADE, _VOLUME = range(5)
+
+
+def _mix(x):
+    # splitmix64 finalizer: a cheap, well-spread, stable integer hash
+    x = (x + 0x9E3779B97F4A7C15) & _MASK
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK
+    return x ^ (x >> 31)
+
+
+def _uniforms(key, n, salt):
+    a = _mix(key ^ _mix(n * 8 + salt))
+    b = _mix(a)
+    return (a + 1) / 18446744073709551617.0, b / 18446744073709551616.0
+
+
+def _gauss(key, n, salt):
+    u1, u2 = _uniforms(key, n, salt)
+    return math.sqrt(-2.0 * math.log(u1)) * math.cos(2.0 * math.pi * u2)
+
+
+def bar_size_seconds(bar_size):
+    # IB barSizeSetting ("5 secs", "1 min", "4 hours", ...) in seconds
+    count, unit = bar_size.split()
+    return int(count) * _SIZE_UNITS[unit.rstrip('s')]
+
+
+def duration_seconds(duration):
+    count, unit = duration.split()
+    return int(count) * _DURATION_UNITS[unit]
+
+
+class MarketModel:
+    # Seeded, deterministic quote paths. The price of a symbol at a given
+    # time depends only on (seed, symbol, time), so live ticks, history bars
+    # and repeated runs all agree, at any simulation speed.
+
+    def __init__(self, seed=0, daily_vol=DAILY_VOL, trades_per_second=TRADES_PER_SECOND):
+        self.seed = seed
+        self._step_sd = daily_vol / math.sqrt(86400 * STEPS_PER_SECOND)
+        self._trade_p = trades_per_second / STEPS_PER_SECOND
+        self._levels = {}
+        self._keys = {}
+        self._base = {}
+
+    def _key(self, symbol):
+        # Stable per-symbol hash key (str hashes change between runs)
+        key = self._keys.get(symbol)
+        if key is None:
+            key = self._keys[symbol] = _mix(_mix(self.seed & _MASK) ^ zlib.crc32(symbol.encode()))
+        return key
+
+    def _log_base(self, symbol):
+        base = self._base.get(symbol)
+        if base is None:
+            u, _ = _uniforms(self._key(symbol), 0, _BASE)
+            base = self._base[symbol] = math.log(20.0 + 480.0 * u)
+        return base
+
+    def _level(self, symbol, n):
+        key = (symbol, n)
+        level = self._levels.get(key)
+        if level is not None:
+            return level
+        if n % ANCHOR_STEPS == 0:
+            level = self._log_base(symbol) + ANCHOR_VOL * _gauss(self._key(symbol), n, _ANCHOR)
+        else:
+            # Brownian bridge midpoint between the two coarser neighbours
+            h = n & -n
+            level = ((self._level(symbol, n - h) + self._level(symbol, n + h)) / 2
+                     + self._step_sd * math.sqrt(h / 2) * _gauss(self._key(symbol), n, _STEP))
+        if len(self._levels) > 500000:
+            self._levels.clear()
+        self._levels[key] = level
+        return level
+
+    def mid_at(self, symbol, n):
+        return math.exp(self._level(symbol, n))
+
+    def quote_at(self, symbol, n):
+        mid = self.mid_at(symbol, n)
+        spread = max(0.01, round(mid * 0.0002, 2))
+        bid = math.floor((mid - spread / 2) * 100) / 100
+        return bid, round(bid + spread, 2)
+
+    def quote(self, symbol, t):
+        return self.quote_at(symbol, int(t * STEPS_PER_SECOND))
+
+    def trade_at(self, symbol, n):
+        # (price, size) if something printed during step n, else None
+        u, v = _uniforms(self._key(symbol), n, _TRADE)
+        if u >= self._trade_p:
+            return None
+        bid, ask = self.quote_at(symbol, n)
+        return (ask if v < 0.5 else bid), 100 * (1 + int(v * 10) % 5)
+
+    def bars(self, symbol, bar_seconds, start=None, end=None, count=None):
+        # (time, open, high, low, close, volume) for bars starting in
+        # [start, end), sampled from the same path as the live quotes
+        end = time.time() if end is None else end
+        if start is None:
+            start = end - bar_seconds * (count or 100)
+        first = int(math.ceil(start / bar_seconds))
+        last = int(math.ceil(end / bar_seconds))
+        first = max(first, last - MAX_HISTORY_BARS)
+        steps = bar_seconds * STEPS_PER_SECOND
+        out = []
+        for i in range(first, last):
+            n0 = i * steps
+            samples = [self.mid_at(symbol, n0 + steps * k // 8) for k in range(8)]
+            samples.append(self.mid_at(symbol, n0 + steps - 1))
+            u, _ = _uniforms(self._key(symbol), n0, _VOLUME)
+            volume = int(self._trade_p * steps * 300 * (0.5 + u))
+            out.append((i * bar_seconds, round(samples[0], 2), round(max(samples), 2),
+                        round(min(samples), 2), round(samples[-1], 2), volume))
+        return out
+
+
+class SimulatedConnection:
+    # Mixed in ahead of IBApiClient, it replaces the TWS socket with a
+    # MarketModel: requests are answered, quotes ticked, real-time bars built
+    # and orders filled against the simulated quotes, all through the normal
+    # wrapper callbacks on the run() thread. `speed` multiplies the clock
+    # (1 to 1000 and beyond); pacing limits are scaled with it. When the
+    # host cannot keep up the simulation falls behind rather than skipping
+    # steps, and sim_stats() reports the speed actually achieved.
+
+    def __init__(self, gui_callback, seed=0, speed=1.0, journal=None, cash=DEFAULT_SIM_CASH):
+        super().__init__(gui_callback, journal)
+        self.scheduler.stop()
+        self.scheduler = RequestScheduler(msg_rate=IB_MAX_MSG_RATE * speed,
+                                          history_window=IB_HISTORY_WINDOW / speed)
+        self.model = MarketModel(seed)
+        self.speed = float(speed)
+        self.cash = cash
+        self._inbox = deque()
+        self._wake = threading.Event()
+        self._running = False
+        self._step = 0
+        self._started = None
+        self._md = {}           # reqId -> symbol
+        self._shown = {}        # reqId -> (bid, ask) last sent
+        self._rt_bars = {}      # reqId -> [symbol, bucket, open, high, low, close, volume, count]
+        self._working = {}      # orderId -> [contract, order, permId]
+        self._holdings = {}     # symbol -> [position, avg_cost]
+        self._fills = []
+        self._exec_ids = 0
+        self.ticks = 0
+        self.orders_received = 0
+        self.fills = 0
+
+    # --- EClient replacements -------------------------------------------
+
+    def connect(self, host=None, port=None, clientId=0):
+        now = time.time()
+        self._step = int(now * STEPS_PER_SECOND)
+        self._started = (time.monotonic(), self._step)
+        self._running = True
+        self._post(self.nextValidId, 1)
+
+    def isConnected(self):
+        return self._running
+
+    def disconnect(self):
+        self._running = False
+        self._wake.set()
+        self.scheduler.stop()
+
+    def reqMktData(self, reqId, contract, genericTickList, snapshot, regulatorySnapshot, mktDataOptions):
+        self._post(self._start_market_data, reqId, contract.symbol)
+
+    def cancelMktData(self, reqId):
+        self._post(self._stop_market_data, reqId)
+
+    def reqRealTimeBars(self, reqId, contract, barSize, whatToShow, useRTH, realTimeBarsOptions):
+        self._post(self._rt_bars.__setitem__, reqId, [contract.symbol, None, 0, 0, 0, 0, 0, 0])
+
+    def cancelRealTimeBars(self, reqId):
+        self._post(self._rt_bars.pop, reqId, None)
+
+    def reqHistoricalData(self, reqId, contract, endDateTime, durationStr, barSizeSetting, whatToShow,
+                          useRTH, formatDate, keepUpToDate, chartOptions):
+        self._post(self._send_history, reqId, contract.symbol, endDateTime, durationStr, barSizeSetting)
+
+    def placeOrder(self, orderId, contract, order):
+        self._post(self._accept_order, orderId, contract, order)
+
+    def cancelOrder(self, orderId, *args):
+        self._post(self._cancel_order, orderId)
+
+    def reqPositions(self):
+        self._post(self._send_positions)
+
+    def reqExecutions(self, reqId, execFilter):
+        self._post(self._send_executions, reqId)
+
+    def reqOpenOrders(self):
+        self._post(self._send_open_orders)
+
+    def reqAccountSummary(self, reqId, groupName, tags):
+        self._post(self._send_account_summary, reqId, tags)
+
+    def reqNewsBulletins(self, allMsgs):
+        pass
+
+    def run(self):
+        while self._running:
+            self._drain_inbox()
+            target = self._target_step()
+            # Bounded batches keep requests answered while catching up
+            for _ in range(min(target - self._step, 1000)):
+                self._step += 1
+                self._simulate(self._step)
+            if self._step >= target:
+                wall0, step0 = self._started
+                due = wall0 + (self._step + 1 - step0) / (STEPS_PER_SECOND * self.speed)
+                self._wake.wait(max(0.0, due - time.monotonic()))
+                self._wake.clear()
+
+    # --- simulation -----------------------------------------------------
+
+    def _post(self, fn, *args):
+        self._inbox.append((fn, args))
+        self._wake.set()
+
+    def _drain_inbox(self):
+        while self._inbox:
+            fn, args = self._inbox.popleft()
+            fn(*args)
+
+    def _target_step(self):
+        wall0, step0 = self._started
+        return step0 + int((time.monotonic() - wall0) * self.speed * STEPS_PER_SECOND)
+
+    def sim_time(self):
+        return self._step / STEPS_PER_SECOND
+
+    def _simulate(self, n):
+        model = self.model
+        for reqId, symbol in self._md.items():
+            quote = model.quote_at(symbol, n)
+            shown = self._shown.get(reqId)
+            if shown is None or quote[0] != shown[0]:
+                self.tickPrice(reqId, 1, quote[0], None)
+                self.ticks += 1
+            if shown is None or quote[1] != shown[1]:
+                self.tickPrice(reqId, 2, quote[1], None)
+                self.ticks += 1
+            self._shown[reqId] = quote
+            trade = model.trade_at(symbol, n)
+            if trade is not None:
+                self.tickPrice(reqId, 4, trade[0], None)
+                self.tickSize(reqId, 5, trade[1])
+                self.ticks += 2
+        if self._rt_bars:
+            self._update_bars(n)
+        if self._working:
+            for orderId in list(self._working):
+                self._try_fill(orderId, n)
+
+    def _start_market_data(self, reqId, symbol):
+        self._md[reqId] = symbol
+        n = self._step
+        # Prior close: the last quote before today's midnight
+        midnight = int(n / STEPS_PER_SECOND // 86400 * 86400 * STEPS_PER_SECOND)
+        self.tickPrice(reqId, 9, round(self.model.mid_at(symbol, midnight - 1), 2), None)
+        self.ticks += 1
+
+    def _stop_market_data(self, reqId):
+        self._md.pop(reqId, None)
+        self._shown.pop(reqId, None)
+
+    def _update_bars(self, n):
+        bucket = n - n % REAL_TIME_BAR_STEPS
+        for reqId, bar in self._rt_bars.items():
+            symbol = bar[0]
+            if bar[1] is not None and bucket != bar[1]:
+                _, start, open_, high, low, close, volume, count = bar
+                self.realtimeBar(reqId, start // STEPS_PER_SECOND, open_, high, low, close, volume, close, count)
+                bar[1] = None
+            trade = self.model.trade_at(symbol, n)
+            price = trade[0] if trade else round(self.model.mid_at(symbol, n), 2)
+            if bar[1] is None:
+                bar[1:] = [bucket, price, price, price, price, 0, 0]
+            else:
+                bar[3] = max(bar[3], price)
+                bar[4] = min(bar[4], price)
+                bar[5] = price
+            if trade:
+                bar[6] += trade[1]
+                bar[7] += 1
+
+    def _send_history(self, reqId, symbol, end, duration, bar_size):
+        if end:
+            end = datetime.datetime.strptime(end, "%Y%m%d-%H:%M:%S").replace(
+                tzinfo=datetime.timezone.utc).timestamp()
+        else:
+            end = self.sim_time()
+        bars = self.model.bars(symbol, bar_size_seconds(bar_size), end - duration_seconds(duration), end)
+        for t, open_, high, low, close, volume in bars:
+            bar = BarData()
+            bar.date = str(t)
+            bar.open, bar.high, bar.low, bar.close, bar.volume = open_, high, low, close, volume
+            self.historicalData(reqId, bar)
+        self.historicalDataEnd(reqId, "", "")
+
+    def _accept_order(self, orderId, contract, order):
+        working = self._working.get(orderId)
+        if working is not None:
+            # Same id again: a modification
+            working[1] = order
+            return
+        self.orders_received += 1
+        permId = 1000000 + orderId
+        self._working[orderId] = [contract, order, permId]
+        state = OrderState()
+        state.status = "Submitted"
+        self.openOrder(orderId, contract, order, state)
+        self.orderStatus(orderId, "Submitted", 0, float(order.totalQuantity), 0.0, permId, 0, 0.0, 0, "", 0.0)
+
+    def _cancel_order(self, orderId):
+        working = self._working.pop(orderId, None)
+        if working is not None:
+            _, order, permId = working
+            self.orderStatus(orderId, "Cancelled", 0, float(order.totalQuantity), 0.0, permId, 0, 0.0, 0, "", 0.0)
+
+    def _try_fill(self, orderId, n):
+        contract, order, permId = self._working[orderId]
+        bid, ask = self.model.quote_at(contract.symbol, n)
+        buy = order.action == "BUY"
+        price = ask if buy else bid
+        if order.orderType == "LMT" and (price > order.lmtPrice if buy else price < order.lmtPrice):
+            return
+        del self._working[orderId]
+        qty = float(order.totalQuantity)
+        signed = qty if buy else -qty
+        holding = self._holdings.setdefault(contract.symbol, [0.0, 0.0])
+        position, avg_cost = holding
+        if position == 0 or (position > 0) == (signed > 0):
+            holding[1] = (avg_cost * abs(position) + price * qty) / abs(position + signed)
+        elif abs(signed) > abs(position):
+            holding[1] = price
+        elif position + signed == 0:
+            holding[1] = 0.0
+        holding[0] = position + signed
+        self.cash -= signed * price
+
+        self._exec_ids += 1
+        execution = Execution()
+        execution.execId = f"sim.{self._exec_ids:08d}"
+        execution.time = datetime.datetime.fromtimestamp(n / STEPS_PER_SECOND).strftime("%Y%m%d %H:%M:%S")
+        execution.acctNumber = SIM_ACCOUNT
+        execution.exchange = "SIM"
+        execution.side = "BOT" if buy else "SLD"
+        execution.shares = qty
+        execution.price = price
+        execution.permId = permId
+        execution.orderId = orderId
+        execution.cumQty = qty
+        execution.avgPrice = price
+        self._fills.append((contract, execution))
+        self.fills += 1
+        self.execDetails(-1, contract, execution)
+        self.orderStatus(orderId, "Filled", qty, 0, price, permId, 0, price, 0, "", 0.0)
+        self.position(SIM_ACCOUNT, contract, holding[0], holding[1])
+
+    def _send_positions(self):
+        for symbol, (position, avg_cost) in self._holdings.items():
+            self.position(SIM_ACCOUNT, self.make_stock_contract(symbol), position, avg_cost)
+        self.positionEnd()
+
+    def _send_executions(self, reqId):
+        for contract, execution in self._fills:
+            self.execDetails(reqId, contract, execution)
+
+    def _send_open_orders(self):
+        for orderId, (contract, order, _) in self._working.items():
+            state = OrderState()
+            state.status = "Submitted"
+            self.openOrder(orderId, contract, order, state)
+
+    def _send_account_summary(self, reqId, tags):
+        value = sum(position * self.model.mid_at(symbol, self._step)
+                    for symbol, (position, _) in self._holdings.items())
+        values = {'NetLiquidation': self.cash + value, 'TotalCashValue': self.cash,
+                  'AvailableFunds': self.cash}
+        for tag in tags.split(","):
+            if tag in values:
+                self.accountSummary(reqId, SIM_ACCOUNT, tag, f"{values[tag]:.2f}", "USD")
+        self.accountSummaryEnd(reqId)
+
+    def sim_stats(self):
+        if self._started is None:
+            return {}
+        wall0, step0 = self._started
+        wall = max(time.monotonic() - wall0, 1e-9)
+        sim_seconds = (self._step - step0) / STEPS_PER_SECOND
+        return {
+            'speed': self.speed,
+            'achieved_speed': sim_seconds / wall,
+            'sim_seconds': sim_seconds,
+            'lag_s': (self._target_step() - self._step) / STEPS_PER_SECOND,
+            'ticks': self.ticks,
+            'ticks_per_s': self.ticks / wall,
+            'orders': self.orders_received,
+            'orders_per_s': self.orders_received / wall,
+            'fills': self.fills,
+        }
@@ -0,0 +1,125 @@
+import re
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+
+
+WORD = re.compile(r"[a-z0-9]+(?:[.&'-][a-z0-9]+)*")
+
+
+def terms(text):
+    return WORD.findall(text.lower())
+
+
+class NewsIndex:
+    # Inverted index over news items: headline words, symbols ($aapl) and
+    # sources (@nasdaq), each mapped to the sequence numbers of the items
+    # that contain it. It is bounded by the EventStore it follows: the store
+    # calls remove() for every item it evicts, and since eviction is FIFO
+    # that item is the oldest one in each of its posting lists, so removing
+    # it is a popleft per key. A sorted vocabulary gives prefix matches, so
+    # a half typed word already filters.
+
+    def __init__(self, store=None):
+        self._postings = {}
+        self._vocab = []
+        self._docs = {}
+        self._seq_of = {}
+        self._lock = threading.Lock()
+        self.last_seq = 0
+        if store is not None:
+            for item in store:
+                self.add(item)
+            store.on_evict.append(self.remove)
+
+    def __len__(self):
+        return len(self._docs)
+
+    @property
+    def first_seq(self):
+        # Items with a lower sequence number have been evicted
+        with self._lock:
+            return next(iter(self._docs), self.last_seq + 1)
+
+    @staticmethod
+    def keys(item):
+        keys = set(terms(item.get('headline', '')))
+        for symbol in item.get('symbols') or [item.get('symbol', '')]:
+            if symbol:
+                keys.add("$" + symbol.lower())
+        source = item.get('source', '')
+        if source:
+            keys.add("@" + source.lower())
+        return keys
+
+    def add(self, item):
+        keys = self.keys(item)
+        with self._lock:
+            self.last_seq += 1
+            seq = self.last_seq
+            self._docs[seq] = (item, keys)
+            self._seq_of[id(item)] = seq
+            for key in keys:
+                posting = self._postings.get(key)
+                if posting is None:
+                    posting = self._postings[key] = deque()
+                    insort(self._vocab, key)
+                posting.append(seq)
+            return seq
+
+    def remove(self, item):
+        with self._lock:
+            seq = self._seq_of.pop(id(item), None)
+            if seq is None:
+                return
+            _, keys = self._docs.pop(seq)
+            for key in keys:
+                posting = self._postings[key]
+                if posting[0] == seq:
+                    posting.popleft()
+                else:
+                    posting.remove(seq)
+                if not posting:
+                    del self._postings[key]
+                    del self._vocab[bisect_left(self._vocab, key)]
+
+    def _matching(self, prefix):
+        # Sequence numbers of every item with a key starting with prefix
+        vocab = self._vocab
+        postings = self._postings
+        keys = vocab[bisect_left(vocab, prefix):bisect_left(vocab, prefix + "\uffff")]
+        return set().union(*[postings[key] for key in keys])
+
+    def search(self, query="", symbol=None, after=0, limit=None):
+        # (seq, item) for items matching every word of query (as prefixes;
+        # $SYM and @source name fields) and exactly symbol, oldest first.
+        # after skips what the caller already has; limit keeps the newest.
+        words = [w.lower() for w in query.split()]
+        prefixes = []
+        for word in words:
+            field = word[0] if word[0] in "$@" else ""
+            prefixes.extend(field + t for t in terms(word) or ([""] if field else []))
+        with self._lock:
+            sets = [self._matching(p) for p in prefixes]
+            if symbol:
+                sets.append(set(self._postings.get("$" + symbol.lower(), ())))
+            if not sets:
+                new = []
+                for seq in reversed(self._docs):
+                    if seq <= after or len(new) == limit:
+                        break
+                    new.append((seq, self._docs[seq][0]))
+                return new[::-1]
+            # Smallest candidate set first keeps the intersections cheap
+            sets.sort(key=len)
+            found = sets[0]
+            for s in sets[1:]:
+                if not found:
+                    break
+                found = found & s
+            seqs = sorted(found)
+            seqs = seqs[bisect_right(seqs, after):]
+            if limit is not None:
+                seqs = seqs[-limit:] if limit else []
+            docs = self._docs
+            return [(seq, docs[seq][0]) for seq in seqs]
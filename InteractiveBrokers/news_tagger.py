@@ -0,0 +1,200 @@
+import csv
+import re
+import threading
+
+
+# Company names for the watchlist and the sample bulletins; more come from
+# NewsTagger.add() or a symbol file
+DEFAULT_ALIASES = {
+    "AAPL": ["Apple"],
+    "TSLA": ["Tesla"],
+    "MSFT": ["Microsoft"],
+    "AMZN": ["Amazon"],
+    "NVDA": ["Nvidia"],
+    "TELO": ["Telomir Pharmaceuticals", "Telomir"],
+    "IXHL": ["Incannex Healthcare", "Incannex"],
+    "CYCC": ["Cyclacel Pharmaceuticals", "Cyclacel"],
+    "BZAI": ["Blaize"],
+    "XPON": ["Expion360"],
+    "CARV": ["Carver Bancorp"],
+    "SLDP": ["Solid Power"],
+}
+
+# Tickers that are also everyday words or acronyms; they only count when
+# marked up as a ticker with $ or an exchange ($IT, NASDAQ: NOW)
+AMBIGUOUS_TICKERS = frozenset(
+    "A AI ALL AM AN ARE AT BE BIG BY CAN CAR CEO DD EAT EOD EPS ETF FOR FUN GO HAS HE "
+    "IPO IT KEY LOVE LOW MAN NEW NEXT NOW ON ONE OPEN OR OUT PM RE REAL RUN SEE SO "
+    "TV UP USA WELL".split())
+
+EXCHANGES = frozenset(["NASDAQ", "NYSE", "AMEX", "ARCA", "OTC", "OTCQB", "OTCQX", "TSX", "CBOE"])
+
+# Corporate suffixes dropped from names read from a symbol file
+NAME_SUFFIXES = frozenset(["INC", "CORP", "CORPORATION", "CO", "COMPANY", "LTD", "PLC", "LLC",
+                           "HOLDINGS", "GROUP", "SA", "NV", "AG", "THE"])
+
+# A word with an optional ticker markup around it: $STEM, [AAPL], (TELO),
+# and a colon after it for exchange prefixes (NASDAQ: XPON). BRK.B and AT&T
+# stay one word; a hyphen splits ("Apple-Tesla deal", "Coca-Cola")
+TOKEN = re.compile(r"([$\[(]?)([A-Za-z0-9]+(?:[.&'][A-Za-z0-9]+)*)([\])]?)(\s*:)?")
+TICKER_SHAPE = re.compile(r"[A-Z][A-Z0-9]{0,4}(?:\.[A-Z])?\Z")
+
+# Match kinds, in increasing order of confidence
+UNLISTED = 0
+TICKER = 1
+ALIAS = 2
+MARKED = 3
+
+
+def name_tokens(name):
+    return tuple(m.group(2).upper() for m in TOKEN.finditer(name))
+
+
+class NewsTagger:
+    # Tags headlines with the symbols they are about, from a known symbol
+    # universe. Symbols and company names are compiled into one Aho-Corasick
+    # automaton over words rather than characters: the precompiled TOKEN
+    # regex splits a headline in C, then each word is a single dict step,
+    # so a headline costs one pass however many symbols and names are known
+    # and multi-word names ("Solid Power") match without backtracking.
+    #
+    # Rules, strongest first: a known ticker marked up as one ($STEM,
+    # [AAPL], (TELO), NASDAQ: XPON); a known company name; a known ticker
+    # written in capitals inside mixed-case text; last, a ticker outside
+    # the universe marked with $ or an exchange. Brackets alone are too
+    # common around acronyms ("Food and Drug Administration (FDA)") to
+    # count for unknown words. An all-caps headline never tags bare words,
+    # and AMBIGUOUS_TICKERS need $ or an exchange.
+
+    def __init__(self, symbols=(), aliases=DEFAULT_ALIASES, ambiguous=AMBIGUOUS_TICKERS):
+        self.ambiguous = frozenset(ambiguous)
+        self._patterns = {}
+        self._lock = threading.Lock()
+        self._automaton = None
+        for symbol, names in (aliases or {}).items():
+            self.add(symbol, *names)
+        for symbol in symbols:
+            self.add(symbol)
+
+    def __contains__(self, symbol):
+        return (symbol.upper(),) in self._patterns
+
+    def __len__(self):
+        return sum(1 for kind, _ in self._patterns.values() if kind == TICKER)
+
+    def add(self, symbol, *names):
+        symbol = symbol.upper()
+        with self._lock:
+            added = self._add_pattern((symbol,), TICKER, symbol)
+            for name in names:
+                tokens = name_tokens(name)
+                if tokens:
+                    added |= self._add_pattern(tokens, ALIAS, symbol)
+            if added:
+                self._automaton = None
+
+    def _add_pattern(self, tokens, kind, symbol):
+        # First writer wins: a ticker keeps its own symbol over a name that
+        # happens to be spelled the same
+        if tokens in self._patterns:
+            return False
+        self._patterns[tokens] = (kind, symbol)
+        return True
+
+    def load(self, path):
+        # CSV of symbol,name[,alias...]; a header row is skipped
+        count = 0
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.reader(f):
+                if not row or not row[0] or row[0].strip().lower() == 'symbol':
+                    continue
+                names = [self.clean_name(n) for n in row[1:] if n.strip()]
+                self.add(row[0].strip(), *[n for n in names if n])
+                count += 1
+        return count
+
+    @staticmethod
+    def clean_name(name):
+        # "Apple Inc. - Common Stock" -> "Apple"
+        words = name.split(" - ")[0].replace(",", " ").split()
+        while words and words[-1].upper().rstrip(".") in NAME_SUFFIXES:
+            words.pop()
+        return " ".join(words)
+
+    def _compile(self):
+        with self._lock:
+            if self._automaton is not None:
+                return self._automaton
+            goto, fail, out = [{}], [0], [[]]
+            for tokens, (kind, symbol) in self._patterns.items():
+                state = 0
+                for token in tokens:
+                    nxt = goto[state].get(token)
+                    if nxt is None:
+                        nxt = goto[state][token] = len(goto)
+                        goto.append({})
+                        fail.append(0)
+                        out.append([])
+                    state = nxt
+                out[state].append((kind, symbol))
+            # Breadth first, so a state's failure target is finished before
+            # it; the first words fail back to the root
+            queue = list(goto[0].values())
+            for state in queue:
+                for token, nxt in goto[state].items():
+                    f = fail[state]
+                    while f and token not in goto[f]:
+                        f = fail[f]
+                    fail[nxt] = goto[f].get(token, 0)
+                    out[nxt] = out[nxt] + out[fail[nxt]]
+                    queue.append(nxt)
+            self._automaton = (goto, fail, [tuple(o) for o in out])
+            return self._automaton
+
+    def tag(self, headline):
+        # Symbols in the headline, most confident first, then by position
+        return self._tag(headline, *self._compile())
+
+    def primary(self, headline):
+        tags = self.tag(headline)
+        return tags[0] if tags else ""
+
+    def tag_many(self, headlines):
+        automaton = self._compile()
+        tag = self._tag
+        return [tag(headline, *automaton) for headline in headlines]
+
+    def _tag(self, headline, goto, fail, out):
+        ambiguous = self.ambiguous
+        patterns = self._patterns
+        shouting = headline.isupper()
+        found = {}
+        state = 0
+        exchange = False
+        for position, (prefix, word, suffix, colon) in enumerate(TOKEN.findall(headline)):
+            key = word.upper()
+            while state and key not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(key, 0)
+            for kind, symbol in out[state]:
+                if kind == TICKER and (shouting or word != key or symbol in ambiguous):
+                    continue
+                best = found.get(symbol)
+                if best is None or kind > best[0]:
+                    found[symbol] = (kind, position)
+            if (exchange or prefix == "$" or (prefix and suffix)) and TICKER_SHAPE.match(word):
+                known = patterns.get((word,), (None,))[0] == TICKER
+                if exchange or prefix == "$":
+                    kind = MARKED if known else UNLISTED
+                elif known and word not in ambiguous:
+                    kind = MARKED
+                else:
+                    kind = None
+                if kind is not None:
+                    best = found.get(word)
+                    if best is None or kind > best[0]:
+                        found[word] = (kind, best[1] if best else position)
+            exchange = bool(colon) and key in EXCHANGES
+        if not found:
+            return []
+        return sorted(found, key=lambda s: (-found[s][0], found[s][1]))
@@ -0,0 +1,197 @@
+import threading
+import time
+from collections import deque
+
+
+WORKING_STATUSES = frozenset({"ApiPending", "PendingSubmit", "PreSubmitted", "Submitted", "PendingCancel"})
+TERMINAL_STATUSES = frozenset({"Filled", "Cancelled", "ApiCancelled", "Inactive"})
+
+
+class OrderState:
+    # Latest known state of one of our orders. contract/order are the ibapi
+    # objects last sent or reported, kept so the order can be modified.
+
+    __slots__ = ('orderId', 'permId', 'symbol', 'action', 'qty', 'order_type', 'lmt_price', 'tif',
+                 'status', 'filled', 'remaining', 'avg_fill_price', 'updated', 'contract', 'order')
+
+    def __init__(self, orderId, symbol):
+        self.orderId = orderId
+        self.permId = 0
+        self.symbol = symbol
+        self.action = ""
+        self.qty = 0
+        self.order_type = ""
+        self.lmt_price = None
+        self.tif = ""
+        self.status = "PendingSubmit"
+        self.filled = 0
+        self.remaining = 0
+        self.avg_fill_price = 0.0
+        self.updated = time.time()
+        self.contract = None
+        self.order = None
+
+    @property
+    def working(self):
+        return self.status in WORKING_STATUSES
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__ if name not in ('contract', 'order')}
+
+
+class OrderBook:
+    # The app's own orders, indexed by orderId, permId, symbol and status.
+    # Each update is O(1): the symbol and status indexes are dicts of
+    # orderId -> OrderState. Statuses only move forward: once an order is
+    # terminal, late non-terminal reports are ignored. Finished orders are
+    # kept (for lookups by id) up to done_retention, oldest first out.
+
+    def __init__(self, done_retention=1000):
+        self.done_retention = done_retention
+        self._by_id = {}
+        self._by_perm = {}
+        self._by_symbol = {}
+        self._by_status = {}
+        self._done = deque()
+        self._lock = threading.RLock()
+        self.on_change = []
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, order_id):
+        return order_id in self._by_id
+
+    def get(self, order_id):
+        return self._by_id.get(order_id)
+
+    def by_perm(self, perm_id):
+        return self._by_perm.get(perm_id)
+
+    def with_status(self, status):
+        with self._lock:
+            return list(self._by_status.get(status, {}).values())
+
+    def for_symbol(self, symbol):
+        with self._lock:
+            return list(self._by_symbol.get(symbol, {}).values())
+
+    def working(self, symbol=None):
+        with self._lock:
+            if symbol is None:
+                return [s for status in WORKING_STATUSES for s in self._by_status.get(status, {}).values()]
+            return [s for s in self._by_symbol.get(symbol, {}).values() if s.working]
+
+    # ---- updates ----
+
+    def submitted(self, order_id, contract, order):
+        # Normally called before the order goes out; if TWS has already
+        # reported on it, keep the status and fills it reported
+        with self._lock:
+            state = self._state(order_id, contract.symbol)
+            self._apply_order(state, contract, order)
+            if state.status in ("ApiPending", "PendingSubmit"):
+                self._set_status(state, "PendingSubmit")
+            state.remaining = max(0, order.totalQuantity - state.filled)
+        self._changed(state)
+        return state
+
+    def on_open_order(self, order_id, contract, order, status):
+        with self._lock:
+            state = self._state(order_id, contract.symbol)
+            self._apply_order(state, contract, order)
+            self._set_perm(state, order.permId)
+            self._set_status(state, status)
+        self._changed(state)
+
+    def on_status(self, order_id, status, filled, remaining, avg_fill_price, perm_id=0):
+        with self._lock:
+            state = self._by_id.get(order_id)
+            if state is None:
+                # Status for an order we have not seen yet, e.g. after a restart;
+                # openOrder normally follows with the details
+                state = self._state(order_id, "")
+            self._set_perm(state, perm_id)
+            if not self._set_status(state, status):
+                return
+            state.filled = filled
+            state.remaining = remaining
+            state.avg_fill_price = avg_fill_price
+        self._changed(state)
+
+    def on_execution(self, order_id, perm_id, cum_qty, avg_price):
+        with self._lock:
+            state = self._by_id.get(order_id) or self._by_perm.get(perm_id)
+            if state is None or cum_qty <= state.filled:
+                return
+            state.filled = cum_qty
+            state.avg_fill_price = avg_price
+            if state.qty:
+                state.remaining = max(0, state.qty - cum_qty)
+            state.updated = time.time()
+        self._changed(state)
+
+    # ---- internals ----
+
+    def _state(self, order_id, symbol):
+        state = self._by_id.get(order_id)
+        if state is None:
+            state = self._by_id[order_id] = OrderState(order_id, symbol)
+            self._by_symbol.setdefault(symbol, {})[order_id] = state
+            self._by_status.setdefault(state.status, {})[order_id] = state
+        elif symbol and state.symbol != symbol:
+            self._unindex(self._by_symbol, state.symbol, order_id)
+            state.symbol = symbol
+            self._by_symbol.setdefault(symbol, {})[order_id] = state
+        return state
+
+    def _apply_order(self, state, contract, order):
+        state.contract = contract
+        state.order = order
+        state.action = order.action
+        state.qty = order.totalQuantity
+        state.order_type = order.orderType
+        state.lmt_price = order.lmtPrice if order.orderType == "LMT" else None
+        state.tif = order.tif
+
+    def _set_perm(self, state, perm_id):
+        if perm_id and state.permId != perm_id:
+            self._by_perm.pop(state.permId, None)
+            state.permId = perm_id
+            self._by_perm[perm_id] = state
+
+    def _set_status(self, state, status):
+        state.updated = time.time()
+        if status == state.status:
+            return True
+        if state.status in TERMINAL_STATUSES:
+            return False
+        self._unindex(self._by_status, state.status, state.orderId)
+        state.status = status
+        self._by_status.setdefault(status, {})[state.orderId] = state
+        if status in TERMINAL_STATUSES:
+            self._done.append(state.orderId)
+            while len(self._done) > self.done_retention:
+                self._drop(self._done.popleft())
+        return True
+
+    def _drop(self, order_id):
+        state = self._by_id.pop(order_id, None)
+        if state is None:
+            return
+        self._unindex(self._by_symbol, state.symbol, order_id)
+        self._unindex(self._by_status, state.status, order_id)
+        if self._by_perm.get(state.permId) is state:
+            del self._by_perm[state.permId]
+
+    @staticmethod
+    def _unindex(index, key, order_id):
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.pop(order_id, None)
+            if not bucket:
+                del index[key]
+
+    def _changed(self, state):
+        for callback in self.on_change:
+            callback(state)
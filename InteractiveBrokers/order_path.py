@@ -0,0 +1,185 @@
+import threading
+import time
+from bisect import bisect_right
+
+from ibapi.order import Order
+
+
+# Statuses that mean TWS has accepted the order
+ACK_STATUSES = frozenset({"PreSubmitted", "Submitted", "Filled"})
+DONE_STATUSES = frozenset({"Filled", "Cancelled", "ApiCancelled", "Inactive"})
+
+
+class OrderIdAllocator:
+    # nextValidId arrives on the reader thread while orders are sent from
+    # the GUI thread; every id is handed out exactly once under the lock.
+
+    def __init__(self):
+        self._next = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self._next is not None
+
+    def peek(self):
+        return self._next
+
+    def reset(self, next_id):
+        # TWS may resend nextValidId; never move backwards over ids in use
+        with self._lock:
+            if self._next is None or next_id > self._next:
+                self._next = next_id
+
+    def next(self):
+        with self._lock:
+            if self._next is None:
+                return None
+            order_id = self._next
+            self._next += 1
+            return order_id
+
+
+def normalize_order_type(order_type):
+    order_type = order_type.upper().replace(" ", "")
+    if order_type == "MIDPRICE":
+        return "MIDPRICE"
+    if order_type == "MKT":
+        return "MKT"
+    return "LMT"
+
+
+class OrderTemplates:
+    # Prebuilt Contract per symbol and Order per (action, order type, tif).
+    # order() clones a template by copying its __dict__, which is several
+    # times cheaper than Order(); the clones share the template's empty
+    # list fields, which the send path never mutates.
+
+    def __init__(self, make_contract):
+        self._make_contract = make_contract
+        self._contracts = {}
+        self._orders = {}
+
+    def contract(self, symbol):
+        contract = self._contracts.get(symbol)
+        if contract is None:
+            contract = self._contracts[symbol] = self._make_contract(symbol)
+        return contract
+
+    def set_contract(self, symbol, contract):
+        self._contracts[symbol] = contract
+
+    def order(self, action, qty, order_type="LMT", tif="GTC", lmt_price=None):
+        key = (action, order_type, tif)
+        template = self._orders.get(key)
+        if template is None:
+            template = self._orders[key] = self._make_template(action, order_type, tif)
+        order = Order.__new__(Order)
+        order.__dict__.update(template.__dict__)
+        order.totalQuantity = qty
+        if lmt_price is not None and order.orderType == "LMT":
+            order.lmtPrice = lmt_price
+        return order
+
+    def _make_template(self, action, order_type, tif):
+        order = Order()
+        order.action = action
+        order.orderType = normalize_order_type(order_type)
+        order.tif = tif
+        # Clear deprecated attributes to prevent IB Error 10268
+        order.eTradeOnly = ""
+        order.firmQuoteOnly = ""
+        order.nbboPriceCap = ""
+        return order
+
+
+class LatencyHistogram:
+    # Fixed log-spaced buckets from 50us to ~100s; record() is a bisect
+    # and an increment, percentiles are read from the cumulative counts.
+
+    BOUNDS = [50e-6 * 2 ** (i / 2) for i in range(42)]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect_right(self.BOUNDS, seconds)] += 1
+        self.n += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        # Upper bound of the bucket holding the p-th percentile
+        if not self.n:
+            return None
+        target = self.n * p / 100
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count:
+                return min(self.BOUNDS[i], self.max) if i < len(self.BOUNDS) else self.max
+        return self.max
+
+    def summary(self):
+        if not self.n:
+            return {'count': 0}
+        return {
+            'count': self.n,
+            'mean_ms': self.total / self.n * 1000,
+            'p50_ms': self.percentile(50) * 1000,
+            'p99_ms': self.percentile(99) * 1000,
+            'max_ms': self.max * 1000,
+        }
+
+
+class OrderLatency:
+    # Submit -> first acknowledged orderStatus and submit -> first
+    # execDetails, per order id, using perf_counter timestamps.
+
+    def __init__(self):
+        self.ack = LatencyHistogram()
+        self.fill = LatencyHistogram()
+        self._submitted = {}
+        self._acked = set()
+        self._filled = set()
+        self._done = set()
+
+    def submitted(self, order_id, t=None):
+        self._submitted[order_id] = time.perf_counter() if t is None else t
+
+    def on_status(self, order_id, status):
+        sent = self._submitted.get(order_id)
+        if sent is None:
+            return
+        if status in ACK_STATUSES and order_id not in self._acked:
+            self._acked.add(order_id)
+            self.ack.record(time.perf_counter() - sent)
+        # execDetails can trail the Filled status, so keep the send time
+        # until the fill has been timed too
+        if status in DONE_STATUSES:
+            if status != "Filled" or order_id in self._filled:
+                self._forget(order_id)
+            else:
+                self._done.add(order_id)
+
+    def on_fill(self, order_id):
+        sent = self._submitted.get(order_id)
+        if sent is None or order_id in self._filled:
+            return
+        self._filled.add(order_id)
+        self.fill.record(time.perf_counter() - sent)
+        if order_id in self._done:
+            self._forget(order_id)
+
+    def _forget(self, order_id):
+        self._submitted.pop(order_id, None)
+        self._acked.discard(order_id)
+        self._filled.discard(order_id)
+        self._done.discard(order_id)
+
+    def summary(self):
+        return {'submit_to_ack': self.ack.summary(), 'submit_to_fill': self.fill.summary()}
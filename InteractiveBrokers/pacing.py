@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import deque
+
+
+# TWS disconnects API clients that send more than 50 messages per second
+IB_MAX_MSG_RATE = 50
+
+# Historical data pacing: at most 60 requests in any 10 minute window
+IB_HISTORY_REQUESTS = 60
+IB_HISTORY_WINDOW = 600
+
+
+class TokenBucket:
+    # Classic token bucket: `rate` tokens per second, at most `burst`
+    # stored. acquire() blocks until enough tokens are available.
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else rate)
+        self._tokens = self.burst
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.waited = 0.0
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def delay(self, n=1):
+        # Seconds until n tokens are available (0 if they are now)
+        with self._lock:
+            self._refill(time.monotonic())
+            return max(0.0, (n - self._tokens) / self.rate)
+
+    def try_acquire(self, n=1):
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= n:
+                self._tokens -= n
+                self.acquired += n
+                return True
+            return False
+
+    def acquire(self, n=1, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= n:
+                    self._tokens -= n
+                    self.acquired += n
+                    self.waited += now - start
+                    return True
+                wait = (n - self._tokens) / self.rate
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class WindowLimiter:
+    # At most `limit` events in any sliding `window` seconds, the way IB
+    # counts historical data requests. Has the delay()/try_acquire() half
+    # of the TokenBucket interface.
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = float(window)
+        self._events = deque()
+        self._lock = threading.Lock()
+        self.acquired = 0
+
+    def _expire(self, now):
+        while self._events and self._events[0] <= now - self.window:
+            self._events.popleft()
+
+    def delay(self, n=1):
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            if len(self._events) + n <= self.limit:
+                return 0.0
+            return self._events[len(self._events) + n - self.limit - 1] + self.window - now
+
+    def try_acquire(self, n=1):
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            if len(self._events) + n > self.limit:
+                return False
+            self._events.extend([now] * n)
+            self.acquired += n
+            return True
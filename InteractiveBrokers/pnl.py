@@ -0,0 +1,205 @@
+import threading
+
+
+def apply_fill(position, avg_cost, qty, price):
+    # (position, avg_cost, realized) after a signed fill of qty at price
+    if position == 0 or (position > 0) == (qty > 0):
+        return position + qty, (avg_cost * abs(position) + price * abs(qty)) / abs(position + qty), 0.0
+    closed = min(abs(qty), abs(position))
+    realized = closed * (price - avg_cost) * (1 if position > 0 else -1)
+    if abs(qty) > abs(position):
+        # Flipped through zero; the remainder opens at the fill price
+        avg_cost = price
+    elif position + qty == 0:
+        avg_cost = 0.0
+    return position + qty, avg_cost, realized
+
+
+class PositionPnL:
+    # P&L state of one symbol. The last computed unrealized/daily/market
+    # value are kept so the engine can move its totals by the difference.
+    __slots__ = ('symbol', 'position', 'avg_cost', 'mark', 'prior_close', 'open_cost', 'realized',
+                 'today_qty', 'today_cash', 'unfilled', 'unfilled_cost', 'unrealized', 'daily',
+                 'market_value')
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.position = 0.0
+        self.avg_cost = 0.0
+        self.mark = None
+        self.prior_close = None
+        # Average cost from the first position report, the daily reference
+        # while there is no prior close
+        self.open_cost = None
+        self.realized = 0.0
+        # Net signed quantity and cash (qty * price) of today's fills
+        self.today_qty = 0.0
+        self.today_cash = 0.0
+        # Quantity a position report already includes but whose fills have
+        # not arrived yet, and the average cost those fills apply to
+        self.unfilled = 0.0
+        self.unfilled_cost = 0.0
+        self.unrealized = 0.0
+        self.daily = 0.0
+        self.market_value = 0.0
+
+    def as_dict(self):
+        return {'symbol': self.symbol, 'position': self.position, 'avg_cost': self.avg_cost,
+                'mark': self.mark, 'realized': self.realized, 'unrealized': self.unrealized,
+                'daily': self.daily, 'market_value': self.market_value}
+
+
+class PnLEngine:
+    # Real-time P&L from positions (with IB's average cost), fills and
+    # marks. Every update recomputes only the symbol it is about and moves
+    # the portfolio totals by that symbol's change, so a tick costs O(1)
+    # however many positions are open. Updates come from the IB reader
+    # thread; drain() hands the symbols that changed to the GUI.
+    #
+    # Daily P&L is measured against the prior close: market value now, less
+    # the overnight position at the prior close, less the cash spent on
+    # today's fills. Without a prior close the average cost of the first
+    # position report of the session stands in; one engine covers one day.
+
+    def __init__(self):
+        self._positions = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self.unrealized = 0.0
+        self.realized = 0.0
+        self.daily = 0.0
+        self.market_value = 0.0
+        # Set once reqPositions has reported every open position; a report
+        # for a symbol seen for the first time after that is a live change
+        self.positions_loaded = False
+
+    def __contains__(self, symbol):
+        return symbol in self._positions
+
+    def get(self, symbol):
+        return self._positions.get(symbol)
+
+    def _entry(self, symbol):
+        entry = self._positions.get(symbol)
+        if entry is None:
+            entry = self._positions[symbol] = PositionPnL(symbol)
+        return entry
+
+    def on_position(self, symbol, position, avg_cost):
+        # IB's position report is authoritative. It usually follows the
+        # fills that caused it and only confirms what on_fill applied; when
+        # it gets there first, the difference is kept as unfilled for
+        # on_fill to match up instead of applying those fills again
+        entry = self._entry(symbol)
+        position = float(position)
+        first = entry.open_cost is None
+        if first:
+            entry.open_cost = float(avg_cost)
+        if not first or self.positions_loaded:
+            ahead = position - entry.position
+            if ahead:
+                if not entry.unfilled:
+                    entry.unfilled_cost = entry.avg_cost
+                entry.unfilled += ahead
+        entry.position = position
+        entry.avg_cost = float(avg_cost)
+        self._update(entry)
+
+    def on_position_end(self):
+        self.positions_loaded = True
+
+    def on_fill(self, symbol, qty, price):
+        # qty is signed: positive for buys, negative for sells
+        entry = self._entry(symbol)
+        matched = 0.0
+        if entry.unfilled and (entry.unfilled > 0) == (qty > 0):
+            # Already in the reported position: only book what it realized,
+            # against the position and cost from before the report
+            matched = qty if abs(qty) <= abs(entry.unfilled) else entry.unfilled
+            _, entry.unfilled_cost, pnl = apply_fill(entry.position - entry.unfilled, entry.unfilled_cost,
+                                                     matched, price)
+            entry.unfilled -= matched
+            self._realize(entry, pnl)
+        if qty != matched:
+            entry.position, entry.avg_cost, pnl = apply_fill(entry.position, entry.avg_cost, qty - matched, price)
+            self._realize(entry, pnl)
+        self.on_replayed_fill(symbol, qty, price)
+
+    def _realize(self, entry, pnl):
+        entry.realized += pnl
+        self.realized += pnl
+
+    def on_replayed_fill(self, symbol, qty, price):
+        # A fill from earlier today that the position report already
+        # includes: it only counts towards the daily P&L
+        entry = self._entry(symbol)
+        entry.today_qty += qty
+        entry.today_cash += qty * price
+        self._update(entry)
+
+    def on_mark(self, symbol, price):
+        entry = self._positions.get(symbol)
+        if entry is None or price is None or price == entry.mark:
+            return
+        entry.mark = price
+        self._update(entry)
+
+    def on_quote(self, symbol, md):
+        # Last trade when there is one, else the mid
+        if symbol not in self._positions:
+            return
+        price = md.get('last')
+        if price is None:
+            bid, ask = md.get('bid'), md.get('ask')
+            if bid is None or ask is None:
+                return
+            price = (bid + ask) / 2
+        self.on_mark(symbol, price)
+
+    def set_prior_close(self, symbol, price):
+        entry = self._entry(symbol)
+        entry.prior_close = price
+        self._update(entry)
+
+    def _update(self, entry):
+        mark = entry.mark
+        if mark is None:
+            mark = entry.prior_close if entry.prior_close is not None else entry.avg_cost
+        position = entry.position
+        unrealized = position * (mark - entry.avg_cost)
+        market_value = position * mark
+        reference = entry.prior_close
+        if reference is None:
+            reference = entry.open_cost if entry.open_cost is not None else entry.avg_cost
+        daily = market_value - (position - entry.today_qty) * reference - entry.today_cash
+        self.unrealized += unrealized - entry.unrealized
+        self.daily += daily - entry.daily
+        self.market_value += market_value - entry.market_value
+        entry.unrealized = unrealized
+        entry.daily = daily
+        entry.market_value = market_value
+        with self._lock:
+            self._dirty.add(entry.symbol)
+
+    def resync(self):
+        # Recompute the totals from scratch, dropping accumulated rounding
+        self.unrealized = sum(e.unrealized for e in self._positions.values())
+        self.realized = sum(e.realized for e in self._positions.values())
+        self.daily = sum(e.daily for e in self._positions.values())
+        self.market_value = sum(e.market_value for e in self._positions.values())
+
+    def totals(self):
+        return {'unrealized': self.unrealized, 'realized': self.realized,
+                'daily': self.daily, 'market_value': self.market_value}
+
+    def drain(self):
+        # Rows for the symbols changed since the last call plus the current
+        # totals, or None when nothing changed
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return None
+        return {'rows': {s: self._positions[s].as_dict() for s in dirty}, 'totals': self.totals()}
+
+    def snapshot(self):
+        return {'rows': {s: e.as_dict() for s, e in self._positions.items()}, 'totals': self.totals()}
@@ -0,0 +1,144 @@
+import threading
+import time
+
+from order_path import LatencyHistogram
+
+
+# Share of each frame the panels may spend redrawing; the rest is left to
+# Tk for input and layout
+FRAME_BUDGET = 0.6
+
+
+class Panel:
+    __slots__ = ('name', 'render', 'poll', 'dirty', 'marked_at', 'pending', 'waited', 'renders', 'deferred',
+                 'render_time', 'staleness')
+
+    def __init__(self, name, render, poll):
+        self.name = name
+        self.render = render
+        self.poll = poll
+        self.dirty = False
+        self.marked_at = 0.0
+        self.pending = []
+        # Frames in a row this panel was dirty but left for the next one
+        self.waited = 0
+        self.renders = 0
+        self.deferred = 0
+        self.render_time = LatencyHistogram()
+        # First mark to the end of the redraw that picked it up
+        self.staleness = LatencyHistogram()
+
+
+class RenderScheduler:
+    # The dashboard's one GUI loop. Event handlers, on any thread, only mark
+    # panels dirty (optionally with a payload); once per frame the loop runs
+    # due timers, asks polled panels whether they have something new, then
+    # redraws dirty panels in priority order until the frame budget is
+    # spent. A panel that does not fit keeps its flag and payloads and goes
+    # first next frame, so a slow chart redraw delays itself, not the quotes.
+    # after is Tk's after(ms, fn), or anything with the same signature.
+
+    def __init__(self, after, frame_ms, budget_ms=None):
+        self.after = after
+        self.frame_ms = frame_ms
+        self.budget_s = (frame_ms * FRAME_BUDGET if budget_ms is None else budget_ms) / 1000
+        self._panels = []
+        self._by_name = {}
+        self._timers = []
+        self._lock = threading.Lock()
+        self._running = False
+        self.frames = 0
+        self.over_budget = 0
+        self.frame_time = LatencyHistogram()
+
+    def add_panel(self, name, render, poll=None):
+        # Panels render in the order they are added. render(payloads) redraws
+        # from the panel's model; payloads are what mark() was given since
+        # the last redraw. poll() is called every frame; a truthy result
+        # marks the panel, and anything but True is kept as a payload.
+        panel = Panel(name, render, poll)
+        self._panels.append(panel)
+        self._by_name[name] = panel
+        return panel
+
+    def mark(self, name, payload=None):
+        panel = self._by_name[name]
+        with self._lock:
+            if not panel.dirty:
+                panel.dirty = True
+                panel.marked_at = time.perf_counter()
+            if payload is not None:
+                panel.pending.append(payload)
+
+    def every(self, ms, fn):
+        # fn() every ms milliseconds from the frame loop, first after ms
+        self._timers.append([time.monotonic() + ms / 1000, ms / 1000, fn])
+
+    def start(self):
+        self._running = True
+        self.after(0, self._frame)
+
+    def stop(self):
+        self._running = False
+
+    def _frame(self):
+        if not self._running:
+            return
+        try:
+            self.run_frame()
+        finally:
+            self.after(self.frame_ms, self._frame)
+
+    def run_frame(self):
+        start = time.perf_counter()
+        now = time.monotonic()
+        for timer in self._timers:
+            if now >= timer[0]:
+                timer[0] = now + timer[1]
+                timer[2]()
+        for panel in self._panels:
+            if panel.poll is not None:
+                found = panel.poll()
+                if found:
+                    self.mark(panel.name, None if found is True else found)
+        with self._lock:
+            dirty = [panel for panel in self._panels if panel.dirty]
+        # Stable sort: the longest-waiting first, priority order otherwise
+        dirty.sort(key=lambda panel: -panel.waited)
+        rendered = 0
+        for panel in dirty:
+            if rendered and time.perf_counter() - start >= self.budget_s:
+                panel.waited += 1
+                panel.deferred += 1
+                continue
+            with self._lock:
+                payloads, panel.pending = panel.pending, []
+                panel.dirty = False
+                marked_at = panel.marked_at
+            began = time.perf_counter()
+            try:
+                panel.render(payloads)
+            finally:
+                done = time.perf_counter()
+                panel.render_time.record(done - began)
+                panel.staleness.record(done - marked_at)
+                panel.renders += 1
+                panel.waited = 0
+                rendered += 1
+        elapsed = time.perf_counter() - start
+        self.frames += 1
+        self.frame_time.record(elapsed)
+        if elapsed > self.budget_s:
+            self.over_budget += 1
+        return rendered
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'over_budget': self.over_budget,
+            'budget_ms': self.budget_s * 1000,
+            'frame': self.frame_time.summary(),
+            'panels': {panel.name: {'renders': panel.renders, 'deferred': panel.deferred, 'dirty': panel.dirty,
+                                    'render': panel.render_time.summary(), 'staleness': panel.staleness.summary()}
+                       for panel in self._panels},
+        }
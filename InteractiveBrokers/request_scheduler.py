@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import deque
+
+from order_path import LatencyHistogram
+from pacing import IB_HISTORY_REQUESTS, IB_HISTORY_WINDOW, IB_MAX_MSG_RATE, TokenBucket, WindowLimiter
+
+
+# Priority classes, highest first
+PRIORITY_ORDER = 0
+PRIORITY_MARKET_DATA = 1
+PRIORITY_ACCOUNT = 2
+PRIORITY_HISTORY = 3
+PRIORITY_NEWS = 4
+PRIORITY_NAMES = ("order", "market_data", "account", "history", "news")
+
+
+class _ClassStats:
+    def __init__(self):
+        self.sent = 0
+        self.inline = 0
+        self.max_depth = 0
+        self.wait = LatencyHistogram()
+
+
+class RequestScheduler:
+    # Single outbound path for IB requests. Every message costs a token from
+    # the shared message bucket; history requests also count against IB's
+    # sliding 10 minute limit. A request is sent inline on the caller's
+    # thread when nothing of equal or higher priority is waiting and a token
+    # is free (the usual case for orders), otherwise it is queued and a
+    # dispatcher thread sends the highest-priority sendable request as soon
+    # as the limits allow. Within a class requests keep their order.
+
+    def __init__(self, msg_rate=IB_MAX_MSG_RATE, history_limit=IB_HISTORY_REQUESTS,
+                 history_window=IB_HISTORY_WINDOW):
+        # Stay a little under the hard limit; TWS counts on its own clock
+        self.messages = TokenBucket(msg_rate * 0.9, burst=max(1, msg_rate // 5))
+        self.limits = {PRIORITY_HISTORY: WindowLimiter(history_limit, history_window)}
+        self._queues = [deque() for _ in PRIORITY_NAMES]
+        self._stats = [_ClassStats() for _ in PRIORITY_NAMES]
+        # Popped by the dispatcher but not sent yet; an inline send must not
+        # overtake these (e.g. a cancel overtaking its subscribe)
+        self._inflight = [0] * len(PRIORITY_NAMES)
+        self._cond = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, priority, fn, *args):
+        with self._cond:
+            idle = not any(self._queues[:priority + 1]) and not any(self._inflight[:priority + 1])
+            if idle and self._try_tokens(priority):
+                stats = self._stats[priority]
+                stats.sent += 1
+                stats.inline += 1
+                stats.wait.record(0.0)
+                inline = True
+            else:
+                queue = self._queues[priority]
+                queue.append((time.perf_counter(), fn, args))
+                stats = self._stats[priority]
+                stats.max_depth = max(stats.max_depth, len(queue))
+                self._cond.notify()
+                inline = False
+        if inline:
+            fn(*args)
+        return inline
+
+    def pending(self):
+        return sum(len(q) for q in self._queues)
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+
+    def _try_tokens(self, priority):
+        # Check the class limit first so a refused history request does not
+        # burn a message token
+        limit = self.limits.get(priority)
+        if limit is not None and limit.delay() > 0:
+            return False
+        if not self.messages.try_acquire():
+            return False
+        if limit is not None:
+            limit.try_acquire()
+        return True
+
+    def _next_sendable(self):
+        # Highest-priority queue head whose limits allow it now, else the
+        # shortest wait until something could go
+        wait = None
+        for priority, queue in enumerate(self._queues):
+            if not queue:
+                continue
+            limit = self.limits.get(priority)
+            delay = self.messages.delay()
+            if limit is not None:
+                delay = max(delay, limit.delay())
+            if delay <= 0 and self._try_tokens(priority):
+                return priority, queue.popleft(), None
+            if delay <= 0:
+                delay = 0.001
+            wait = delay if wait is None else min(wait, delay)
+            if limit is None:
+                # Only the shared bucket blocks this class, which would
+                # block every lower class too
+                break
+        return None, None, wait
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running:
+                    priority, item, wait = self._next_sendable()
+                    if item is not None:
+                        break
+                    self._cond.wait(wait)
+                if not self._running:
+                    return
+                stats = self._stats[priority]
+                stats.sent += 1
+                stats.wait.record(time.perf_counter() - item[0])
+                self._inflight[priority] += 1
+            _, fn, args = item
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"Request failed ({PRIORITY_NAMES[priority]}): {e}")
+            finally:
+                with self._cond:
+                    self._inflight[priority] -= 1
+
+    def stats(self):
+        with self._cond:
+            result = {}
+            for name, queue, stats in zip(PRIORITY_NAMES, self._queues, self._stats):
+                wait = stats.wait.summary()
+                result[name] = {
+                    'depth': len(queue),
+                    'max_depth': stats.max_depth,
+                    'sent': stats.sent,
+                    'inline': stats.inline,
+                    'wait_p50_ms': wait.get('p50_ms', 0.0),
+                    'wait_p99_ms': wait.get('p99_ms', 0.0),
+                    'wait_max_ms': wait.get('max_ms', 0.0),
+                }
+            return result
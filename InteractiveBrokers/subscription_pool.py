@@ -0,0 +1,85 @@
+import threading
+from collections import OrderedDict
+
+
+class SubscriptionPool:
+    # LRU pool of live market data lines on top of subscribe/unsubscribe
+    # callables. acquire() keeps a symbol's line open (re-using it when it is
+    # already hot) and closes the least recently used unpinned line only
+    # when the pool is full. Pinned symbols (the watchlist) are never evicted.
+
+    def __init__(self, capacity, subscribe, unsubscribe):
+        self.capacity = capacity
+        self._subscribe = subscribe
+        self._unsubscribe = unsubscribe
+        self._lines = OrderedDict()   # symbol -> reqId, least recently used first
+        self._pinned = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, symbol):
+        return symbol in self._lines
+
+    def __len__(self):
+        return len(self._lines)
+
+    def symbols(self):
+        return list(self._lines)
+
+    def acquire(self, symbol):
+        with self._lock:
+            reqId = self._lines.get(symbol)
+            if reqId is not None:
+                self._lines.move_to_end(symbol)
+                self.hits += 1
+                return reqId
+            self.misses += 1
+            if not self._make_room(1):
+                return None
+            reqId = self._lines[symbol] = self._subscribe(symbol)
+            return reqId
+
+    def pin(self, symbol):
+        # Pinned symbols count against capacity; returns False if no room
+        with self._lock:
+            if symbol not in self._lines and not self._make_room(1):
+                return False
+            self._pinned.add(symbol)
+        return self.acquire(symbol) is not None
+
+    def unpin(self, symbol):
+        with self._lock:
+            self._pinned.discard(symbol)
+
+    def set_watchlist(self, symbols):
+        with self._lock:
+            self._pinned.clear()
+        return [symbol for symbol in symbols if self.pin(symbol)]
+
+    def release(self, symbol):
+        # Close a line explicitly, pinned or not
+        with self._lock:
+            self._pinned.discard(symbol)
+            if self._lines.pop(symbol, None) is not None:
+                self._unsubscribe(symbol)
+
+    def set_capacity(self, capacity):
+        with self._lock:
+            self.capacity = capacity
+            self._make_room(0)
+
+    def _make_room(self, needed):
+        while len(self._lines) + needed > self.capacity:
+            victim = next((s for s in self._lines if s not in self._pinned), None)
+            if victim is None:
+                return False
+            del self._lines[victim]
+            self._unsubscribe(victim)
+            self.evictions += 1
+        return True
+
+    def stats(self):
+        return {'lines': len(self._lines), 'capacity': self.capacity, 'pinned': len(self._pinned),
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
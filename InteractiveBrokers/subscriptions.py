@@ -0,0 +1,63 @@
+import threading
+
+
+class SubscriptionRegistry:
+    # Two-way index of live market data lines: symbol <-> reqId <-> contract.
+    # Writes take the lock so both directions always agree; reads are plain
+    # dict lookups and safe from the IB reader thread.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_symbol = {}
+        self._by_reqId = {}
+        self._contracts = {}
+
+    def add(self, symbol, reqId, contract=None):
+        with self._lock:
+            old_reqId = self._by_symbol.get(symbol)
+            if old_reqId is not None and old_reqId != reqId:
+                self._by_reqId.pop(old_reqId, None)
+                self._contracts.pop(old_reqId, None)
+            old_symbol = self._by_reqId.get(reqId)
+            if old_symbol is not None and old_symbol != symbol:
+                self._by_symbol.pop(old_symbol, None)
+            self._by_symbol[symbol] = reqId
+            self._by_reqId[reqId] = symbol
+            self._contracts[reqId] = contract
+
+    def remove_symbol(self, symbol):
+        with self._lock:
+            reqId = self._by_symbol.pop(symbol, None)
+            if reqId is not None:
+                self._by_reqId.pop(reqId, None)
+                self._contracts.pop(reqId, None)
+            return reqId
+
+    def remove_reqId(self, reqId):
+        with self._lock:
+            symbol = self._by_reqId.pop(reqId, None)
+            self._contracts.pop(reqId, None)
+            if symbol is not None:
+                self._by_symbol.pop(symbol, None)
+            return symbol
+
+    def reqId_for(self, symbol):
+        return self._by_symbol.get(symbol)
+
+    def symbol_for(self, reqId):
+        return self._by_reqId.get(reqId)
+
+    def contract_for(self, reqId):
+        return self._contracts.get(reqId)
+
+    def symbols(self):
+        return list(self._by_symbol)
+
+    def items(self):
+        return list(self._by_symbol.items())
+
+    def __contains__(self, symbol):
+        return symbol in self._by_symbol
+
+    def __len__(self):
+        return len(self._by_symbol)
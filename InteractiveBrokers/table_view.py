@@ -0,0 +1,121 @@
+class WindowedTable:
+    # Renders rows from a model into a ttk.Treeview through a fixed pool of
+    # item ids. Only the visible window of rows exists as Tk items (all rows
+    # when windowed=False), and a refresh touches only cells whose text
+    # changed. The model is two callables: row_count() and row_at(i), where
+    # i is the display position.
+
+    def __init__(self, tree, row_count, row_at, scrollbar=None, windowed=True):
+        self.tree = tree
+        self.row_count = row_count
+        self.row_at = row_at
+        self.scrollbar = scrollbar
+        self.windowed = windowed
+        self.offset = 0
+        self._columns = list(tree['columns'])
+        self._slots = []
+        self._shown = []
+        self.cell_updates = 0
+        if scrollbar is not None:
+            scrollbar.configure(command=self.yview)
+        tree.bind("<MouseWheel>", self._on_wheel)
+        tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        tree.bind("<Button-5>", lambda e: self.scroll(3))
+
+    @property
+    def visible_rows(self):
+        return int(self.tree.cget('height'))
+
+    def refresh(self):
+        total = self.row_count()
+        if self.windowed:
+            page = self.visible_rows
+            self.offset = max(0, min(self.offset, total - page))
+        else:
+            page = total
+            self.offset = 0
+        n = max(0, min(page, total - self.offset))
+        while len(self._slots) < n:
+            self._slots.append(self.tree.insert("", "end", values=()))
+            self._shown.append(None)
+        while len(self._slots) > n:
+            self.tree.delete(self._slots.pop())
+            self._shown.pop()
+        for i in range(n):
+            values = tuple(str(v) for v in self.row_at(self.offset + i))
+            shown = self._shown[i]
+            if shown == values:
+                continue
+            iid = self._slots[i]
+            if shown is None or len(shown) != len(values):
+                self.tree.item(iid, values=values)
+                self.cell_updates += len(values)
+            else:
+                for col, old, new in zip(self._columns, shown, values):
+                    if old != new:
+                        self.tree.set(iid, col, new)
+                        self.cell_updates += 1
+            self._shown[i] = values
+        if self.scrollbar is not None:
+            if total:
+                self.scrollbar.set(self.offset / total, (self.offset + n) / total)
+            else:
+                self.scrollbar.set(0, 1)
+
+    def selected_rows(self):
+        # Display positions of the selected items
+        slots = {iid: i for i, iid in enumerate(self._slots)}
+        return [self.offset + slots[iid] for iid in self.tree.selection() if iid in slots]
+
+    def scroll(self, rows):
+        self.offset = max(0, self.offset + rows)
+        self.refresh()
+
+    def yview(self, *args):
+        # Scrollbar protocol: ('moveto', fraction) or ('scroll', n, 'units'|'pages')
+        if args[0] == 'moveto':
+            self.offset = int(float(args[1]) * self.row_count())
+            self.refresh()
+        elif args[0] == 'scroll':
+            step = int(args[1]) * (self.visible_rows if args[2] == 'pages' else 1)
+            self.scroll(step)
+
+    def _on_wheel(self, event):
+        self.scroll(-1 if event.delta > 0 else 1)
+
+
+class KeyedRows:
+    # Ordered key -> row values model for WindowedTable. set_rows() diffs a
+    # full snapshot against the current rows; upsert()/remove() apply single
+    # changes.
+
+    def __init__(self):
+        self._keys = []
+        self._rows = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def row_at(self, i):
+        return self._rows[self._keys[i]]
+
+    def key_at(self, i):
+        return self._keys[i]
+
+    def get(self, key):
+        return self._rows.get(key)
+
+    def upsert(self, key, values):
+        if key not in self._rows:
+            self._keys.append(key)
+        self._rows[key] = tuple(values)
+
+    def remove(self, key):
+        if self._rows.pop(key, None) is not None:
+            self._keys.remove(key)
+
+    def set_rows(self, rows):
+        for key in [k for k in self._keys if k not in rows]:
+            self.remove(key)
+        for key, values in rows.items():
+            self.upsert(key, values)
@@ -0,0 +1,85 @@
+import pytest
+
+from pnl import PnLEngine
+
+
+def loaded(symbol, position, avg_cost):
+    # An engine after the start-of-session reqPositions snapshot
+    engine = PnLEngine()
+    engine.on_position(symbol, position, avg_cost)
+    engine.on_position_end()
+    return engine
+
+
+def test_full_close_without_prior_close():
+    engine = loaded("AAPL", 100, 10.0)
+    engine.on_fill("AAPL", -100, 12.0)
+    engine.on_position("AAPL", 0, 0.0)
+    entry = engine.get("AAPL")
+    assert entry.position == 0
+    assert entry.realized == pytest.approx(200.0)
+    assert entry.daily == pytest.approx(200.0)
+    assert engine.daily == pytest.approx(200.0)
+
+
+def test_adding_to_a_position_without_prior_close():
+    engine = loaded("AAPL", 100, 10.0)
+    engine.on_fill("AAPL", 100, 12.0)
+    engine.on_position("AAPL", 200, 11.0)
+    engine.on_mark("AAPL", 12.0)
+    entry = engine.get("AAPL")
+    assert entry.unrealized == pytest.approx(200.0)
+    # The overnight 100 gained 2 each; the 100 bought today nothing yet
+    assert entry.daily == pytest.approx(200.0)
+
+
+def test_prior_close_is_the_daily_reference():
+    engine = loaded("AAPL", 100, 10.0)
+    engine.set_prior_close("AAPL", 11.0)
+    engine.on_fill("AAPL", -100, 12.0)
+    engine.on_position("AAPL", 0, 0.0)
+    assert engine.get("AAPL").daily == pytest.approx(100.0)
+
+
+def test_position_report_before_the_fill():
+    engine = loaded("AAPL", 100, 10.0)
+    engine.on_position("AAPL", 0, 0.0)
+    engine.on_fill("AAPL", -100, 12.0)
+    entry = engine.get("AAPL")
+    assert entry.position == 0
+    assert entry.unfilled == 0
+    assert entry.realized == pytest.approx(200.0)
+    assert engine.realized == pytest.approx(200.0)
+    assert entry.daily == pytest.approx(200.0)
+
+
+def test_position_report_before_a_partial_fill():
+    engine = loaded("AAPL", 100, 10.0)
+    engine.on_position("AAPL", 40, 10.0)
+    engine.on_fill("AAPL", -60, 12.0)
+    engine.on_position("AAPL", 40, 10.0)
+    entry = engine.get("AAPL")
+    assert entry.position == 40
+    assert entry.avg_cost == pytest.approx(10.0)
+    assert entry.realized == pytest.approx(120.0)
+
+
+def test_new_position_reported_before_its_fill():
+    engine = loaded("AAPL", 100, 10.0)
+    engine.on_position("MSFT", 50, 20.0)
+    engine.on_fill("MSFT", 50, 20.0)
+    engine.on_mark("MSFT", 21.0)
+    entry = engine.get("MSFT")
+    assert entry.position == 50
+    assert entry.realized == 0
+    assert entry.daily == pytest.approx(50.0)
+
+
+def test_fill_then_report_matches_nothing():
+    engine = loaded("AAPL", 100, 10.0)
+    engine.on_fill("AAPL", -30, 12.0)
+    engine.on_position("AAPL", 70, 10.0)
+    entry = engine.get("AAPL")
+    assert entry.position == 70
+    assert entry.unfilled == 0
+    assert entry.realized == pytest.approx(60.0)
@@ -0,0 +1,117 @@
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+TICK_DTYPE = np.dtype([
+    ('time', 'f8'),
+    ('bid', 'f8'),
+    ('ask', 'f8'),
+    ('last', 'f8'),
+    ('size', 'f8'),
+])
+
+
+class TickRingBuffer:
+    # Fixed-size tick history for one symbol. Every record is written twice,
+    # at slot i and i + capacity, so the newest n ticks are always one
+    # contiguous slice and window() can hand out a view instead of a copy.
+    # Single writer (the IB reader thread); readers get read-only views.
+
+    def __init__(self, capacity=65536):
+        self.capacity = capacity
+        self._data = np.full(2 * capacity, np.nan, dtype=TICK_DTYPE)
+        self._next = 0
+        self.count = 0
+
+    @property
+    def nbytes(self):
+        return self._data.nbytes
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, ts, bid, ask, last, size):
+        i = self._next
+        record = (ts, bid, ask, last, size)
+        self._data[i] = record
+        self._data[i + self.capacity] = record
+        self._next = i + 1 if i + 1 < self.capacity else 0
+        self.count += 1
+
+    def latest(self):
+        if not self.count:
+            return None
+        return self._data[self._next + self.capacity - 1]
+
+    def window(self, n=None):
+        size = len(self)
+        if n is None or n > size:
+            n = size
+        end = self._next + self.capacity
+        view = self._data[end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def since(self, ts):
+        view = self.window()
+        start = np.searchsorted(view['time'], ts, side='left')
+        return view[start:]
+
+
+class TickStore:
+    # Per-symbol tick buffers under one memory ceiling. When the ceiling is
+    # reached the symbol that has gone longest without a tick is dropped.
+
+    def __init__(self, capacity_per_symbol=16384, max_bytes=256 * 1024 * 1024):
+        self.capacity_per_symbol = capacity_per_symbol
+        buffer_bytes = 2 * capacity_per_symbol * TICK_DTYPE.itemsize
+        self.max_symbols = max(1, max_bytes // buffer_bytes)
+        self._buffers = OrderedDict()
+        self._quotes = {}
+
+    def buffer(self, symbol):
+        return self._buffers.get(symbol)
+
+    def symbols(self):
+        return list(self._buffers)
+
+    @property
+    def nbytes(self):
+        return sum(buf.nbytes for buf in self._buffers.values())
+
+    def _buffer_for_write(self, symbol):
+        buf = self._buffers.get(symbol)
+        if buf is None:
+            if len(self._buffers) >= self.max_symbols:
+                evicted, _ = self._buffers.popitem(last=False)
+                self._quotes.pop(evicted, None)
+            buf = self._buffers[symbol] = TickRingBuffer(self.capacity_per_symbol)
+            self._quotes[symbol] = [np.nan, np.nan, np.nan, np.nan]
+        else:
+            self._buffers.move_to_end(symbol)
+        return buf
+
+    def record(self, symbol, field, value, ts=None):
+        # field is one of 'bid', 'ask', 'last', 'size'; the other columns carry
+        # forward their latest value so every row is a full quote snapshot.
+        buf = self._buffer_for_write(symbol)
+        quote = self._quotes[symbol]
+        if field == 'bid':
+            quote[0] = value
+        elif field == 'ask':
+            quote[1] = value
+        elif field == 'last':
+            quote[2] = value
+        elif field == 'size':
+            quote[3] = value
+        else:
+            return
+        buf.append(time.time() if ts is None else ts, quote[0], quote[1], quote[2], quote[3])
+
+    def window(self, symbol, n=None):
+        buf = self._buffers.get(symbol)
+        if buf is None:
+            return np.empty(0, dtype=TICK_DTYPE)
+        return buf.window(n)
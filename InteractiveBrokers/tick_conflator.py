@@ -0,0 +1,41 @@
+import threading
+
+
+class TickConflator:
+    # Collapses the tick stream to the latest quote per reqId so the GUI can
+    # pick up one batch per display frame instead of one callback per tick.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self.ticks_in = 0
+        self.ticks_merged = 0
+        self.batches_out = 0
+
+    def push(self, reqId, quote):
+        with self._lock:
+            self.ticks_in += 1
+            if reqId in self._pending:
+                self.ticks_merged += 1
+            self._pending[reqId] = dict(quote)
+
+    def pending(self):
+        return bool(self._pending)
+
+    def drain(self):
+        with self._lock:
+            if not self._pending:
+                return {}
+            batch = self._pending
+            self._pending = {}
+            self.batches_out += 1
+        return batch
+
+    def stats(self):
+        with self._lock:
+            return {
+                'ticks_in': self.ticks_in,
+                'ticks_merged': self.ticks_merged,
+                'batches_out': self.batches_out,
+                'pending': len(self._pending),
+            }